@@ -5,73 +5,149 @@ Exports all nesting functionality: Fabric, Marker, and Aluminum Tube calculation
 
 from .core import (
     # Configuration
+    ENGINE_VERSION,
     MARKER_ROLL_LENGTH_MM,
     SAFETY_GAP_X_MM,
     SAFETY_GAP_Y_MM,
     APPLY_GAPS_TO_LENGTH,
     BOUNDARY_EPS,
+    MARKER_CACHE_MAX_ENTRIES,
+    MARKER_CACHE_MAX_BYTES,
+    MARKER_CACHE_TTL_S,
+    LINE_MEMO_MAX_ENTRIES,
+    LINE_MEMO_MAX_BYTES,
+    PARALLEL_CHUNK_MIN_PIECES,
+    PROGRESS_CHUNK_LINES,
+    TUBE_EXACT_MAX_PIECES,
+    TUBE_PATTERN_MIN_PIECES,
+    TUBE_LOCAL_SEARCH_MAX_MOVES,
+    TUBE_LOCAL_SEARCH_TIME_S,
+    TUBE_PLAN_MEMO_MAX_ENTRIES,
+    TUBE_PLAN_MEMO_MAX_BYTES,
     
     # Data Models
     Placement,
+    PlacementRun,
+    PlacementRuns,
     MarkerPlacedRect,
     Marker,
     TubeCut,
     TubePattern,
     TubePlan,
+    StockLength,
+    MultiStockTubePlan,
+    ProfileTubePlans,
     Line,
     
     # Fabric Nesting
     compute_layout,
+    compute_layout_runs,
     compute_layout_per_line,
     
     # Marker Nesting
     build_markers_from_layout,
+    compute_markers,
     clear_marker_cache,
+    marker_cache_stats,
     
     # Aluminum Tube Cutting
     compute_tube_plan,
+    compute_tube_plans,
+    compute_tube_plan_multi_stock,
+    compute_tube_plans_by_profile,
+    clear_tube_plan_memo,
+    tube_plan_memo_stats,
     validate_pieces,
+    validate_demand,
     pack_bfd,
+    pack_ffd,
+    pack_wfd,
     improve_pair_swaps,
     dedupe_patterns,
     
     # API Efficiency Calculation
     compute_efficiency,
+    clear_line_memo,
+    line_memo_stats,
+    
+    # Worker Pool
+    shutdown_process_pool,
+    
+    # Caching
+    LRUCache,
 )
 
 __all__ = [
     # Configuration
+    'ENGINE_VERSION',
     'MARKER_ROLL_LENGTH_MM',
     'SAFETY_GAP_X_MM',
     'SAFETY_GAP_Y_MM',
     'APPLY_GAPS_TO_LENGTH',
     'BOUNDARY_EPS',
+    'MARKER_CACHE_MAX_ENTRIES',
+    'MARKER_CACHE_MAX_BYTES',
+    'MARKER_CACHE_TTL_S',
+    'LINE_MEMO_MAX_ENTRIES',
+    'LINE_MEMO_MAX_BYTES',
+    'PARALLEL_CHUNK_MIN_PIECES',
+    'PROGRESS_CHUNK_LINES',
+    'TUBE_EXACT_MAX_PIECES',
+    'TUBE_PATTERN_MIN_PIECES',
+    'TUBE_LOCAL_SEARCH_MAX_MOVES',
+    'TUBE_LOCAL_SEARCH_TIME_S',
+    'TUBE_PLAN_MEMO_MAX_ENTRIES',
+    'TUBE_PLAN_MEMO_MAX_BYTES',
     
     # Data Models
     'Placement',
+    'PlacementRun',
+    'PlacementRuns',
     'MarkerPlacedRect',
     'Marker',
     'TubeCut',
     'TubePattern',
     'TubePlan',
+    'StockLength',
+    'MultiStockTubePlan',
+    'ProfileTubePlans',
     'Line',
     
     # Fabric Nesting
     'compute_layout',
+    'compute_layout_runs',
     'compute_layout_per_line',
     
     # Marker Nesting
     'build_markers_from_layout',
+    'compute_markers',
     'clear_marker_cache',
+    'marker_cache_stats',
     
     # Aluminum Tube Cutting
     'compute_tube_plan',
+    'compute_tube_plans',
+    'compute_tube_plan_multi_stock',
+    'compute_tube_plans_by_profile',
+    'clear_tube_plan_memo',
+    'tube_plan_memo_stats',
     'validate_pieces',
+    'validate_demand',
     'pack_bfd',
+    'pack_ffd',
+    'pack_wfd',
     'improve_pair_swaps',
     'dedupe_patterns',
     
     # API Efficiency Calculation
     'compute_efficiency',
+    'clear_line_memo',
+    'line_memo_stats',
+    
+    # Worker Pool
+    'shutdown_process_pool',
+    
+    # Caching
+    'LRUCache',
 ]
 
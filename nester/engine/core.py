@@ -4,12 +4,21 @@ Contains all nesting logic: Fabric Nesting
 """
 
 from __future__ import annotations
-from typing import List, Dict, Any, NamedTuple, Tuple, Optional
-from dataclasses import dataclass, field
-from collections import defaultdict
+from typing import List, Dict, Any, NamedTuple, Tuple, Optional, Set, Iterable, Iterator, Callable, Union
+from dataclasses import dataclass, field, replace
+from collections import OrderedDict, defaultdict
+from collections.abc import Sequence
+from itertools import repeat
+from bisect import bisect_left, bisect_right, insort
+from concurrent.futures import ProcessPoolExecutor, wait
+import atexit
+import threading
 import time
 import hashlib
 import logging
+import math
+import random
+import struct
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +26,25 @@ logger = logging.getLogger(__name__)
 # Configuration Constants
 # ============================================================================
 
+ENGINE_VERSION = "1.1.0"  # Bump when packing results change; part of memo/cache keys
 MARKER_ROLL_LENGTH_MM = 5900  # Marker length constraint (5.9 meters)
 SAFETY_GAP_X_MM = 10  # Gap along roll length (x-direction) between pieces with different heights
 SAFETY_GAP_Y_MM = 10  # Gap across roll width (y-direction) between shelves with different widths
 APPLY_GAPS_TO_LENGTH = True  # Include gaps in used length calculation
 BOUNDARY_EPS = 1e-6  # Epsilon for boundary detection (prevents floating-point issues)
+MARKER_CACHE_MAX_ENTRIES = 256  # Markerization results kept per process
+MARKER_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Approximate memory cap for cached markers
+MARKER_CACHE_TTL_S: Optional[float] = None  # Optional expiry for cached markers (None = no expiry)
+LINE_MEMO_MAX_ENTRIES = 4096  # Per-line layout results memoised by compute_efficiency
+LINE_MEMO_MAX_BYTES = 32 * 1024 * 1024  # Approximate memory cap for memoised line layouts
+PARALLEL_CHUNK_MIN_PIECES = 2000  # Smallest batch of pieces sent to a pool worker in parallel per-line layout
+PROGRESS_CHUNK_LINES = 50  # Line layouts packed between compute_efficiency progress reports
+TUBE_EXACT_MAX_PIECES = 400  # Above this the exact tube solver is not attempted (search depth = pieces)
+TUBE_PATTERN_MIN_PIECES = 5000  # Tube orders above this many pieces use the pattern solver
+TUBE_LOCAL_SEARCH_MAX_MOVES = 100_000  # Exchange evaluations per tube local search (improve_pair_swaps)
+TUBE_LOCAL_SEARCH_TIME_S = 5.0  # Safety cap on the tube local search; normal orders finish within the move budget first
+TUBE_PLAN_MEMO_MAX_ENTRIES = 512  # Tube plans memoised by compute_tube_plan
+TUBE_PLAN_MEMO_MAX_BYTES = 32 * 1024 * 1024  # Approximate memory cap for memoised tube plans
 
 # ============================================================================
 # Data Models
@@ -38,6 +61,104 @@ class Placement(NamedTuple):
     line_id: int = 1  # optional: source line for multi-line views
 
 
+class PlacementRun(NamedTuple):
+    """Run of identical placements side by side on one shelf (run-length Placement)."""
+    x: float       # mm along fabric length (shelf x0)
+    y: float       # mm across roll width of the first piece
+    w: float       # mm piece width across the roll (Y-extent)
+    h: float       # mm piece drop/length (X-extent)
+    level: int     # shelf index (0..)
+    item_id: int   # index of the first piece; the run covers item_id .. item_id + count - 1
+    count: int     # number of pieces in the run
+    pitch: float   # mm between consecutive pieces across the roll (w + gap)
+    line_id: int = 1  # optional: source line for multi-line views
+
+    def placements(self) -> Iterator[Placement]:
+        """Expand the run into one Placement per piece."""
+        for j in range(self.count):
+            yield Placement(
+                x=self.x, y=self.y + j * self.pitch, w=self.w, h=self.h,
+                level=self.level, item_id=self.item_id + j, line_id=self.line_id,
+            )
+
+
+_RUN_STRUCT = struct.Struct("<5d3q")  # x, y, w, h, pitch, level, item_id, count
+
+
+class PlacementRuns(Sequence):
+    """
+    Lazy, read-only sequence of Placements backed by PlacementRuns.
+
+    len() and area are computed from the runs; Placement objects are only
+    created when the sequence is iterated or indexed. The layout fingerprint is
+    hashed run by run (not piece by piece) and kept with the layout. A line_id
+    tag is applied to the runs on first access, so re-tagging a layout is O(1).
+    """
+
+    def __init__(
+        self,
+        runs: List[PlacementRun],
+        fingerprint: Optional[str] = None,
+        line_id: Optional[int] = None,
+    ):
+        self._runs = runs
+        self._line_id = line_id
+        self._tagged: Optional[List[PlacementRun]] = None if line_id is not None else runs
+        self._count = sum(r.count for r in runs)
+        self._expanded: Optional[List[Placement]] = None
+        self._fingerprint = fingerprint
+
+    @property
+    def runs(self) -> List[PlacementRun]:
+        """The placement runs (tagged with the layout's line_id, if any)."""
+        if self._tagged is None:
+            self._tagged = [r._replace(line_id=self._line_id) for r in self._runs]
+        return self._tagged
+
+    @property
+    def area(self) -> float:
+        """Total piece area in mm²."""
+        return float(sum(r.w * r.h * r.count for r in self._runs))
+
+    @property
+    def fingerprint(self) -> str:
+        """128-bit content hash of the layout geometry (line_id is not included)."""
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(digest_size=16)
+            pack = _RUN_STRUCT.pack
+            for r in self._runs:
+                digest.update(pack(r.x, r.y, r.w, r.h, r.pitch, r.level, r.item_id, r.count))
+            self._fingerprint = "r" + digest.hexdigest()
+        return self._fingerprint
+
+    def with_line_id(self, line_id: int) -> "PlacementRuns":
+        """Return the same runs tagged with a source line id (fingerprint carries over)."""
+        return PlacementRuns(self._runs, self._fingerprint, line_id)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Placement]:
+        if self._expanded is not None:
+            return iter(self._expanded)
+        return (p for r in self.runs for p in r.placements())
+
+    def __getitem__(self, index):
+        if self._expanded is None:
+            self._expanded = list(self)
+        return self._expanded[index]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (PlacementRuns, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"PlacementRuns(runs={len(self._runs)}, placements={self._count})"
+
+
 @dataclass(frozen=True)
 class MarkerPlacedRect:
     """A placed rectangle in a marker with exact coordinates from Fabric Nesting."""
@@ -74,6 +195,11 @@ class TubeCut:
     pieces_mm: List[int]           # in cut order for drawing
     used_mm: int                   # includes kerfs
     waste_mm: int
+    key: Tuple[int, ...] = field(default=(), repr=False)  # sorted pieces, set on creation
+
+    def __post_init__(self) -> None:
+        if not self.key and self.pieces_mm:
+            object.__setattr__(self, "key", tuple(sorted(self.pieces_mm)))
 
 
 @dataclass(frozen=True)
@@ -94,9 +220,72 @@ class TubePlan:
     efficiency: float              # 0..1
     total_used_mm: int
     total_waste_mm: int
-    tubes: List[TubeCut]
-    patterns: List[TubePattern]    # deduped for UI
+    patterns: List[TubePattern]    # the plan: unique cuts with counts, most common first
+    infeasible_pieces: List[Tuple[int, str]]  # (width_mm, reason)
+    algo: str = "BFD"              # solver that produced the tubes
+    lower_bound_tubes: int = 0     # proven minimum tube count (== num_tubes when optimal)
+    strategy: str = ""             # strategy whose tubes were kept (portfolio winner)
+    solve_ms: int = 0              # run time of that strategy
+
+    @property
+    def gap_tubes(self) -> int:
+        """Tubes above the proven lower bound (0 = proven optimal)."""
+        return self.num_tubes - self.lower_bound_tubes
+
+    @property
+    def tubes(self) -> List[TubeCut]:
+        """
+        One TubeCut per physical tube, pattern by pattern.
+
+        Built from the patterns on each access (tubes of a pattern share its
+        sample); use iter_tubes() to avoid materialising the list.
+        """
+        return list(self.iter_tubes())
+
+    def iter_tubes(self) -> Iterator[TubeCut]:
+        """Yield one TubeCut per physical tube, pattern by pattern."""
+        for pattern in self.patterns:
+            for _ in range(pattern.count):
+                yield pattern.sample
+
+
+@dataclass(frozen=True)
+class StockLength:
+    """A stock tube length available to multi-stock planning."""
+    length_mm: int
+    available: Optional[int] = None  # tubes in stock (None = unlimited)
+    cost: Optional[float] = None     # cost per tube (None = length_mm, i.e. minimise material)
+
+
+@dataclass(frozen=True)
+class MultiStockTubePlan:
+    """Cutting plan over several stock lengths, with one TubePlan per length used."""
+    plans: List[TubePlan]          # longest stock first
+    total_pieces: int
+    num_tubes: int
+    kerf_mm: int
+    efficiency: float              # 0..1, used / total stock length
+    total_stock_mm: int
+    total_used_mm: int
+    total_waste_mm: int
+    total_cost: float
+    lower_bound_cost: float        # LP bound; total_cost cannot go below it
     infeasible_pieces: List[Tuple[int, str]]  # (width_mm, reason)
+    algo: str = "MultiStock"
+    solve_ms: int = 0
+
+
+@dataclass(frozen=True)
+class ProfileTubePlans:
+    """Tube plans for an order with several profiles, one TubePlan per profile."""
+    plans: Dict[str, TubePlan]     # profile -> plan, in order of first appearance
+    total_pieces: int
+    num_tubes: int
+    total_stock_mm: int
+    total_used_mm: int
+    total_waste_mm: int
+    efficiency: float              # 0..1, used / total stock length
+    solve_ms: int = 0              # wall time of the grouped solve
 
 
 @dataclass
@@ -109,24 +298,250 @@ class Line:
     fabric_code: str | None = None
     series: str | None = None
 
+# ============================================================================
+# Worker Pool - shared process pool for opt-in parallel engine work
+# ============================================================================
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Return the engine's persistent process pool, creating it on first use.
+
+    The pool is sized by the first caller (default: CPU count) and reused for the
+    lifetime of the process, so parallel calls don't pay worker start-up each time.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=max_workers)
+            logger.info(f"[Pool] started engine process pool workers={_process_pool._max_workers}")
+        return _process_pool
+
+
+def shutdown_process_pool(wait: bool = True) -> None:
+    """Shut down the engine process pool (a new one is created on next use)."""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+atexit.register(shutdown_process_pool, wait=False)
+
+
+# ============================================================================
+# Caching - bounded, thread-safe LRU shared by engine caches
+# ============================================================================
+
+class LRUCache:
+    """
+    Thread-safe LRU cache bounded by entry count and approximate size in bytes,
+    with an optional TTL per entry. Keeps hit/miss/eviction counters.
+
+    Args:
+        max_entries: Maximum number of entries
+        max_bytes: Approximate size cap (None = unbounded); sizes come from `sizeof`
+        ttl_s: Seconds an entry stays valid (None = no expiry)
+        sizeof: Size estimate for a value in bytes (default: 0)
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: Optional[int] = None,
+        ttl_s: Optional[float] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self._sizeof = sizeof or (lambda value: 0)
+        self._data: "OrderedDict[Any, Tuple[Any, int, float]]" = OrderedDict()  # key -> (value, size, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """Return the cached value (marking it most recently used) or default."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, size, stored_at = entry
+            if self.ttl_s is not None and time.monotonic() - stored_at > self.ttl_s:
+                del self._data[key]
+                self._bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Any, value: Any) -> None:
+        """Store a value, evicting least recently used entries to stay within bounds."""
+        size = int(self._sizeof(value))
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            if self.max_bytes is not None and size > self.max_bytes:
+                return  # would evict everything and still not fit
+            self._data[key] = (value, size, time.monotonic())
+            self._bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                _, (_, evicted_size, _) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Current size and hit/miss/eviction counters."""
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
 # ============================================================================
 # Fabric Nesting - FFDH Algorithm
 # ============================================================================
 
-def _pack_ffdh(
-    items: List[Tuple[int, int]],  # (width_mm, drop_mm), already expanded by qty
+class _ShelfIndex:
+    """
+    Best-fit lookup over open shelves for _pack_ffdh.
+
+    Shelves are bucketed by height (tallest first). Each bucket keeps its shelves
+    sorted by (used_y, -shelf_idx), and a segment tree over the buckets stores the
+    fullest key and the emptiest used_y of every subtree. A query only descends
+    into subtrees that can still beat the current candidate, so finding the
+    best-fit shelf no longer scans every open shelf.
+    """
+
+    def __init__(self, heights: List[float]):
+        self._heights = sorted(set(heights), reverse=True)
+        self._rank = {h: i for i, h in enumerate(self._heights)}
+        # Same tolerance as the linear scan: a piece fits if h <= height + 1e-9
+        self._neg_limits = [-(h + 1e-9) for h in self._heights]
+        size = 1
+        while size < len(self._heights):
+            size *= 2
+        self._size = size
+        self._buckets: List[List[Tuple[float, int]]] = [[] for _ in self._heights]
+        self._top: List[Optional[Tuple[float, int]]] = [None] * (2 * size)
+        self._low: List[float] = [float("inf")] * (2 * size)
+
+    def _refresh(self, rank: int) -> None:
+        bucket = self._buckets[rank]
+        node = self._size + rank
+        self._top[node] = bucket[-1] if bucket else None
+        self._low[node] = bucket[0][0] if bucket else float("inf")
+        node //= 2
+        while node:
+            a, b = self._top[2 * node], self._top[2 * node + 1]
+            self._top[node] = a if b is None or (a is not None and a > b) else b
+            self._low[node] = min(self._low[2 * node], self._low[2 * node + 1])
+            node //= 2
+
+    def add(self, s_idx: int, height: float, used_y: float) -> None:
+        rank = self._rank[height]
+        insort(self._buckets[rank], (used_y, -s_idx))
+        self._refresh(rank)
+
+    def remove(self, s_idx: int, height: float, used_y: float) -> None:
+        rank = self._rank[height]
+        bucket = self._buckets[rank]
+        del bucket[bisect_left(bucket, (used_y, -s_idx))]
+        self._refresh(rank)
+
+    def best_fit(self, h: float, max_used_y: float) -> Optional[int]:
+        """
+        Return the index of the shelf with height >= h and the largest
+        used_y <= max_used_y (lowest shelf index on ties), or None.
+        """
+        r = bisect_right(self._neg_limits, -h)  # buckets [0, r) are tall enough
+        if r == 0:
+            return None
+        bound = (max_used_y, float("inf"))
+        best: Optional[Tuple[float, int]] = None
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            top = self._top[node]
+            if lo >= r or top is None or self._low[node] > max_used_y:
+                continue
+            if best is not None and top <= best:
+                continue
+            if hi <= r and top[0] <= max_used_y:
+                best = top
+                continue
+            if hi - lo == 1:
+                bucket = self._buckets[lo]
+                i = bisect_right(bucket, bound)
+                if i and (best is None or bucket[i - 1] > best):
+                    best = bucket[i - 1]
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return None if best is None else -best[1]
+
+
+def _shelf_capacity(used_y: float, pitch: float, roll_width_mm: int) -> int:
+    """
+    Number of further pieces of the given pitch that fit on a shelf filled to
+    used_y (same 1e-9 tolerance as placing them one at a time).
+    """
+    n = max(0, int((roll_width_mm - used_y + 1e-9) // pitch))
+    # Guard the floor against rounding at the tolerance boundary
+    while n > 0 and pitch > roll_width_mm - (used_y + (n - 1) * pitch) + 1e-9:
+        n -= 1
+    while pitch <= roll_width_mm - (used_y + n * pitch) + 1e-9:
+        n += 1
+    return n
+
+
+def _pack_ffdh_runs(
+    runs: List[Tuple[int, int, int]],  # (width_mm, drop_mm, count), in packing order
     roll_width_mm: int,
     gap_mm: float,
-    keep_input_order: bool = False,
-) -> Tuple[List[Placement], List[Dict[str, float]]]:
+) -> Tuple[List[PlacementRun], List[Dict[str, float]]]:
     """
-    First-Fit Decreasing Height (FFDH) with shelves aligned along X.
-    - Sort by drop (h) desc, then width (w) desc for stability (unless keep_input_order=True).
-    - In each shelf we consume Y (width) from 0→roll_width_mm.
-    - New shelf opens at x0 += prev.height + gap_mm.
-    Returns placements and shelf metadata [{'x0','height','used_y'}].
+    FFDH shelf packing (see _pack_ffdh) over runs of identical pieces.
+
+    Consecutive identical pieces keep going to the same best-fit shelf until it is
+    full, so each step puts as many pieces of the run on the chosen shelf as its
+    free Y allows (floor(free / pitch)) as one PlacementRun. Item ids are positions
+    in the expanded piece sequence.
+    With a fractional gap, k * pitch is not the float that adding pitch k times
+    gives, so pieces are placed one per run to keep y identical to per-piece
+    packing.
+    Returns placement runs and shelf metadata [{'x0','height','used_y'}].
     """
-    if not items:
+    if not runs:
         return [], []
 
     # Defensive clamps
@@ -134,152 +549,255 @@ def _pack_ffdh(
     roll_width_mm = int(roll_width_mm)
 
     # Validate immediate constraints
-    max_w = max(w for w, _ in items)
+    max_w = max(w for w, _, _ in runs)
     if max_w > roll_width_mm:
         raise ValueError(f"Item width {max_w}mm exceeds roll width {roll_width_mm}mm.")
 
-    # Stable order
-    enumerated = list(enumerate(items))
-    if not keep_input_order:
-        # OLD: height-desc resort; keep for legacy callers
-        enumerated.sort(key=lambda t: (-t[1][1], -t[1][0], t[0]))
-
-    placements: List[Placement] = []
+    placed: List[PlacementRun] = []
     shelves: List[Dict[str, float]] = []
+    index = _ShelfIndex([float(h) for _, h, _ in runs])
+    # A shelf with less room than this can never take another piece
+    min_need_y = gap_mm + min(w for w, _, _ in runs)
+    per_piece = not gap_mm.is_integer()
 
-    for idx, (w_mm, h_mm) in enumerated:
+    item_id = 0
+    for w_mm, h_mm, count in runs:
         if w_mm <= 0 or h_mm <= 0:
-            raise ValueError(f"Non-positive piece size at index {idx}: {w_mm}x{h_mm} mm.")
-
-        placed = False
-
-        # Best-Fit: choose shelf with least Y leftover after placement
-        best = None
-        for s_idx, s in enumerate(shelves):
-            # A piece can go on this shelf only if its drop fits within shelf height
-            if h_mm > s["height"] + 1e-9:
-                continue
-
-            remaining_y = roll_width_mm - s["used_y"]
-            need_y = w_mm if s["used_y"] == 0 else (gap_mm + w_mm)
-
-            if need_y <= remaining_y + 1e-9:
-                leftover = remaining_y - need_y
-                if best is None or leftover < best[0]:
-                    best = (leftover, s_idx, s)
-        
-        if best is not None:
-            _, s_idx, s = best
-            x = s["x0"]
-            y = 0.0 if s["used_y"] == 0 else s["used_y"] + gap_mm
-            placements.append(Placement(x=float(x), y=float(y), w=float(w_mm), h=float(h_mm), level=s_idx, item_id=idx))
-            s["used_y"] += (w_mm if y == 0.0 else gap_mm + w_mm)
-            placed = True
-
-        if placed:
-            continue
-
-        # Open a new shelf
-        x0 = 0.0 if not shelves else shelves[-1]["x0"] + shelves[-1]["height"] + gap_mm
-        s = {"x0": float(x0), "height": float(h_mm), "used_y": 0.0}
-        shelves.append(s)
-
-        # Place first item at y=0
-        placements.append(Placement(x=float(x0), y=0.0, w=float(w_mm), h=float(h_mm), level=len(shelves) - 1, item_id=idx))
-        s["used_y"] = float(w_mm)
+            raise ValueError(f"Non-positive piece size at index {item_id}: {w_mm}x{h_mm} mm.")
+
+        pitch = gap_mm + w_mm
+        left = count
+        while left > 0:
+            # Best-Fit: choose shelf with least Y leftover after placement.
+            # Open shelves are never empty, so each piece needs gap_mm + w_mm of Y.
+            s_idx = index.best_fit(h_mm, roll_width_mm - pitch + 1e-9)
+
+            if s_idx is not None:
+                s = shelves[s_idx]
+                k = 1 if per_piece else min(left, _shelf_capacity(s["used_y"], pitch, roll_width_mm))
+                y = s["used_y"] + gap_mm
+                index.remove(s_idx, s["height"], s["used_y"])
+                s["used_y"] += k * pitch
+            else:
+                # Open a new shelf; first piece at y=0, the rest of the run after it
+                x0 = 0.0 if not shelves else shelves[-1]["x0"] + shelves[-1]["height"] + gap_mm
+                s = {"x0": float(x0), "height": float(h_mm), "used_y": float(w_mm)}
+                shelves.append(s)
+                s_idx = len(shelves) - 1
+                k = 1 if per_piece else min(left, 1 + _shelf_capacity(s["used_y"], pitch, roll_width_mm))
+                y = 0.0
+                s["used_y"] += (k - 1) * pitch
+
+            placed.append(PlacementRun(
+                x=float(s["x0"]), y=float(y), w=float(w_mm), h=float(h_mm),
+                level=s_idx, item_id=item_id, count=k, pitch=float(pitch),
+            ))
+            if roll_width_mm - s["used_y"] + 1e-9 >= min_need_y:
+                index.add(s_idx, s["height"], s["used_y"])
+            item_id += k
+            left -= k
 
     # Final invariant pass (strict)
-    for p in placements:
-        if p.y + p.w > roll_width_mm + 1e-6:
-            raise AssertionError(f"Overflow across width: y={p.y} + w={p.w} > roll={roll_width_mm}")
+    by_level: Dict[int, List[PlacementRun]] = defaultdict(list)
+    for r in placed:
+        if r.y + (r.count - 1) * r.pitch + r.w > roll_width_mm + 1e-6:
+            raise AssertionError(f"Overflow across width: run at y={r.y} x{r.count} + w={r.w} > roll={roll_width_mm}")
+        by_level[r.level].append(r)
 
     for s_idx, s in enumerate(shelves):
         # Pieces on a shelf must not overlap in Y and must have h <= shelf.height
         ys = []
-        for p in placements:
-            if p.level == s_idx:
-                if p.h > s["height"] + 1e-6 or abs(p.x - s["x0"]) > 1e-6:
-                    raise AssertionError("Invalid piece placed into shelf.")
-                ys.append((p.y, p.y + p.w))
+        for r in by_level[s_idx]:
+            if r.h > s["height"] + 1e-6 or abs(r.x - s["x0"]) > 1e-6:
+                raise AssertionError("Invalid piece placed into shelf.")
+            ys.append((r.y, r.y + (r.count - 1) * r.pitch + r.w))
         ys.sort()
         for a, b in zip(ys, ys[1:]):
             if a[1] > b[0] + 1e-6:
                 raise AssertionError("Overlap within shelf detected.")
 
+    return placed, shelves
+
+
+def _pack_ffdh(
+    items: List[Tuple[int, int]],  # (width_mm, drop_mm), already expanded by qty
+    roll_width_mm: int,
+    gap_mm: float,
+    keep_input_order: bool = False,
+) -> Tuple[List[Placement], List[Dict[str, float]]]:
+    """
+    First-Fit Decreasing Height (FFDH) with shelves aligned along X.
+    - Sort by drop (h) desc, then width (w) desc for stability (unless keep_input_order=True).
+    - In each shelf we consume Y (width) from 0→roll_width_mm.
+    - New shelf opens at x0 += prev.height + gap_mm.
+    - Best-fit shelf lookup goes through _ShelfIndex (fullest shelf that still fits,
+      lowest shelf index on ties), i.e. the same choice as a linear scan.
+    Per-piece front end to _pack_ffdh_runs: consecutive identical pieces are packed
+    as one run and expanded back to Placements here.
+    Returns placements and shelf metadata [{'x0','height','used_y'}].
+    """
+    if not items:
+        return [], []
+
+    # Stable order
+    enumerated = list(enumerate(items))
+    if not keep_input_order:
+        # OLD: height-desc resort; keep for legacy callers
+        enumerated.sort(key=lambda t: (-t[1][1], -t[1][0], t[0]))
+
+    for idx, (w_mm, h_mm) in enumerated:
+        if w_mm <= 0 or h_mm <= 0:
+            raise ValueError(f"Non-positive piece size at index {idx}: {w_mm}x{h_mm} mm.")
+
+    # Collapse consecutive identical pieces into runs
+    runs: List[Tuple[int, int, int]] = []
+    for _, (w_mm, h_mm) in enumerated:
+        if runs and runs[-1][0] == w_mm and runs[-1][1] == h_mm:
+            runs[-1] = (w_mm, h_mm, runs[-1][2] + 1)
+        else:
+            runs.append((w_mm, h_mm, 1))
+
+    placed, shelves = _pack_ffdh_runs(runs, roll_width_mm, gap_mm)
+
+    # Map sequence positions back to input indices
+    order = [idx for idx, _ in enumerated]
+    placements = [
+        p._replace(item_id=order[p.item_id])
+        for r in placed
+        for p in r.placements()
+    ]
     return placements, shelves
 
 
 def _compact_layout(
-    placements: List[Placement],
+    placements: List[PlacementRun],
     shelves: List[Dict[str, float]],
     roll_width_mm: int,
     gap_y: float,
-) -> Tuple[List[Placement], List[Dict[str, float]]]:
+) -> Tuple[List[PlacementRun], List[Dict[str, float]]]:
     """
     Post-pack compaction:
     - Intra-shelf left-shift (normalize y based on sorted order, closing numerical gaps)
     - Merge adjacent equal-height shelves if the combined used_y fits within roll width
-    Returns updated placements and shelves. Never increases used length.
+    Returns updated placement runs and shelves. Never increases used length.
+
+    Runs are addressed through a per-level index of list positions, and shelf
+    x0 shifts are carried as a running offset while the shelves are walked once, so
+    every shift and merge costs amortised O(1) per run. With a fractional gap the
+    float sums are taken piece by piece and shift by shift, in the order a
+    per-piece compaction would take them, so results stay bit-identical.
     """
     if not placements or not shelves:
         return placements, shelves
 
-    # Intra-shelf normalize (left-shift)
-    by_level: Dict[int, List[Placement]] = {}
-    for p in placements:
-        by_level.setdefault(p.level, []).append(p)
-    new_placements: List[Placement] = list(placements)
-    for lvl, plist in by_level.items():
-        # Sort by y ascending
-        plist_sorted = sorted(plist, key=lambda p: p.y)
+    new_placements: List[PlacementRun] = list(placements)
+
+    # Level index: positions in new_placements per shelf, in placement order
+    members: List[List[int]] = [[] for _ in shelves]
+    for i, r in enumerate(new_placements):
+        members[r.level].append(i)
+
+    # Intra-shelf normalize (left-shift); pieces are re-spaced by w + gap_y
+    for lvl, idxs in enumerate(members):
+        if not idxs:
+            continue
+        # Sort by y ascending (stable, like sorting the placements themselves)
+        idxs_sorted = sorted(idxs, key=lambda i: new_placements[i].y)
         cursor_y = 0.0
-        for idx, p in enumerate(plist_sorted):
-            desired_y = cursor_y
-            if abs(p.y - desired_y) > 1e-6:
-                # Update placement y
-                i = new_placements.index(p)
-                new_placements[i] = Placement(x=p.x, y=float(desired_y), w=p.w, h=p.h, level=p.level, item_id=p.item_id, line_id=p.line_id)
-            cursor_y += p.w + (gap_y if idx < len(plist_sorted) - 1 else 0.0)
+        last = len(idxs_sorted) - 1
+        for k, i in enumerate(idxs_sorted):
+            r = new_placements[i]
+            pitch = r.w + gap_y
+            if abs(r.y - cursor_y) > 1e-6 or (r.count > 1 and r.pitch != pitch):
+                new_placements[i] = r._replace(y=float(cursor_y), pitch=float(pitch))
+            if r.count == 1:
+                cursor_y += r.w + (gap_y if k < last else 0.0)
+            else:
+                cursor_y += r.count * pitch - (gap_y if k == last else 0.0)
         # Update shelf used_y
         shelves[lvl]["used_y"] = min(float(roll_width_mm), float(cursor_y))
 
-    # Attempt merges for adjacent equal-height shelves
-    i = 0
-    while i < len(shelves) - 1:
-        s1 = shelves[i]
-        s2 = shelves[i + 1]
+    # Merge adjacent equal-height shelves in a single forward walk. A shelf that
+    # absorbed a neighbour has its pieces re-seated at its x0; shelves that were
+    # only shifted keep their placements' x (as the list-rebuilding version did).
+    merged_shelves: List[Dict[str, float]] = []
+    shift_x = 0.0
+    shifts: List[float] = []  # Individual shifts, applied one by one for a fractional gap
+    exact_sums = float(gap_y).is_integer()
+
+    def _finish(orig_lvl: int, shelf_members: List[int], absorbed: bool) -> None:
+        lvl = len(merged_shelves) - 1
+        if lvl == orig_lvl and not absorbed:
+            return
+        x0 = merged_shelves[-1]["x0"]
+        for i in shelf_members:
+            r = new_placements[i]
+            new_placements[i] = r._replace(x=x0 if absorbed else r.x, level=lvl)
+
+    s1 = shelves[0]
+    s1_lvl, s1_members, s1_absorbed = 0, members[0], False
+    merged_shelves.append(s1)
+    for lvl in range(1, len(shelves)):
+        s2 = shelves[lvl]
         if abs(s1["height"] - s2["height"]) <= 1e-6:
             # Sum used_y with one in-shelf gap if both have items
             connector = gap_y if (s1["used_y"] > 0 and s2["used_y"] > 0) else 0.0
             if s1["used_y"] + connector + s2["used_y"] <= roll_width_mm + 1e-6:
-                # We can merge: move all level i+1 placements to level i, packed after s1.used_y
-                start_y = s1["used_y"] + (gap_y if s1["used_y"] > 0 and s2["used_y"] > 0 else 0.0)
-                moved: List[Placement] = []
-                for idx_p, p in enumerate(new_placements):
-                    if p.level == i + 1:
-                        new_p = Placement(x=s1["x0"], y=float(start_y), w=p.w, h=p.h, level=i, item_id=p.item_id, line_id=p.line_id)
-                        moved.append((idx_p, new_p))
-                        start_y += p.w + (gap_y if start_y > 0 else 0.0)
-                for idx_p, new_p in moved:
-                    new_placements[idx_p] = new_p
-                # Remove shelf i+1 and collapse subsequent x0 by (s2.height + gap_y)
-                delta_x = s2["height"] + gap_y
-                del shelves[i + 1]
-                for j in range(i + 1, len(shelves)):
-                    shelves[j]["x0"] -= delta_x
-                # Update s1 used_y
+                # Move all placements of s2 onto s1, packed after s1.used_y. s1 always
+                # holds a piece, so every moved piece is followed by a gap.
+                start_y = s1["used_y"] + connector
+                for i in members[lvl]:
+                    r = new_placements[i]
+                    pitch = r.w + gap_y
+                    new_placements[i] = r._replace(y=float(start_y), pitch=float(pitch))
+                    start_y += r.count * pitch
+                s1_members.extend(members[lvl])
+                s1_absorbed = True
                 s1["used_y"] = min(float(roll_width_mm), float(start_y))
-                # Update levels for placements beyond removed shelf
-                updated: List[Placement] = []
-                for p in new_placements:
-                    lvl = p.level - 1 if p.level > i + 1 else p.level
-                    updated.append(Placement(x=p.x if lvl != i else s1["x0"], y=p.y, w=p.w, h=p.h, level=lvl, item_id=p.item_id, line_id=p.line_id))
-                new_placements = updated
-                # Do not advance i to re-check potential further merges
+                # Every later shelf moves back by the removed shelf's height + gap
+                shift_x += s2["height"] + gap_y
+                if not exact_sums:
+                    shifts.append(s2["height"] + gap_y)
                 continue
-        i += 1
+        _finish(s1_lvl, s1_members, s1_absorbed)
+        if exact_sums:
+            s2["x0"] -= shift_x
+        else:
+            for delta_x in shifts:
+                s2["x0"] -= delta_x
+        s1, s1_lvl, s1_members, s1_absorbed = s2, lvl, members[lvl], False
+        merged_shelves.append(s1)
+    _finish(s1_lvl, s1_members, s1_absorbed)
+
+    return new_placements, merged_shelves
+
+
+def _sorted_runs(runs: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """Merge identical (width_mm, drop_mm) runs and put them in packing order."""
+    counts: Dict[Tuple[int, int], int] = {}
+    for (w, h, c) in runs:
+        if c < 0:
+            raise ValueError(f"Negative count {c} for {w}x{h}mm.")
+        if c:
+            counts[(w, h)] = counts.get((w, h), 0) + c
+
+    # Force largest-first to land at bottom-left
+    return sorted(((w, h, c) for (w, h), c in counts.items()), key=lambda t: (-(t[0]*t[1]), -t[0], -t[1]))
+
 
-    return new_placements, shelves
+def _check_run_limits(runs: List[Tuple[int, int, int]]) -> None:
+    """Hard piece-count and dimension limits for fabric layouts."""
+    # Hard limits (as specified)
+    if sum(c for _, _, c in runs) > 100000:  # safety guard for accidental huge inputs
+        raise ValueError("Too many pieces.")
+
+    for (w, h, _) in runs:
+        if w > 3200:
+            raise ValueError(f"Width {w}mm exceeds maximum 3200mm.")
+        if h > 5000:
+            raise ValueError(f"Drop {h}mm exceeds maximum 5000mm.")
+        if w <= 0 or h <= 0:
+            raise ValueError("Non-positive dimensions encountered.")
 
 
 def compute_layout(
@@ -291,22 +809,36 @@ def compute_layout(
     Pack a single set of blinds on one roll width.
     Returns:
       {
-        'placements': [Placement],
+        'placements': PlacementRuns,           # lazy sequence of Placement
         'used_length_mm': float,               # along X
         'utilization': float,                  # area / (roll_width * used_length)
         'levels': int,                         # number of shelves
         'meta': {'roll_width_mm', 'gap_mm', 'algo', 'ms'}
       }
     """
+    return compute_layout_runs([(w, h, 1) for (w, h) in blinds], roll_width_mm, gap_mm)
+
+
+def compute_layout_runs(
+    runs: List[Tuple[int, int, int]],
+    roll_width_mm: int,
+    gap_mm: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Pack blinds given as (width_mm, drop_mm, count) runs on one roll width.
+
+    Same result as compute_layout on the expanded piece list, but identical
+    pieces are packed a shelf at a time, so cost follows the number of shelves
+    rather than the quantity. Returns the same dict as compute_layout.
+    """
     t0 = time.perf_counter()
-    
-    # Force largest-first to land at bottom-left
-    blinds = sorted(blinds, key=lambda t: (-(t[0]*t[1]), -t[0], -t[1]))
+
+    runs = _sorted_runs(runs)
 
     # Empty fast-path
-    if not blinds:
+    if not runs:
         return {
-            "placements": [],
+            "placements": PlacementRuns([]),
             "used_length_mm": 0.0,
             "utilization": 0.0,
             "levels": 0,
@@ -318,35 +850,25 @@ def compute_layout(
             },
         }
 
-    # Hard limits (as specified)
-    if len(blinds) > 100000:  # safety guard for accidental huge inputs
-        raise ValueError("Too many pieces.")
-
-    for (w, h) in blinds:
-        if w > 3200:
-            raise ValueError(f"Width {w}mm exceeds maximum 3200mm.")
-        if h > 5000:
-            raise ValueError(f"Drop {h}mm exceeds maximum 5000mm.")
-        if w <= 0 or h <= 0:
-            raise ValueError("Non-positive dimensions encountered.")
+    _check_run_limits(runs)
 
-    placements, shelves = _pack_ffdh(blinds, int(roll_width_mm), float(gap_mm), keep_input_order=True)
+    placed, shelves = _pack_ffdh_runs(runs, int(roll_width_mm), float(gap_mm))
 
     # Post-pack compaction (uses gap as in-shelf gap; shelf gap is not increased)
-    placements, shelves = _compact_layout(placements, shelves, int(roll_width_mm), float(gap_mm))
+    placed, shelves = _compact_layout(placed, shelves, int(roll_width_mm), float(gap_mm))
 
     used_len = 0.0
     if shelves:
         used_len = shelves[-1]["x0"] + shelves[-1]["height"]  # no trailing gap
 
-    total_area = float(sum(w * h for (w, h) in blinds))
+    total_area = float(sum(w * h * c for (w, h, c) in runs))
     denom = (roll_width_mm * used_len) if used_len > 0 else 0.0
     util = (total_area / denom) if denom > 0 else 0.0
 
     ms = int(round((time.perf_counter() - t0) * 1000))
 
     return {
-        "placements": placements,
+        "placements": PlacementRuns(placed),
         "used_length_mm": round(used_len, 3),
         "utilization": max(0.0, min(1.0, util)),
         "levels": len(shelves),
@@ -359,65 +881,137 @@ def compute_layout(
     }
 
 
+def _layout_line(
+    li: int,
+    line: Dict[str, Any],
+    roll_width_mm: int,
+    gap_mm: float,
+) -> Dict[str, Any]:
+    """Pack one compute_layout_per_line line (li = position in the input list)."""
+    lid = int(line.get("line_id", li + 1))
+    rw = int(line.get("roll_width_mm", roll_width_mm))
+    gp = float(line.get("gap_mm", gap_mm))
+    runs: List[Tuple[int, int, int]] = (
+        list(line["runs"]) if "runs" in line
+        else [(w, h, 1) for (w, h) in line.get("items", [])]
+    )
+    pieces = sum(c for _, _, c in runs)
+
+    # Limits: qty ≤ 1000 per spec
+    if pieces > 1000:
+        raise ValueError(f"Line {lid}: quantity {pieces} exceeds 1000.")
+
+    # Validate width ≤ roll
+    if runs:
+        mw = max(w for w, _, _ in runs)
+        if mw > rw:
+            raise ValueError(f"Line {lid}: item width {mw}mm exceeds roll width {rw}mm.")
+
+    layout = compute_layout_runs(runs, rw, gp)
+
+    used = float(layout["used_length_mm"])
+    fabric_m1 = used / 1000.0
+    fabric_m2 = (rw * used) / 1_000_000.0
+
+    # Tag placements with line id
+    tagged = layout["placements"].with_line_id(lid)
+
+    return {
+        "line_id": lid,
+        "placements": tagged,
+        "used_length_mm": used,
+        "util": float(layout["utilization"]),
+        "fabric_m1": fabric_m1,
+        "fabric_m2": fabric_m2,
+        "levels": int(layout["levels"]),
+        "pieces": pieces,
+        "roll_width_mm": rw,
+    }
+
+
+def _layout_line_chunk(
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    roll_width_mm: int,
+    gap_mm: float,
+) -> List[Dict[str, Any]]:
+    """Pack a chunk of (position, line) pairs in order (process-pool entry point)."""
+    return [_layout_line(li, line, roll_width_mm, gap_mm) for li, line in chunk]
+
+
+def _line_pieces(line: Dict[str, Any]) -> int:
+    """Piece count of a compute_layout_per_line line, used to size pool chunks."""
+    if "runs" in line:
+        return sum(c for _, _, c in line["runs"])
+    return len(line.get("items", []))
+
+
+def _chunk_lines(
+    lines: List[Dict[str, Any]],
+    n_workers: int,
+) -> List[List[Tuple[int, Dict[str, Any]]]]:
+    """
+    Split lines into contiguous (position, line) chunks for the pool.
+
+    Aim for about four chunks per worker so uneven lines balance out, but never
+    fewer than PARALLEL_CHUNK_MIN_PIECES pieces per chunk, so small lines travel
+    together instead of paying a round trip each.
+    """
+    total = sum(_line_pieces(line) for line in lines)
+    target = max(PARALLEL_CHUNK_MIN_PIECES, -(-total // (4 * n_workers)))
+    chunks: List[List[Tuple[int, Dict[str, Any]]]] = []
+    current: List[Tuple[int, Dict[str, Any]]] = []
+    size = 0
+    for li, line in enumerate(lines):
+        current.append((li, line))
+        size += _line_pieces(line)
+        if size >= target:
+            chunks.append(current)
+            current, size = [], 0
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 def compute_layout_per_line(
     lines: List[Dict[str, Any]],
     roll_width_mm: int = 0,   # ignored if a line provides its own width
     gap_mm: float = 0.0,      # default gap unless overridden by line
+    max_workers: Optional[int] = None,
 ) -> Dict[str, Any]:
     """
     Compute packing per line and a simple combined metric.
     Each line dict may contain:
       {"line_id": int, "items": [(w,h), ...], "gap_mm": float, "roll_width_mm": int}
+    or, instead of "items", run-length pieces:
+      {"runs": [(w,h,count), ...]}
+
+    With max_workers > 1, lines are packed in chunks on the engine process pool;
+    results (and the first error raised) come back in input order, identical to
+    the sequential run.
     """
     t0 = time.perf_counter()
-    results: List[Dict[str, Any]] = []
+
+    chunks = _chunk_lines(lines, max_workers) if max_workers and max_workers > 1 else []
+    if len(chunks) > 1:
+        pool = _get_process_pool(max_workers)
+        n = len(chunks)
+        results: List[Dict[str, Any]] = [
+            lr
+            for chunk_results in pool.map(_layout_line_chunk, chunks, [roll_width_mm] * n, [gap_mm] * n)
+            for lr in chunk_results
+        ]
+    else:
+        results = [_layout_line(li, line, roll_width_mm, gap_mm) for li, line in enumerate(lines)]
 
     total_area = 0.0
     total_roll_area = 0.0
     combined_used_length = 0.0
 
-    for li, line in enumerate(lines):
-        lid = int(line.get("line_id", li + 1))
-        rw = int(line.get("roll_width_mm", roll_width_mm))
-        gp = float(line.get("gap_mm", gap_mm))
-        items: List[Tuple[int, int]] = list(line.get("items", []))
-
-        # Limits: qty ≤ 1000 per spec
-        if len(items) > 1000:
-            raise ValueError(f"Line {lid}: quantity {len(items)} exceeds 1000.")
-
-        # Validate width ≤ roll
-        if items:
-            mw = max(w for w, _ in items)
-            if mw > rw:
-                raise ValueError(f"Line {lid}: item width {mw}mm exceeds roll width {rw}mm.")
-
-        layout = compute_layout(items, rw, gp)
-
-        used = float(layout["used_length_mm"])
-        fabric_m1 = used / 1000.0
-        fabric_m2 = (rw * used) / 1_000_000.0
-
-        # Tag placements with line id
-        tagged = [Placement(p.x, p.y, p.w, p.h, p.level, p.item_id, line_id=lid) for p in layout["placements"]]
-
-        lr = {
-            "line_id": lid,
-            "placements": tagged,
-            "used_length_mm": used,
-            "util": float(layout["utilization"]),
-            "fabric_m1": fabric_m1,
-            "fabric_m2": fabric_m2,
-            "levels": int(layout["levels"]),
-            "pieces": len(items),
-            "roll_width_mm": rw,
-        }
-        results.append(lr)
-
-        # Combined metrics
-        total_area += sum(w * h for (w, h) in items)
-        total_roll_area += rw * used
-        combined_used_length += used
+    # Combined metrics
+    for lr in results:
+        total_area += lr["placements"].area
+        total_roll_area += lr["roll_width_mm"] * lr["used_length_mm"]
+        combined_used_length += lr["used_length_mm"]
 
     combined = {
         "placements": [],  # viewer renders per-line; combined placements not required
@@ -442,19 +1036,42 @@ def compute_layout_per_line(
 # Marker Nesting - Cut-line-aware Segmentation
 # ============================================================================
 
+def _markers_nbytes(markers: List[Marker]) -> int:
+    """Approximate memory held by a markerization result (object + field overhead)."""
+    return sum(450 + 500 * len(m.rects or ()) for m in markers)
+
+
 # Cache for markerization results
-_marker_cache: Dict[str, List[Marker]] = {}
+_marker_cache = LRUCache(
+    max_entries=MARKER_CACHE_MAX_ENTRIES,
+    max_bytes=MARKER_CACHE_MAX_BYTES,
+    ttl_s=MARKER_CACHE_TTL_S,
+    sizeof=_markers_nbytes,
+)
 
 
-def _make_cache_key(placements: List[Placement], roll_width_mm: int) -> str:
-    """Create cache key from placements content hash."""
-    items_data = []
-    for p in placements:
-        items_data.append((p.x, p.y, p.w, p.h, p.level, p.item_id))
-    
-    items_data.sort()
-    content = f"{roll_width_mm}:{len(items_data)}:{tuple(items_data)}"
-    return hashlib.sha256(content.encode()).hexdigest()[:16]
+_PLACEMENT_STRUCT = struct.Struct("<4d2q")  # x, y, w, h, level, item_id
+
+
+def _make_cache_key(
+    placements: List[Placement],
+    roll_width_mm: int,
+    roll_length_mm: int = MARKER_ROLL_LENGTH_MM,
+) -> str:
+    """
+    Create cache key from the layout fingerprint and roll dimensions.
+
+    Layouts from compute_layout carry their fingerprint (PlacementRuns.fingerprint),
+    so this is O(1) for them; plain placement lists are hashed here, order-insensitively.
+    """
+    fingerprint = getattr(placements, "fingerprint", None)
+    if fingerprint is None:
+        digest = hashlib.blake2b(digest_size=16)
+        pack = _PLACEMENT_STRUCT.pack
+        for item in sorted((p.x, p.y, p.w, p.h, p.level, p.item_id) for p in placements):
+            digest.update(pack(*item))
+        fingerprint = "p" + digest.hexdigest()
+    return f"{roll_width_mm}:{roll_length_mm}:{fingerprint}"
 
 
 def _normalize_local_x(items: List[Tuple[int, int, float, float, float, float]], marker_idx: int) -> List[Tuple[int, int, float, float, float, float]]:
@@ -548,18 +1165,69 @@ def _estimate_length_with_gaps(placements: List[Placement], marker_idx: int = 0)
     return used_len
 
 
-def build_markers_from_layout(
-    placements: List[Placement],
-    roll_width_mm: int,
-    batch_id: int,
-    roll_length_mm: int = MARKER_ROLL_LENGTH_MM
-) -> List[Marker]:
+class _GroupLength:
     """
-    Build markers from Fabric Nesting placements using cut-line-aware segmentation.
-    
-    CRITICAL: Never cuts rectangles. If a rectangle would cross the 5.9m boundary,
-    it is pushed entirely into the next marker.
-    
+    Running _estimate_length_with_gaps for a group grown in (x, level, item_id) order.
+
+    Normalization only shifts by the group's min x, so the length is
+    max(x + h) - min(x) plus one SAFETY_GAP_X_MM per x-adjacent pair of different
+    heights on a level. Placements arrive with non-decreasing x, so a new one is
+    always last on its level and only the level's last height is needed.
+    """
+
+    __slots__ = ("min_x", "max_end", "gap_count", "last_h")
+
+    def __init__(self):
+        self.min_x = float("inf")
+        self.max_end = float("-inf")
+        self.gap_count = 0
+        self.last_h: Dict[int, float] = {}
+
+    def _gap_delta(self, p: Placement) -> int:
+        last = self.last_h.get(p.level)
+        return 1 if last is not None and abs(last - float(p.h)) > 1e-6 else 0
+
+    def length_with(self, p: Placement) -> float:
+        """Estimated length of the group if p were added."""
+        x, h = float(p.x), float(p.h)
+        used_len = max(self.max_end, x + h) - min(self.min_x, x)
+        gap_count = self.gap_count + self._gap_delta(p)
+        if APPLY_GAPS_TO_LENGTH and gap_count > 0:
+            used_len += gap_count * SAFETY_GAP_X_MM
+        return used_len
+
+    @property
+    def length(self) -> float:
+        """Estimated length of the group as it stands."""
+        used_len = self.max_end - self.min_x
+        if APPLY_GAPS_TO_LENGTH and self.gap_count > 0:
+            used_len += self.gap_count * SAFETY_GAP_X_MM
+        return used_len
+
+    def add(self, p: Placement) -> None:
+        x, h = float(p.x), float(p.h)
+        self.gap_count += self._gap_delta(p)
+        self.min_x = min(self.min_x, x)
+        self.max_end = max(self.max_end, x + h)
+        self.last_h[p.level] = h
+
+
+def build_markers_from_layout(
+    placements: List[Placement],
+    roll_width_mm: int,
+    batch_id: int,
+    roll_length_mm: int = MARKER_ROLL_LENGTH_MM
+) -> List[Marker]:
+    """
+    Build markers from Fabric Nesting placements using cut-line-aware segmentation.
+    
+    CRITICAL: Never cuts rectangles. If a rectangle would cross the 5.9m boundary,
+    it is pushed entirely into the next marker.
+    
+    For a cut plan packed from scratch, compute_markers packs runs straight into
+    markers in one pass; this entry point is for callers that already hold a
+    layout's placements.
+    
     Args:
         placements: List of Placement objects from Fabric Nesting (exact source of truth)
         roll_width_mm: Roll width in mm
@@ -572,10 +1240,11 @@ def build_markers_from_layout(
     t0 = time.perf_counter()
     
     # Check cache
-    cache_key = _make_cache_key(placements, roll_width_mm)
-    if cache_key in _marker_cache:
+    cache_key = _make_cache_key(placements, roll_width_mm, roll_length_mm)
+    cached = _marker_cache.get(cache_key)
+    if cached is not None:
         logger.info(f"[Markers] cache_hit=True batch={roll_width_mm} items={len(placements)}")
-        return _marker_cache[cache_key]
+        return cached
     
     if not placements:
         return []
@@ -622,13 +1291,11 @@ def build_markers_from_layout(
             )
             # Group placements to ensure each group's total length (drops + gaps) <= 5.9m
             current_group: List[Placement] = []
+            group_length = _GroupLength()
             
             for p in sorted(marker_placements, key=lambda p: (p.x, p.level, p.item_id)):
-                # Create temporary group with new placement added
-                temp_group = current_group + [p]
-                
-                # Estimate length of temporary group including gaps
-                temp_estimated_length = _estimate_length_with_gaps(temp_group, marker_idx=next_marker_idx)
+                # Length of the group with this placement added (same as _estimate_length_with_gaps)
+                temp_estimated_length = group_length.length_with(p)
                 
                 # If adding this placement would exceed 5.9m (and current group is not empty), split
                 if temp_estimated_length > roll_length_mm + BOUNDARY_EPS and current_group:
@@ -636,9 +1303,11 @@ def build_markers_from_layout(
                     processed_buckets[next_marker_idx] = current_group
                     next_marker_idx += 1
                     current_group = [p]
+                    group_length = _GroupLength()
                 else:
                     # Add to current group (safe to add)
                     current_group.append(p)
+                group_length.add(p)
             
             if current_group:
                 processed_buckets[next_marker_idx] = current_group
@@ -745,16 +1414,125 @@ def build_markers_from_layout(
     )
     
     # Cache result
-    _marker_cache[cache_key] = markers
+    _marker_cache.put(cache_key, markers)
     
     return markers
 
 
+def compute_markers(
+    runs: List[Tuple[int, int, int]],
+    roll_width_mm: int,
+    gap_mm: float = 0.0,
+    batch_id: int = 1,
+    roll_length_mm: int = MARKER_ROLL_LENGTH_MM,
+) -> List[Marker]:
+    """
+    Pack (width_mm, drop_mm, count) runs straight into markers of roll_length_mm.
+
+    Shelves come from the same FFDH pack and compaction as compute_layout_runs and
+    are laid into markers in roll order: a shelf that would take the current marker
+    past roll_length_mm (drops plus SAFETY_GAP_X_MM per height change on a level,
+    as in build_markers_from_layout) opens the next marker at x=0. Shelves are never
+    cut, so no push or re-split pass is needed; only a single shelf that is longer
+    than a marker on its own (many gaps) is split by pieces.
+
+    Returns:
+        List of Marker objects in roll order, rects in marker-local coordinates
+    """
+    t0 = time.perf_counter()
+
+    runs = _sorted_runs(runs)
+    if not runs:
+        return []
+    _check_run_limits(runs)
+
+    placed, shelves = _pack_ffdh_runs(runs, int(roll_width_mm), float(gap_mm))
+    placed, shelves = _compact_layout(placed, shelves, int(roll_width_mm), float(gap_mm))
+
+    by_level: Dict[int, List[PlacementRun]] = defaultdict(list)
+    for r in placed:
+        by_level[r.level].append(r)
+
+    gap_x = SAFETY_GAP_X_MM if APPLY_GAPS_TO_LENGTH else 0
+    markers: List[Marker] = []
+
+    def _emit(rects: List[MarkerPlacedRect], used_len: float) -> None:
+        markers.append(Marker(
+            idx=len(markers) + 1,
+            batch_id=batch_id,
+            roll_width_mm=roll_width_mm,
+            length_mm=min(used_len, roll_length_mm),
+            rects=rects,
+        ))
+
+    # Open marker: its rects, the x0 of its first shelf, drop extent and gap count
+    cur_rects: List[MarkerPlacedRect] = []
+    cur_x0 = 0.0
+    cur_end = 0.0
+    cur_gaps = 0
+
+    for lvl, s in enumerate(shelves):
+        level_runs = sorted(by_level[lvl], key=lambda r: r.item_id)
+        if not level_runs:
+            continue
+        gaps = sum(1 for a, b in zip(level_runs, level_runs[1:]) if abs(a.h - b.h) > 1e-6)
+        drop = max(r.h for r in level_runs)
+
+        if cur_rects:
+            end = max(cur_end, s["x0"] - cur_x0 + drop)
+            if end + (cur_gaps + gaps) * gap_x <= roll_length_mm + BOUNDARY_EPS:
+                local_x = s["x0"] - cur_x0
+                cur_rects.extend(
+                    MarkerPlacedRect(p.item_id, p.level, local_x, p.y, p.w, p.h)
+                    for r in level_runs for p in r.placements()
+                )
+                cur_end, cur_gaps = end, cur_gaps + gaps
+                continue
+            _emit(cur_rects, cur_end + cur_gaps * gap_x)
+            cur_rects = []
+
+        if drop + gaps * gap_x <= roll_length_mm + BOUNDARY_EPS:
+            cur_rects = [
+                MarkerPlacedRect(p.item_id, p.level, 0.0, p.y, p.w, p.h)
+                for r in level_runs for p in r.placements()
+            ]
+            cur_x0, cur_end, cur_gaps = s["x0"], drop, gaps
+            continue
+
+        # A shelf longer than a marker on its own: split its pieces as
+        # build_markers_from_layout does
+        group: List[MarkerPlacedRect] = []
+        group_length = _GroupLength()
+        for p in (p._replace(x=0.0) for r in level_runs for p in r.placements()):
+            if group and group_length.length_with(p) > roll_length_mm + BOUNDARY_EPS:
+                _emit(group, group_length.length)
+                group, group_length = [], _GroupLength()
+            group.append(MarkerPlacedRect(p.item_id, p.level, 0.0, p.y, p.w, p.h))
+            group_length.add(p)
+        _emit(group, group_length.length)
+
+    if cur_rects:
+        _emit(cur_rects, cur_end + cur_gaps * gap_x)
+
+    max_len = max(m.length_mm for m in markers) if markers else 0.0
+    runtime_ms = (time.perf_counter() - t0) * 1000
+    logger.info(
+        f"[Markers] batch={roll_width_mm} items={sum(c for _, _, c in runs)} markers={len(markers)} "
+        f"max_len={max_len:.1f}mm runtime={runtime_ms:.1f}ms single_pass=True"
+    )
+
+    return markers
+
+
 def clear_marker_cache():
     """Clear the markerization cache (call when layout changes)."""
-    global _marker_cache
     _marker_cache.clear()
 
+
+def marker_cache_stats() -> Dict[str, int]:
+    """Entries, approximate bytes and hit/miss/eviction counters of the markerization cache."""
+    return _marker_cache.stats()
+
 # ============================================================================
 # Aluminum Tube Cutting - 1D Cutting Stock Problem
 # ============================================================================
@@ -801,6 +1579,46 @@ def validate_pieces(
     return valid_pieces, infeasible
 
 
+def validate_demand(
+    items: List[Tuple[int, int]],
+    stock_length_mm: int,
+    kerf_mm: int
+) -> Tuple[List[Tuple[int, int]], List[Tuple[int, str]]]:
+    """
+    Validate pieces like validate_pieces, but keep them as demand counts.
+    
+    Args:
+        items: [(width_mm, qty), ...]
+        stock_length_mm: Stock tube length
+        kerf_mm: Saw blade width
+        
+    Returns:
+        (demand, infeasible_pieces): demand is [(width_mm, total_qty), ...] with one
+        entry per distinct width, in order of first appearance
+    """
+    demand: Dict[int, int] = {}
+    infeasible = []
+    
+    for width_mm, qty in items:
+        if qty <= 0:
+            logger.warning(f"Skipping item with non-positive quantity: {width_mm}mm × {qty}")
+            continue
+            
+        if width_mm <= 0:
+            logger.warning(f"Skipping item with non-positive width: {width_mm}mm")
+            continue
+        
+        if width_mm > stock_length_mm:
+            reason = f"{width_mm}mm exceeds stock length {stock_length_mm}mm"
+            infeasible.append((width_mm, reason))
+            logger.warning(f"Infeasible piece: {reason}")
+            continue
+        
+        demand[width_mm] = demand.get(width_mm, 0) + qty
+    
+    return list(demand.items()), infeasible
+
+
 def pack_bfd(
     pieces: List[int],
     stock_length_mm: int,
@@ -813,6 +1631,9 @@ def pack_bfd(
     - Choose tube with minimal remaining capacity that fits
     - If no tube fits, open new tube
     
+    Open tubes are kept in a list of (remaining, tube_index) sorted with bisect,
+    so the best fit (smallest remaining, earliest tube on ties) is one lookup.
+    
     Args:
         pieces: List of piece lengths in mm (sorted descending)
         stock_length_mm: Tube stock length
@@ -825,36 +1646,34 @@ def pack_bfd(
         return []
     
     tubes: List[Dict] = []  # {'pieces': [int], 'used': int}
+    # (remaining, tube index) of tubes that can still take a piece; every open tube
+    # holds a piece, so a further piece always needs piece_mm + kerf_mm
+    by_remaining: List[Tuple[int, int]] = []
+    min_needed = min(pieces) + kerf_mm
     
     for piece_mm in pieces:
-        best_tube = None
-        best_remaining = float('inf')
-        
-        # Find tube with smallest remaining capacity that fits this piece
-        for tube in tubes:
-            # Calculate space needed (include kerf if not first piece in tube)
-            needed = piece_mm
-            if tube['pieces']:  # Not empty
-                needed += kerf_mm
-            
-            remaining = stock_length_mm - tube['used']
-            
-            if needed <= remaining and remaining < best_remaining:
-                best_tube = tube
-                best_remaining = remaining
+        needed = piece_mm + kerf_mm
+        pos = bisect_left(by_remaining, (needed, -1))
         
-        if best_tube is not None:
+        if pos < len(by_remaining):
             # Add to best-fit tube
-            if best_tube['pieces']:
-                best_tube['used'] += kerf_mm
+            _, t_idx = by_remaining.pop(pos)
+            best_tube = tubes[t_idx]
+            best_tube['used'] += kerf_mm
             best_tube['pieces'].append(piece_mm)
             best_tube['used'] += piece_mm
         else:
             # Open new tube
-            tubes.append({
+            t_idx = len(tubes)
+            best_tube = {
                 'pieces': [piece_mm],
                 'used': piece_mm
-            })
+            }
+            tubes.append(best_tube)
+        
+        remaining = stock_length_mm - best_tube['used']
+        if remaining >= min_needed:
+            insort(by_remaining, (remaining, t_idx))
     
     # Convert to TubeCut objects
     result = []
@@ -869,23 +1688,150 @@ def pack_bfd(
     return result
 
 
+def _tube_cut(pieces: List[int], stock_length_mm: int, kerf_mm: int) -> TubeCut:
+    """TubeCut for pieces in cut order (kerf between adjacent cuts)."""
+    used = sum(pieces) + kerf_mm * (len(pieces) - 1)
+    return TubeCut(pieces_mm=pieces, used_mm=used, waste_mm=stock_length_mm - used)
+
+
+def pack_ffd(
+    pieces: List[int],
+    stock_length_mm: int,
+    kerf_mm: int
+) -> List[TubeCut]:
+    """
+    First-Fit Decreasing bin packing algorithm.
+    
+    For each piece (already sorted descending), use the earliest opened tube it
+    fits in, else open a new tube. A max-free segment tree over tube positions
+    finds that tube in O(log n).
+    
+    Args:
+        pieces: List of piece lengths in mm (sorted descending)
+        stock_length_mm: Tube stock length
+        kerf_mm: Kerf between adjacent cuts (not at tube edges)
+        
+    Returns:
+        List of TubeCut objects
+    """
+    if not pieces:
+        return []
+    
+    size = 1
+    while size < len(pieces):
+        size *= 2
+    tree = [-1] * (2 * size)  # max free capacity per subtree; -1 = no tube yet
+    tubes: List[List[int]] = []
+    
+    for piece_mm in pieces:
+        # Every open tube holds a piece, so a further one needs piece + kerf
+        needed = piece_mm + kerf_mm
+        if tree[1] >= needed:
+            node = 1
+            while node < size:
+                node = 2 * node if tree[2 * node] >= needed else 2 * node + 1
+            t_idx = node - size
+            tubes[t_idx].append(piece_mm)
+            free = tree[node] - needed
+        else:
+            t_idx = len(tubes)
+            tubes.append([piece_mm])
+            node = size + t_idx
+            free = stock_length_mm - piece_mm
+        tree[node] = free
+        node //= 2
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+    
+    return [_tube_cut(t, stock_length_mm, kerf_mm) for t in tubes]
+
+
+def pack_wfd(
+    pieces: List[int],
+    stock_length_mm: int,
+    kerf_mm: int
+) -> List[TubeCut]:
+    """
+    Worst-Fit Decreasing bin packing algorithm.
+    
+    For each piece (already sorted descending), use the open tube with the most
+    free capacity (earliest on ties) if it fits, else open a new tube. Spreads
+    pieces across tubes, which gives the local search different starting points.
+    
+    Args:
+        pieces: List of piece lengths in mm (sorted descending)
+        stock_length_mm: Tube stock length
+        kerf_mm: Kerf between adjacent cuts (not at tube edges)
+        
+    Returns:
+        List of TubeCut objects
+    """
+    if not pieces:
+        return []
+    
+    tubes: List[List[int]] = []
+    by_free: List[Tuple[int, int]] = []  # (free, -tube index): last = most free, earliest
+    
+    for piece_mm in pieces:
+        needed = piece_mm + kerf_mm
+        if by_free and by_free[-1][0] >= needed:
+            free, neg_idx = by_free.pop()
+            tubes[-neg_idx].append(piece_mm)
+            insort(by_free, (free - needed, neg_idx))
+        else:
+            tubes.append([piece_mm])
+            insort(by_free, (stock_length_mm - piece_mm, -(len(tubes) - 1)))
+    
+    return [_tube_cut(t, stock_length_mm, kerf_mm) for t in tubes]
+
+
+def _subset_sums(pieces: List[int], kerf_mm: int) -> List[Tuple[int, Tuple[int, ...]]]:
+    """(kerf-transformed size, positions) of every 1- and 2-piece subset, sorted by size."""
+    sizes = [p + kerf_mm for p in pieces]
+    subsets = [(sizes[i], (i,)) for i in range(len(sizes))]
+    subsets.extend(
+        (sizes[i] + sizes[j], (i, j))
+        for i in range(len(sizes))
+        for j in range(i + 1, len(sizes))
+    )
+    subsets.sort()
+    return subsets
+
+
 def improve_pair_swaps(
     tubes: List[TubeCut],
     stock_length_mm: int,
     kerf_mm: int,
-    max_passes: int = 2
+    max_passes: int = 10,
+    time_limit_s: float = TUBE_LOCAL_SEARCH_TIME_S,
+    max_moves: int = TUBE_LOCAL_SEARCH_MAX_MOVES,
 ) -> List[TubeCut]:
     """
-    Improve packing by trying piece swaps between tube pairs.
+    Improve packing by local search over piece moves and swaps between tubes.
+    
+    Tubes are tried for elimination from the emptiest up: the target's pieces
+    are lifted out, then every tube with free space takes the best 0-1, 0-2,
+    1-1, 1-2, 2-1 or 2-2 exchange with them that makes it fuller (larger lifted
+    pieces in, smaller ones back out). The lifted pieces are then re-inserted
+    best fit; if all of them fit, the tube count drops, otherwise what is left
+    becomes a tube again with the waste consolidated into it.
     
-    For each pair of tubes, try swapping pieces to reduce tube count
-    or decrease total waste.
+    Free space is kept in a bisect-sorted (free, tube) index, so best-fit
+    insertion is a lookup and tubes without free space are never scanned.
     
     Args:
         tubes: Current tube cutting plan
         stock_length_mm: Tube stock length
         kerf_mm: Kerf between cuts
-        max_passes: Maximum improvement passes
+        max_passes: Maximum passes over the tubes (stops early when a pass
+                    eliminates nothing)
+        time_limit_s: Wall-clock safety cap; the plan found so far is returned
+                      when it runs out
+        max_moves: Exchange evaluations (one per tube offered the lifted
+                   pieces) before the search stops. This budget, not the clock,
+                   bounds the search on normal orders, so the same input always
+                   gives the same plan.
         
     Returns:
         Improved list of TubeCut objects
@@ -893,94 +1839,594 @@ def improve_pair_swaps(
     if len(tubes) <= 1:
         return tubes
     
-    def calc_used(pieces: List[int]) -> int:
-        """Calculate used length including kerfs."""
-        if not pieces:
-            return 0
-        return sum(pieces) + kerf_mm * (len(pieces) - 1)
-    
-    # Convert to mutable format
-    mutable_tubes = [[p for p in tube.pieces_mm] for tube in tubes]
-    
-    for pass_num in range(max_passes):
-        improved = False
+    deadline = time.perf_counter() + max(0.0, time_limit_s)
+    moves_left = max(0, int(max_moves))
+    
+    def out_of_budget() -> bool:
+        return moves_left <= 0 or time.perf_counter() > deadline
+    
+    # Kerf-transformed sizes: a tube holds pieces when sum(p + kerf) <= stock + kerf
+    capacity = stock_length_mm + kerf_mm
+    bins: List[Optional[List[int]]] = [list(tube.pieces_mm) for tube in tubes]
+    load = [sum(pieces) + kerf_mm * len(pieces) for pieces in bins]
+    changed = [False] * len(bins)
+    by_free: List[Tuple[int, int]] = sorted((capacity - load[i], i) for i in range(len(bins)))
+    total_free = sum(capacity - l for l in load)
+    
+    def unindex(i: int) -> None:
+        del by_free[bisect_left(by_free, (capacity - load[i], i))]
+    
+    def reload(i: int, delta: int) -> None:
+        nonlocal total_free
+        unindex(i)
+        load[i] += delta
+        total_free -= delta
+        changed[i] = True
+        insort(by_free, (capacity - load[i], i))
+    
+    def attempt(t: int) -> bool:
+        nonlocal total_free, moves_left
+        lifted = bins[t]
+        unindex(t)
+        total_free -= capacity - load[t]
+        bins[t] = None
         
-        # Try all tube pairs
-        for i in range(len(mutable_tubes)):
-            for j in range(i + 1, len(mutable_tubes)):
-                tube_a = mutable_tubes[i]
-                tube_b = mutable_tubes[j]
-                
-                if not tube_a or not tube_b:
-                    continue
-                
-                # Try moving each piece from A to B
-                for piece_idx in range(len(tube_a)):
-                    piece = tube_a[piece_idx]
-                    
-                    # Check if piece fits in tube B
-                    new_b_used = calc_used(tube_b + [piece])
-                    if new_b_used <= stock_length_mm:
-                        # Check if this improves the solution
-                        new_a = tube_a[:piece_idx] + tube_a[piece_idx+1:]
-                        
-                        # If tube A becomes empty, we reduced tube count
-                        if not new_a:
-                            tube_a.clear()
-                            tube_a.extend(new_a)
-                            tube_b.append(piece)
-                            improved = True
-                            break
-                
-                if improved:
-                    break
-            if improved:
+        # Exchange phase: make each tube with free space as full as possible
+        lifted_subsets = _subset_sums(lifted, kerf_mm)
+        lifted_sizes = [s for s, _ in lifted_subsets]
+        for free_b, b in [e for e in by_free if e[0] > 0]:
+            if out_of_budget():
+                break
+            moves_left -= 1
+            pieces = bins[b]
+            free_b = capacity - load[b]
+            best_gain, best_out, best_in = 0, (), ()
+            for out_size, out in [(0, ())] + _subset_sums(pieces, kerf_mm):
+                k = bisect_right(lifted_sizes, out_size + free_b) - 1
+                if k >= 0 and lifted_sizes[k] - out_size > best_gain:
+                    best_gain, best_out, best_in = lifted_sizes[k] - out_size, out, lifted_subsets[k][1]
+            if best_gain <= 0:
+                continue
+            moved_in = [lifted[i] for i in best_in]
+            moved_out = [pieces[i] for i in best_out]
+            bins[b] = [p for i, p in enumerate(pieces) if i not in best_out] + moved_in
+            lifted = [p for i, p in enumerate(lifted) if i not in best_in] + moved_out
+            reload(b, best_gain)
+            if not lifted:
                 break
+            lifted_subsets = _subset_sums(lifted, kerf_mm)
+            lifted_sizes = [s for s, _ in lifted_subsets]
         
-        # Remove empty tubes
-        mutable_tubes = [t for t in mutable_tubes if t]
+        # Re-insert what is left, largest first, best fit
+        left = []
+        for piece in sorted(lifted, reverse=True):
+            k = bisect_left(by_free, (piece + kerf_mm, -1))
+            if k < len(by_free):
+                b = by_free[k][1]
+                bins[b].append(piece)
+                reload(b, piece + kerf_mm)
+            else:
+                left.append(piece)
         
-        if not improved:
+        if not left:
+            return True
+        bins[t] = left
+        load[t] = sum(left) + kerf_mm * len(left)
+        changed[t] = True
+        total_free += capacity - load[t]
+        insort(by_free, (capacity - load[t], t))
+        return False
+    
+    for pass_num in range(max_passes):
+        improved = False
+        for t in sorted((i for i in range(len(bins)) if bins[i]), key=lambda i: load[i]):
+            if out_of_budget():
+                break
+            # The others' free space must be able to hold the whole tube
+            if bins[t] is None or total_free - (capacity - load[t]) < load[t]:
+                continue
+            if attempt(t):
+                improved = True
+        if not improved or out_of_budget():
             break
     
     # Convert back to TubeCut objects
     result = []
-    for pieces in mutable_tubes:
-        if pieces:
-            used = calc_used(pieces)
-            waste = stock_length_mm - used
-            result.append(TubeCut(
-                pieces_mm=pieces,
-                used_mm=used,
-                waste_mm=waste
-            ))
+    for tube, pieces, was_changed in zip(tubes, bins, changed):
+        if not pieces:
+            continue
+        if not was_changed:
+            result.append(tube)
+            continue
+        pieces = sorted(pieces, reverse=True)
+        used = sum(pieces) + kerf_mm * (len(pieces) - 1)
+        result.append(TubeCut(
+            pieces_mm=pieces,
+            used_mm=used,
+            waste_mm=stock_length_mm - used
+        ))
     
     return result
 
 
-def dedupe_patterns(tubes: List[TubeCut]) -> List[TubePattern]:
+def _tube_lower_bound(pieces: List[int], stock_length_mm: int, kerf_mm: int) -> int:
+    """
+    Lower bound on the tube count.
+
+    A tube holds pieces p1..pn when sum(p) + kerf * (n - 1) <= stock, i.e.
+    sum(p + kerf) <= stock + kerf, so this is bin packing with sizes p + kerf and
+    capacity stock + kerf. The bound is the larger of the total size over the
+    capacity and the number of pieces that cannot share a tube with each other.
+    """
+    if not pieces:
+        return 0
+    capacity = stock_length_mm + kerf_mm
+    total = sum(pieces) + kerf_mm * len(pieces)
+    big = sum(1 for p in pieces if 2 * (p + kerf_mm) > capacity)
+    return max(-(-total // capacity), big)
+
+
+class _SearchStopped(Exception):
+    """Raised inside _solve_exact to unwind the search (optimum reached or time up)."""
+
+
+def _solve_exact(
+    pieces: List[int],
+    stock_length_mm: int,
+    kerf_mm: int,
+    upper_bound: int,
+    lower_bound: int,
+    time_limit_s: float,
+) -> Tuple[Optional[List[List[int]]], int]:
+    """
+    Branch-and-bound over piece-to-tube assignments (kerf-transformed sizes).
+
+    Pieces are placed largest first into each open tube with a distinct remaining
+    capacity, or into a new tube; a node is pruned when the open tubes plus the
+    tubes still needed for the remaining size (after filling usable free space)
+    reach the best count found. The search stops at lower_bound or time_limit_s.
+
+    Returns (tubes, proven_lower_bound): tubes is the best assignment with fewer
+    than upper_bound tubes (None if none was found) and the lower bound is the
+    optimum if the search completed, else lower_bound.
+    """
+    deadline = time.perf_counter() + max(0.0, time_limit_s)
+    capacity = stock_length_mm + kerf_mm
+    sizes = sorted((p + kerf_mm for p in pieces), reverse=True)
+    n = len(sizes)
+    rest = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        rest[i] = rest[i + 1] + sizes[i]
+
+    residual: List[int] = []   # free capacity per open tube
+    assign = [0] * n
+    best_count = upper_bound
+    best_assign: Optional[List[int]] = None
+    nodes = 0
+
+    def dfs(i: int) -> None:
+        nonlocal best_count, best_assign, nodes
+        if i == n:
+            best_count, best_assign = len(residual), assign[:]
+            if best_count <= lower_bound:
+                raise _SearchStopped
+            return
+        nodes += 1
+        if nodes & 1023 == 0 and time.perf_counter() > deadline:
+            raise _SearchStopped
+
+        size = sizes[i]
+        smallest = sizes[-1]
+        usable = sum(r for r in residual if r >= smallest)
+        if len(residual) + max(0, -(-(rest[i] - usable) // capacity)) >= best_count:
+            return
+
+        # A tube this piece fills exactly is always an optimal choice
+        for b, r in enumerate(residual):
+            if r == size:
+                residual[b] = 0
+                assign[i] = b
+                dfs(i + 1)
+                residual[b] = r
+                return
+
+        tried = set()
+        for b, r in enumerate(residual):
+            if r >= size and r not in tried:
+                tried.add(r)
+                residual[b] = r - size
+                assign[i] = b
+                dfs(i + 1)
+                residual[b] = r
+        if len(residual) + 1 < best_count:
+            residual.append(capacity - size)
+            assign[i] = len(residual) - 1
+            dfs(i + 1)
+            residual.pop()
+
+    completed = True
+    try:
+        dfs(0)
+    except _SearchStopped:
+        completed = best_count <= lower_bound
+    logger.debug(f"[Tubes] exact search nodes={nodes} completed={completed} best={best_count}")
+
+    proven = best_count if completed else lower_bound
+    if best_assign is None:
+        return None, proven
+    tubes: List[List[int]] = [[] for _ in range(best_count)]
+    for size, b in zip(sizes, best_assign):
+        tubes[b].append(size - kerf_mm)
+    return tubes, proven
+
+
+def _demand_lower_bound(demand: List[Tuple[int, int]], stock_length_mm: int, kerf_mm: int) -> int:
+    """_tube_lower_bound for (width_mm, qty) demand, without expanding it."""
+    if not demand:
+        return 0
+    capacity = stock_length_mm + kerf_mm
+    total = sum((w + kerf_mm) * q for w, q in demand)
+    big = sum(q for w, q in demand if 2 * (w + kerf_mm) > capacity)
+    return max(-(-total // capacity), big)
+
+
+def _price_pattern(
+    values: List[float],
+    sizes: List[int],
+    limits: List[int],
+    capacity: int,
+    min_value: float = 0.0,
+) -> Tuple[float, List[int]]:
+    """
+    Most valuable single-tube pattern (bounded knapsack, depth-first branch-and-bound).
+
+    Widths are tried in order of value per mm, most copies first, and a branch is
+    cut when its value plus the fractional (LP) fill of the remaining capacity
+    with the remaining widths cannot beat the best pattern found. Only patterns
+    worth more than min_value are searched for; if there is none, the result is
+    (min_value, no copies).
+    Returns (value, copies per width).
+    """
+    order = sorted(
+        (i for i in range(len(sizes)) if values[i] > 1e-12 and limits[i] > 0),
+        key=lambda i: -values[i] / sizes[i],
+    )
+    best_value = min_value
+    best = [0] * len(sizes)
+    copies = [0] * len(sizes)
+
+    def fractional_fill(k: int, room: int) -> float:
+        bound = 0.0
+        for i in order[k:]:
+            take = min(limits[i] * sizes[i], room)
+            bound += take * values[i] / sizes[i]
+            room -= take
+            if room <= 0:
+                break
+        return bound
+
+    def dfs(k: int, room: int, value: float) -> None:
+        nonlocal best_value, best
+        if value > best_value + 1e-12:
+            best_value, best = value, copies[:]
+        if k == len(order) or room < min_size:
+            return
+        i = order[k]
+        for c in range(min(limits[i], room // sizes[i]), -1, -1):
+            # Fewer copies of the best-ratio width never raise the bound, so stop here
+            child_room, child_value = room - c * sizes[i], value + c * values[i]
+            if child_value + fractional_fill(k + 1, child_room) <= best_value + 1e-12:
+                break
+            copies[i] = c
+            dfs(k + 1, child_room, child_value)
+        copies[i] = 0
+
+    if not order:
+        return best_value, best
+    min_size = min(sizes[i] for i in order)
+    dfs(0, capacity, 0.0)
+    return best_value, best
+
+
+def _fractional_value(values: List[float], sizes: List[int], limits: List[int], capacity: int) -> float:
+    """Upper bound on _price_pattern for this capacity (LP fill by value per mm)."""
+    bound = 0.0
+    for i in sorted(range(len(sizes)), key=lambda i: -values[i] / sizes[i]):
+        if values[i] <= 1e-12 or capacity <= 0:
+            break
+        take = min(limits[i] * sizes[i], capacity)
+        bound += take * values[i] / sizes[i]
+        capacity -= take
+    return bound
+
+
+def _column_generation(
+    demand: List[Tuple[int, int]],
+    stocks: List[Tuple[int, float]],
+    kerf_mm: int,
+    max_iterations: int = 500,
+) -> Tuple[List[List[int]], List[int], List[float], float]:
+    """
+    Column generation on demand counts (Gilmore-Gomory), over one or more stock lengths.
+
+    The master LP (min cost, patterns x counts = demand) starts from the cheapest
+    single-width pattern per width and is solved by revised simplex with an
+    explicit basis inverse. Each round prices a new pattern per stock length with
+    _price_pattern against the duals and enters the one with the best value per
+    unit cost; lengths whose fractional bound cannot beat the best pattern so far
+    are not priced. Iteration stops once the Farley bound shows the LP cannot
+    drop by another whole (cheapest) tube.
+
+    Args:
+        demand: [(width_mm, qty), ...] sorted longest first; every width fits a stock
+        stocks: [(stock_length_mm, cost), ...]
+
+    Returns:
+        (basis columns as copies per width, stock index per column, LP counts,
+        lower bound on the total cost)
+    """
+    m = len(demand)
+    sizes = [w + kerf_mm for w, _ in demand]
+    capacities = [length + kerf_mm for length, _ in stocks]
+    costs = [cost for _, cost in stocks]
+    limits = [
+        [min(q, capacity // size) for (_, q), size in zip(demand, sizes)]
+        for capacity in capacities
+    ]
+    min_cost = min(costs)
+
+    # Initial basis: homogeneous patterns, so B is diagonal
+    basis = [[0] * m for _ in range(m)]
+    owner = [0] * m
+    binv = [[0.0] * m for _ in range(m)]
+    x = [0.0] * m
+    for i in range(m):
+        s = min((s for s in range(len(stocks)) if limits[s][i]), key=lambda s: costs[s] / limits[s][i])
+        basis[i][i] = limits[s][i]
+        owner[i] = s
+        binv[i][i] = 1.0 / limits[s][i]
+        x[i] = demand[i][1] / limits[s][i]
+
+    lp_bound = 0.0
+    for _ in range(max_iterations):
+        duals = [sum(costs[owner[r]] * binv[r][i] for r in range(m)) for i in range(m)]
+        ratio, entering, column = 0.0, -1, []
+        bounds = [_fractional_value(duals, sizes, limits[s], capacities[s]) / costs[s] for s in range(len(stocks))]
+        for s in sorted(range(len(stocks)), key=lambda s: -bounds[s]):
+            if bounds[s] <= ratio + 1e-12:
+                break
+            # The best pattern so far (scaled to this length's cost) prunes the search
+            value, copies = _price_pattern(duals, sizes, limits[s], capacities[s], ratio * costs[s])
+            if any(copies) and value / costs[s] > ratio + 1e-12:
+                ratio, entering, column = value / costs[s], s, copies
+        # Farley bound: no pattern is worth more than `ratio` times its cost, so the
+        # LP optimum is at least z / ratio. Stop once it cannot save a whole tube.
+        z = sum(costs[owner[r]] * x[r] for r in range(m))
+        lp_bound = max(lp_bound, z / max(ratio, 1.0))
+        if ratio <= 1.0 + 1e-9 or z - z / ratio < min_cost:
+            break
+        u = [sum(binv[r][i] * column[i] for i in range(m) if column[i]) for r in range(m)]
+        leave, theta = -1, float("inf")
+        for r in range(m):
+            if u[r] > 1e-12 and x[r] / u[r] < theta - 1e-12:
+                leave, theta = r, x[r] / u[r]
+        if leave < 0:
+            break
+        pivot = u[leave]
+        binv[leave] = [v / pivot for v in binv[leave]]
+        for r in range(m):
+            if r != leave and u[r]:
+                factor = u[r]
+                row = binv[leave]
+                binv[r] = [v - factor * pv for v, pv in zip(binv[r], row)]
+                x[r] -= theta * u[r]
+        x[leave] = theta
+        basis[leave] = column
+        owner[leave] = entering
+
+    return basis, owner, x, lp_bound
+
+
+def _round_patterns(
+    demand: List[Tuple[int, int]],
+    columns: List[List[int]],
+    owner: List[int],
+    x: List[float],
+    available: Optional[List[Optional[int]]] = None,
+) -> Tuple[List[Tuple[int, List[int], int]], List[int]]:
+    """
+    Round an LP solution down, never cutting more than the demand.
+
+    available (tubes left per stock index, None = unlimited) caps the counts
+    and is decremented in place.
+
+    Returns ([(stock index, pieces in cut order, tube count), ...], remaining qty per width).
+    """
+    remaining = [q for _, q in demand]
+    result: List[Tuple[int, List[int], int]] = []
+    for column, s, xr in sorted(zip(columns, owner, x), key=lambda t: -t[2]):
+        count = int(xr + 1e-9)
+        for i, c in enumerate(column):
+            if c:
+                count = min(count, remaining[i] // c)
+        if available is not None and available[s] is not None:
+            count = min(count, available[s])
+        if count <= 0:
+            continue
+        for i, c in enumerate(column):
+            remaining[i] -= c * count
+        if available is not None and available[s] is not None:
+            available[s] -= count
+        result.append((s, [w for (w, _), c in zip(demand, column) for _ in range(c)], count))
+    return result, remaining
+
+
+def _solve_patterns(
+    demand: List[Tuple[int, int]],
+    stock_length_mm: int,
+    kerf_mm: int,
+    max_iterations: int = 500,
+) -> Tuple[List[Tuple[List[int], int]], int]:
+    """
+    Cut demand counts from one stock length by column generation.
+
+    The LP solution of _column_generation is rounded down and the few leftover
+    pieces are packed with BFD and pair swaps. Cost follows the number of
+    distinct widths, not the piece count.
+
+    Returns ([(pieces in cut order, tube count), ...], lower bound on tubes).
+    """
+    demand = sorted(((w, q) for w, q in demand if q > 0), reverse=True)
+    if not demand:
+        return [], 0
+    columns, owner, x, lp_bound = _column_generation(demand, [(stock_length_mm, 1.0)], kerf_mm, max_iterations)
+    rounded, remaining = _round_patterns(demand, columns, owner, x)
+    result = [(pieces, count) for _, pieces, count in rounded]
+
+    # Leftover pieces (bounded by the basis size, not the order size)
+    leftover = [w for (w, _), q in zip(demand, remaining) for _ in range(q)]
+    if leftover:
+        tubes = pack_bfd(leftover, stock_length_mm, kerf_mm)
+        tubes = improve_pair_swaps(tubes, stock_length_mm, kerf_mm)
+        result.extend((list(t.pieces_mm), 1) for t in tubes)
+
+    return result, math.ceil(lp_bound - 1e-6)
+
+
+def _pack_leftovers_multi(
+    pieces: List[int],
+    stocks: List[Tuple[int, float]],
+    available: List[Optional[int]],
+    kerf_mm: int,
+) -> Tuple[List[Tuple[int, List[int]]], List[int]]:
+    """
+    Best-fit the few pieces left after rounding onto mixed stock lengths.
+
+    New tubes use the length with the lowest cost per mm that still has stock;
+    afterwards each tube (fullest first) moves to the cheapest length that holds
+    it. available is decremented in place.
+
+    Returns ([(stock index, pieces in cut order), ...], pieces with no stock left).
+    """
+    tubes: List[List[Any]] = []  # [stock index, pieces, used]
+    unplaced: List[int] = []
+    for piece in sorted(pieces, reverse=True):
+        best = None
+        for tube in tubes:
+            room = stocks[tube[0]][0] - tube[2] - kerf_mm
+            if room >= piece and (best is None or room < stocks[best[0]][0] - best[2] - kerf_mm):
+                best = tube
+        if best is not None:
+            best[1].append(piece)
+            best[2] += kerf_mm + piece
+            continue
+        open_ = [
+            s for s, (length, _) in enumerate(stocks)
+            if length >= piece and (available[s] is None or available[s] > 0)
+        ]
+        if not open_:
+            unplaced.append(piece)
+            continue
+        s = min(open_, key=lambda s: stocks[s][1] / (stocks[s][0] + kerf_mm))
+        if available[s] is not None:
+            available[s] -= 1
+        tubes.append([s, [piece], piece])
+
+    # Move each tube to the cheapest length that holds it (fullest first keeps this feasible)
+    for tube in tubes:
+        if available[tube[0]] is not None:
+            available[tube[0]] += 1
+    for tube in sorted(tubes, key=lambda t: -t[2]):
+        tube[0] = min(
+            (s for s, (length, _) in enumerate(stocks)
+             if length >= tube[2] and (available[s] is None or available[s] > 0)),
+            key=lambda s: (stocks[s][1], stocks[s][0]),
+        )
+        if available[tube[0]] is not None:
+            available[tube[0]] -= 1
+    return [(s, pieces) for s, pieces, _ in tubes], unplaced
+
+
+def _solve_patterns_multi(
+    demand: List[Tuple[int, int]],
+    stocks: List[Tuple[int, float, Optional[int]]],
+    kerf_mm: int,
+    max_rounds: int = 4,
+) -> Tuple[List[Tuple[int, List[int], int]], List[int], float]:
+    """
+    Cut demand counts from several stock lengths in one column-generation solve.
+
+    All lengths share one master LP, so per-length patterns compete on cost.
+    Inventory is applied when rounding; if a length runs out, the rest of the
+    demand is solved again over the lengths still in stock (at most max_rounds
+    times) before leftovers are best-fitted.
+
+    Args:
+        stocks: [(stock_length_mm, cost, available or None), ...]
+
+    Returns:
+        ([(stock index, pieces in cut order, tube count), ...], pieces with no
+        stock left, lower bound on the total cost)
+    """
+    available = [avail for _, _, avail in stocks]
+    remaining = {w: q for w, q in demand if q > 0}
+    result: List[Tuple[int, List[int], int]] = []
+    lower_bound = 0.0
+    for round_ in range(max_rounds):
+        active = [s for s in range(len(stocks)) if available[s] is None or available[s] > 0]
+        longest = max((stocks[s][0] for s in active), default=0)
+        round_demand = sorted(((w, q) for w, q in remaining.items() if q > 0 and w <= longest), reverse=True)
+        if not round_demand:
+            break
+        columns, owner, x, lp_bound = _column_generation(
+            round_demand, [(stocks[s][0], stocks[s][1]) for s in active], kerf_mm
+        )
+        if round_ == 0:
+            # Inventory is not in the LP, so its bound holds for the constrained problem too
+            lower_bound = lp_bound
+        round_available = [available[s] for s in active]
+        rounded, left = _round_patterns(round_demand, columns, owner, x, round_available)
+        for k, s in enumerate(active):
+            available[s] = round_available[k]
+        for (w, _), q in zip(round_demand, left):
+            remaining[w] = q
+        result.extend((active[s], pieces, count) for s, pieces, count in rounded)
+        exhausted = any(available[s] == 0 for s in active)
+        if not rounded or not exhausted:
+            break
+
+    leftover = [w for w, q in remaining.items() for _ in range(q)]
+    tubes, unplaced = _pack_leftovers_multi(
+        leftover, [(length, cost) for length, cost, _ in stocks], available, kerf_mm
+    )
+    result.extend((s, pieces, 1) for s, pieces in tubes)
+    return result, unplaced, lower_bound
+
+
+def dedupe_patterns(
+    tubes: Iterable[TubeCut],
+    counts: Optional[Iterable[int]] = None,
+) -> List[TubePattern]:
     """
     Deduplicate tube patterns for UI display.
     
-    Pattern key is the sorted list of piece lengths.
+    Pattern key is the sorted list of piece lengths (TubeCut.key).
     
     Args:
-        tubes: List of all tube cuts
+        tubes: Tube cuts (one per physical tube, or one per pattern with counts)
+        counts: Optional number of tubes for each entry of tubes (default 1 each)
         
     Returns:
         List of unique patterns with counts
     """
-    pattern_map: Dict[Tuple[int, ...], Tuple[TubeCut, int]] = {}
+    pattern_map: Dict[Tuple[int, ...], List[Any]] = {}
     
-    for tube in tubes:
-        # Create pattern key (sorted pieces)
-        key = tuple(sorted(tube.pieces_mm))
-        
-        if key in pattern_map:
-            sample, count = pattern_map[key]
-            pattern_map[key] = (sample, count + 1)
+    for tube, count in zip(tubes, counts if counts is not None else repeat(1)):
+        entry = pattern_map.get(tube.key)
+        if entry is None:
+            pattern_map[tube.key] = [tube, count]
         else:
-            pattern_map[key] = (tube, 1)
+            entry[1] += count
     
     # Convert to TubePattern objects, sorted by count (most common first)
     patterns = [
@@ -992,13 +2438,289 @@ def dedupe_patterns(tubes: List[TubeCut]) -> List[TubePattern]:
     return patterns
 
 
+def _tube_plan(
+    total_pieces: int,
+    patterns: List[TubePattern],
+    stock_length_mm: int,
+    kerf_mm: int,
+    infeasible: List[Tuple[int, str]],
+    algo: str,
+    lower_bound_tubes: int,
+    strategy: str = "",
+    solve_ms: int = 0,
+) -> TubePlan:
+    """Assemble a TubePlan (metrics) from deduplicated patterns."""
+    logger.debug(f"Unique patterns: {len(patterns)}")
+    num_tubes = sum(pat.count for pat in patterns)
+    total_used = sum(pat.sample.used_mm * pat.count for pat in patterns)
+    total_waste = sum(pat.sample.waste_mm * pat.count for pat in patterns)
+    efficiency = total_used / (num_tubes * stock_length_mm) if num_tubes else 0.0
+    
+    return TubePlan(
+        total_pieces=total_pieces,
+        num_tubes=num_tubes,
+        stock_length_mm=stock_length_mm,
+        kerf_mm=kerf_mm,
+        efficiency=efficiency,
+        total_used_mm=total_used,
+        total_waste_mm=total_waste,
+        patterns=patterns,
+        infeasible_pieces=infeasible,
+        algo=algo,
+        lower_bound_tubes=lower_bound_tubes,
+        strategy=strategy or algo,
+        solve_ms=solve_ms,
+    )
+
+
+def _pattern_tube_plan(
+    demand: List[Tuple[int, int]],
+    total_pieces: int,
+    stock_length_mm: int,
+    kerf_mm: int,
+    infeasible: List[Tuple[int, str]],
+) -> TubePlan:
+    """TubePlan from _solve_patterns (one sample cut per pattern, never per tube)."""
+    t0 = time.perf_counter()
+    solved, lp_bound = _solve_patterns(demand, stock_length_mm, kerf_mm)
+    patterns = dedupe_patterns(
+        (_tube_cut(pieces, stock_length_mm, kerf_mm) for pieces, _ in solved),
+        [count for _, count in solved],
+    )
+    num_tubes = sum(pat.count for pat in patterns)
+    
+    lower_bound = max(lp_bound, _demand_lower_bound(demand, stock_length_mm, kerf_mm))
+    logger.info(f"Pattern result: {num_tubes} tubes, {len(patterns)} patterns (lower bound {lower_bound})")
+    solve_ms = int(round((time.perf_counter() - t0) * 1000))
+    return _tube_plan(
+        total_pieces, patterns, stock_length_mm, kerf_mm, infeasible, "Pattern", lower_bound,
+        solve_ms=solve_ms,
+    )
+
+
+_TUBE_PACKERS: Dict[str, Callable[[List[int], int, int], List[TubeCut]]] = {
+    "BFD": pack_bfd,
+    "FFD": pack_ffd,
+    "WFD": pack_wfd,
+}
+
+
+def _strategy_tubes(
+    strategy: str,
+    pieces: List[int],
+    stock_length_mm: int,
+    kerf_mm: int,
+    time_limit_s: Optional[float],
+) -> Tuple[List[TubeCut], int]:
+    """
+    Tubes and a proven lower bound from one tube strategy (pieces sorted descending).
+
+    "BFD", "FFD", "WFD": packer + local search. "Exact": BFD + local search as the
+    incumbent for _solve_exact. "Random:<seed>": BFD + local search over randomly
+    perturbed orders, restarted until the lower bound or the time limit.
+
+    time_limit_s bounds the whole strategy, local search included. None (packers
+    only) leaves the local search to its move budget, so the plan is
+    deterministic.
+    """
+    deadline = time.perf_counter() + max(0.0, time_limit_s) if time_limit_s is not None else None
+    lower_bound = _tube_lower_bound(pieces, stock_length_mm, kerf_mm)
+    name, _, seed = strategy.partition(":")
+    
+    def search_budget() -> float:
+        if deadline is None:
+            return TUBE_LOCAL_SEARCH_TIME_S
+        return max(0.0, min(TUBE_LOCAL_SEARCH_TIME_S, deadline - time.perf_counter()))
+    
+    if name == "Random":
+        rng = random.Random(int(seed or 0))
+        best: Optional[List[TubeCut]] = None
+        while best is None or (len(best) > lower_bound and time.perf_counter() < deadline):
+            order = sorted(pieces, key=lambda p: -p * rng.uniform(0.85, 1.15))
+            tubes = improve_pair_swaps(
+                pack_bfd(order, stock_length_mm, kerf_mm), stock_length_mm, kerf_mm,
+                time_limit_s=search_budget(),
+            )
+            if best is None or len(tubes) < len(best):
+                best = tubes
+        return best, lower_bound
+    
+    packer = _TUBE_PACKERS["BFD" if name == "Exact" else name]
+    tubes = packer(pieces, stock_length_mm, kerf_mm)
+    logger.debug(f"{name} result: {len(tubes)} tubes")
+    tubes = improve_pair_swaps(tubes, stock_length_mm, kerf_mm, time_limit_s=search_budget())
+    logger.debug(f"After local search: {len(tubes)} tubes")
+    
+    if name == "Exact" and len(tubes) > lower_bound:
+        # The heuristic plan is the incumbent; only a plan with fewer tubes replaces it
+        exact, lower_bound = _solve_exact(
+            pieces, stock_length_mm, kerf_mm, len(tubes), lower_bound,
+            max(0.0, deadline - time.perf_counter()),
+        )
+        if exact is not None:
+            tubes = [_tube_cut(cut, stock_length_mm, kerf_mm) for cut in exact]
+        logger.debug(f"Exact result: {len(tubes)} tubes (lower bound {lower_bound})")
+    
+    return tubes, lower_bound
+
+
+def _run_tube_strategy(
+    strategy: str,
+    pieces: List[int],
+    stock_length_mm: int,
+    kerf_mm: int,
+    time_limit_s: Optional[float],
+) -> Tuple[str, List[TubePattern], int, int]:
+    """
+    (strategy, patterns, lower bound, ms) for one strategy (process-pool entry point).
+
+    Tubes are deduplicated before they are returned, so pool workers send back
+    one cut per pattern rather than one per tube.
+    """
+    t0 = time.perf_counter()
+    tubes, lower_bound = _strategy_tubes(strategy, pieces, stock_length_mm, kerf_mm, time_limit_s)
+    patterns = dedupe_patterns(tubes)
+    return strategy, patterns, lower_bound, int(round((time.perf_counter() - t0) * 1000))
+
+
+def _portfolio_tube_plan(
+    pieces: List[int],
+    total_pieces: int,
+    stock_length_mm: int,
+    kerf_mm: int,
+    infeasible: List[Tuple[int, str]],
+    time_limit_s: float,
+    max_workers: Optional[int],
+) -> TubePlan:
+    """
+    Race tube strategies and keep the plan with the fewest tubes.
+
+    BFD, FFD, WFD, the exact solver (up to TUBE_EXACT_MAX_PIECES pieces) and
+    randomised restarts (one per spare worker) run on the engine process pool;
+    whatever has finished at time_limit_s competes, and strategies still running
+    stop at their own time limit. With max_workers=1 they run in-process one after
+    another, sharing the budget. Ties go to the earlier strategy in that list.
+    """
+    strategies = ["BFD", "FFD", "WFD"]
+    if len(pieces) <= TUBE_EXACT_MAX_PIECES:
+        strategies.append("Exact")
+    parallel = max_workers is None or max_workers > 1
+    n_random = max(1, (max_workers or len(strategies) + 1) - len(strategies)) if parallel else 1
+    strategies.extend(f"Random:{seed}" for seed in range(1, n_random + 1))
+    
+    deadline = time.perf_counter() + max(0.0, time_limit_s)
+    results: List[Tuple[str, List[TubePattern], int, int]] = []
+    if parallel:
+        pool = _get_process_pool(max_workers)
+        # Leave room for hand-off so strategies that use their whole budget still count
+        budget = time_limit_s * 0.8
+        futures = [
+            pool.submit(_run_tube_strategy, strategy, pieces, stock_length_mm, kerf_mm, budget)
+            for strategy in strategies
+        ]
+        done, not_done = wait(futures, timeout=time_limit_s)
+        for future in not_done:
+            future.cancel()
+        results = [future.result() for future in futures if future in done]
+    else:
+        for k, strategy in enumerate(strategies):
+            share = (deadline - time.perf_counter()) / (len(strategies) - k)
+            if share <= 0 and results:
+                break
+            results.append(_run_tube_strategy(strategy, pieces, stock_length_mm, kerf_mm, max(0.0, share)))
+    
+    if not results:
+        # Nothing finished in time (e.g. worker start-up): plain BFD in-process
+        results.append(_run_tube_strategy("BFD", pieces, stock_length_mm, kerf_mm, 0.0))
+    
+    winner, patterns, _, solve_ms = min(
+        results,
+        key=lambda r: (sum(pat.count for pat in r[1]), strategies.index(r[0]) if r[0] in strategies else len(strategies)),
+    )
+    lower_bound = max(r[2] for r in results)
+    logger.info(
+        f"Portfolio result: {sum(pat.count for pat in patterns)} tubes by {winner} in {solve_ms}ms "
+        f"({len(results)}/{len(strategies)} strategies finished, lower bound {lower_bound})"
+    )
+    return _tube_plan(
+        total_pieces, patterns, stock_length_mm, kerf_mm, infeasible, "Portfolio", lower_bound,
+        strategy=winner, solve_ms=solve_ms,
+    )
+
+
+def _tube_plan_nbytes(plan: TubePlan) -> int:
+    """Approximate memory held by a memoised tube plan."""
+    return 800 + sum(300 + 16 * len(pat.key) for pat in plan.patterns) + 100 * len(plan.infeasible_pieces)
+
+
+# Memo of tube plans, keyed on the canonical order (see _tube_plan_key)
+_tube_plan_memo = LRUCache(
+    max_entries=TUBE_PLAN_MEMO_MAX_ENTRIES,
+    max_bytes=TUBE_PLAN_MEMO_MAX_BYTES,
+    sizeof=_tube_plan_nbytes,
+)
+
+
+def _tube_plan_key(
+    items: List[Tuple[int, int]],
+    stock_length_mm: int = 6000,
+    kerf_mm: int = 0,
+    algo: str = "BFD",
+    exact_threshold: int = 22,
+    time_limit_s: float = 2.0,
+    max_workers: Optional[int] = None,
+) -> Tuple[Any, ...]:
+    """
+    Canonical key of a tube order: its length/quantity multiset, stock, kerf,
+    solver settings and the engine version. max_workers is part of the key for
+    the portfolio, whose strategy mix and parallel race depend on it; the other
+    solvers run in-process and ignore it.
+    """
+    multiset: Dict[int, int] = {}
+    for width_mm, qty in items:
+        multiset[int(width_mm)] = multiset.get(int(width_mm), 0) + int(qty)
+    return (
+        tuple(sorted(multiset.items())),
+        int(stock_length_mm),
+        int(kerf_mm),
+        algo.upper(),
+        int(exact_threshold),
+        float(time_limit_s),
+        max_workers if algo.upper() == "PORTFOLIO" else None,
+        ENGINE_VERSION,
+    )
+
+
+def _copy_tube_plan(plan: TubePlan) -> TubePlan:
+    """Copy of a tube plan that shares no mutable lists or cuts with the original."""
+    return replace(
+        plan,
+        patterns=[
+            replace(pat, sample=TubeCut(list(pat.sample.pieces_mm), pat.sample.used_mm, pat.sample.waste_mm, pat.key))
+            for pat in plan.patterns
+        ],
+        infeasible_pieces=list(plan.infeasible_pieces),
+    )
+
+
+def clear_tube_plan_memo() -> None:
+    """Clear the tube plan memo used by compute_tube_plan."""
+    _tube_plan_memo.clear()
+
+
+def tube_plan_memo_stats() -> Dict[str, int]:
+    """Entries, approximate bytes and hit/miss/eviction counters of the tube plan memo."""
+    return _tube_plan_memo.stats()
+
+
 def compute_tube_plan(
     items: List[Tuple[int, int]],
     stock_length_mm: int = 6000,
     kerf_mm: int = 0,
     algo: str = "BFD",
     exact_threshold: int = 22,
-    time_limit_s: float = 2.0
+    time_limit_s: float = 2.0,
+    max_workers: Optional[int] = None,
 ) -> TubePlan:
     """
     Compute optimal tube cutting plan.
@@ -1007,80 +2729,585 @@ def compute_tube_plan(
         items: [(width_mm, qty), ...] from order table
         stock_length_mm: Stock tube length (default 6000mm)
         kerf_mm: Saw blade kerf (default 0mm)
-        algo: Algorithm - "BFD", "FFD", or "Exact" (only BFD implemented)
-        exact_threshold: Use exact solver if pieces <= this (not implemented)
-        time_limit_s: Time limit for exact solver (not implemented)
+        algo: Algorithm - "BFD", "FFD", "WFD", "Exact", "Pattern" or "Portfolio"
+              (race several strategies and keep the best plan)
+        exact_threshold: Use the exact solver when pieces <= this, whatever algo says
+                         (orders above TUBE_PATTERN_MIN_PIECES use "Pattern")
+        time_limit_s: Time limit for the exact solver and the portfolio (including
+                      their local search); the best plan found so far is returned
+                      when it runs out. BFD/FFD/WFD plans don't use it: their
+                      local search is bounded by TUBE_LOCAL_SEARCH_MAX_MOVES.
+        max_workers: Portfolio workers on the engine process pool (None = pool
+                     default, 1 = run strategies in-process)
         
     Returns:
-        TubePlan with complete cutting solution
+        TubePlan with complete cutting solution. lower_bound_tubes is a proven
+        minimum tube count, so gap_tubes == 0 means the plan is optimal.
+        Plans are memoised on the canonical order (same lengths and quantities in
+        any order, stock, kerf and solver settings), so repeated orders return a
+        copy of the stored plan.
     """
+    key = _tube_plan_key(items, stock_length_mm, kerf_mm, algo, exact_threshold, time_limit_s, max_workers)
+    plan = _tube_plan_memo.get(key)
+    if plan is not None:
+        logger.info(f"Tube plan memo hit: {plan.num_tubes} tubes, algo={algo}")
+        return _copy_tube_plan(plan)
+    plan = _solve_tube_plan(items, stock_length_mm, kerf_mm, algo, exact_threshold, time_limit_s, max_workers)
+    _tube_plan_memo.put(key, _copy_tube_plan(plan))
+    return plan
+
+
+def _solve_tube_plan(
+    items: List[Tuple[int, int]],
+    stock_length_mm: int = 6000,
+    kerf_mm: int = 0,
+    algo: str = "BFD",
+    exact_threshold: int = 22,
+    time_limit_s: float = 2.0,
+    max_workers: Optional[int] = None,
+) -> TubePlan:
+    """compute_tube_plan without the memo."""
     logger.info(f"Computing tube plan: {len(items)} items, stock={stock_length_mm}mm, kerf={kerf_mm}mm, algo={algo}")
     
-    # Validate and expand pieces
-    pieces, infeasible = validate_pieces(items, stock_length_mm, kerf_mm)
+    # Validate pieces as demand counts
+    demand, infeasible = validate_demand(items, stock_length_mm, kerf_mm)
+    total_pieces = sum(q for _, q in demand)
     
-    if not pieces:
+    if not total_pieces:
         logger.warning("No valid pieces to cut")
-        return TubePlan(
-            total_pieces=0,
-            num_tubes=0,
-            stock_length_mm=stock_length_mm,
-            kerf_mm=kerf_mm,
-            efficiency=0.0,
-            total_used_mm=0,
-            total_waste_mm=0,
-            tubes=[],
-            patterns=[],
-            infeasible_pieces=infeasible
-        )
+        return _tube_plan(0, [], stock_length_mm, kerf_mm, infeasible, "BFD", 0)
+    
+    if algo.upper() == "PATTERN" or total_pieces > TUBE_PATTERN_MIN_PIECES:
+        return _pattern_tube_plan(demand, total_pieces, stock_length_mm, kerf_mm, infeasible)
+    
+    # Expand pieces
+    pieces = [w for w, q in demand for _ in range(q)]
     
     # Sort pieces descending for BFD
     pieces_sorted = sorted(pieces, reverse=True)
     
     logger.debug(f"Packing {len(pieces_sorted)} pieces (largest: {pieces_sorted[0]}mm, smallest: {pieces_sorted[-1]}mm)")
     
-    # Pack using BFD
-    tubes = pack_bfd(pieces_sorted, stock_length_mm, kerf_mm)
-    logger.info(f"BFD result: {len(tubes)} tubes")
-    
-    # Improve with pair swaps
-    tubes = improve_pair_swaps(tubes, stock_length_mm, kerf_mm, max_passes=2)
-    logger.info(f"After pair swaps: {len(tubes)} tubes")
+    if algo.upper() == "PORTFOLIO":
+        return _portfolio_tube_plan(
+            pieces_sorted, total_pieces, stock_length_mm, kerf_mm, infeasible, time_limit_s, max_workers
+        )
     
-    # Deduplicate patterns
-    patterns = dedupe_patterns(tubes)
-    logger.debug(f"Unique patterns: {len(patterns)}")
+    strategy = algo.upper() if algo.upper() in _TUBE_PACKERS else "BFD"
+    use_exact = algo.upper() == "EXACT" or len(pieces_sorted) <= exact_threshold
+    if use_exact and len(pieces_sorted) > TUBE_EXACT_MAX_PIECES:
+        logger.warning(f"Exact solver skipped: {len(pieces_sorted)} pieces > {TUBE_EXACT_MAX_PIECES}")
+    elif use_exact:
+        strategy = "Exact"
+    
+    # Only the exact solver runs against time_limit_s; the packers' local search
+    # is bounded by its move budget alone, so their plans don't depend on timing
+    _, patterns, lower_bound, solve_ms = _run_tube_strategy(
+        strategy, pieces_sorted, stock_length_mm, kerf_mm, time_limit_s if strategy == "Exact" else None
+    )
+    logger.info(f"{strategy} result: {sum(pat.count for pat in patterns)} tubes (lower bound {lower_bound})")
     
-    # Calculate metrics
-    total_used = sum(tube.used_mm for tube in tubes)
-    total_waste = sum(tube.waste_mm for tube in tubes)
-    efficiency = total_used / (len(tubes) * stock_length_mm) if tubes else 0.0
+    plan = _tube_plan(
+        total_pieces, patterns, stock_length_mm, kerf_mm, infeasible, strategy, lower_bound,
+        solve_ms=solve_ms,
+    )
     
-    plan = TubePlan(
-        total_pieces=len(pieces),
-        num_tubes=len(tubes),
-        stock_length_mm=stock_length_mm,
+    logger.info(f"Final plan: {plan.num_tubes} tubes, {plan.efficiency*100:.1f}% efficiency, {len(plan.patterns)} patterns")
+
+    return plan
+
+
+def compute_tube_plan_multi_stock(
+    items: List[Tuple[int, int]],
+    stock_lengths: List[Union[int, StockLength]],
+    kerf_mm: int = 0,
+) -> MultiStockTubePlan:
+    """
+    Compute a tube cutting plan over several stock lengths in one solve.
+
+    All lengths take part in a single pattern (column-generation) solve, so a
+    5m/6m/6.5m warehouse is planned together instead of once per length.
+
+    Args:
+        items: [(width_mm, qty), ...] from order table
+        stock_lengths: Stock lengths in mm, or StockLength entries with optional
+                       inventory (available) and cost per tube
+        kerf_mm: Saw blade kerf (default 0mm)
+
+    Returns:
+        MultiStockTubePlan with one TubePlan per stock length used. Pieces longer
+        than every length, or left over when inventory runs out, are reported in
+        infeasible_pieces.
+
+    Raises:
+        ValueError: if stock_lengths is empty, repeats a length, or has a
+                    non-positive length or cost, or negative inventory
+    """
+    stocks = [s if isinstance(s, StockLength) else StockLength(length_mm=int(s)) for s in stock_lengths]
+    if not stocks:
+        raise ValueError("At least one stock length is required")
+    lengths = [s.length_mm for s in stocks]
+    if len(set(lengths)) != len(lengths):
+        raise ValueError(f"Duplicate stock lengths: {sorted(lengths)}")
+    for stock in stocks:
+        if stock.length_mm <= 0:
+            raise ValueError(f"Stock length must be positive, got {stock.length_mm}mm")
+        if stock.cost is not None and stock.cost <= 0:
+            raise ValueError(f"Stock cost must be positive, got {stock.cost} for {stock.length_mm}mm")
+        if stock.available is not None and stock.available < 0:
+            raise ValueError(f"Stock inventory must not be negative, got {stock.available} for {stock.length_mm}mm")
+    stocks.sort(key=lambda s: -s.length_mm)
+    costs = [float(s.length_mm) if s.cost is None else float(s.cost) for s in stocks]
+
+    logger.info(
+        f"Computing multi-stock tube plan: {len(items)} items, stocks={lengths}mm, kerf={kerf_mm}mm"
+    )
+    t0 = time.perf_counter()
+    demand, infeasible = validate_demand(items, stocks[0].length_mm, kerf_mm)
+    solved, unplaced, lower_bound = _solve_patterns_multi(
+        demand, [(s.length_mm, cost, s.available) for s, cost in zip(stocks, costs)], kerf_mm
+    )
+    for width_mm in sorted(set(unplaced), reverse=True):
+        reason = f"{width_mm}mm x {unplaced.count(width_mm)}: no stock length left in inventory"
+        infeasible.append((width_mm, reason))
+        logger.warning(f"Infeasible piece: {reason}")
+    solve_ms = int(round((time.perf_counter() - t0) * 1000))
+
+    by_stock: Dict[int, Tuple[List[TubeCut], List[int]]] = {}
+    for s, pieces, count in solved:
+        cuts, counts = by_stock.setdefault(s, ([], []))
+        cuts.append(_tube_cut(pieces, stocks[s].length_mm, kerf_mm))
+        counts.append(count)
+    plans = []
+    for s in sorted(by_stock):
+        cuts, counts = by_stock[s]
+        patterns = dedupe_patterns(cuts, counts)
+        demand_s: Dict[int, int] = {}
+        for pat in patterns:
+            for w in pat.key:
+                demand_s[w] = demand_s.get(w, 0) + pat.count
+        plans.append(_tube_plan(
+            sum(demand_s.values()), patterns, stocks[s].length_mm, kerf_mm, [], "MultiStock",
+            _demand_lower_bound(list(demand_s.items()), stocks[s].length_mm, kerf_mm), solve_ms=solve_ms,
+        ))
+
+    num_tubes = sum(plan.num_tubes for plan in plans)
+    total_stock = sum(plan.num_tubes * plan.stock_length_mm for plan in plans)
+    total_used = sum(plan.total_used_mm for plan in plans)
+    total_cost = sum(sum(counts) * costs[s] for s, (_, counts) in by_stock.items())
+    logger.info(
+        f"Multi-stock result: {num_tubes} tubes over {len(plans)} lengths, cost {total_cost:g} "
+        f"(lower bound {lower_bound:g}) in {solve_ms}ms"
+    )
+    return MultiStockTubePlan(
+        plans=plans,
+        total_pieces=sum(plan.total_pieces for plan in plans),
+        num_tubes=num_tubes,
         kerf_mm=kerf_mm,
-        efficiency=efficiency,
+        efficiency=total_used / total_stock if total_stock else 0.0,
+        total_stock_mm=total_stock,
         total_used_mm=total_used,
-        total_waste_mm=total_waste,
-        tubes=tubes,
-        patterns=patterns,
-        infeasible_pieces=infeasible
+        total_waste_mm=total_stock - total_used,
+        total_cost=total_cost,
+        lower_bound_cost=lower_bound,
+        infeasible_pieces=infeasible,
+        solve_ms=solve_ms,
+    )
+
+
+def _tube_plan_job(job: Dict[str, Any]) -> TubePlan:
+    """Unmemoised compute_tube_plan for one batch job (process-pool entry point, runs in-process)."""
+    return _solve_tube_plan(**dict(job, max_workers=1))
+
+
+def compute_tube_plans(
+    jobs: List[Dict[str, Any]],
+    max_workers: Optional[int] = None,
+) -> List[TubePlan]:
+    """
+    Compute independent tube plans, one per job, in parallel.
+
+    Args:
+        jobs: compute_tube_plan keyword arguments per job (items, stock_length_mm,
+              kerf_mm, algo, ...); max_workers is ignored, each job runs in one worker
+        max_workers: Workers on the engine process pool (None = pool default,
+                     1 = run jobs in-process one after another)
+
+    Returns:
+        TubePlans in job order (memoised like compute_tube_plan; no two share
+        mutable state)
+    """
+    keys = [_tube_plan_key(**dict(job, max_workers=1)) for job in jobs]
+    found: Dict[Tuple[Any, ...], TubePlan] = {}
+    misses: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for job, key in zip(jobs, keys):
+        if key in found or key in misses:
+            continue
+        plan = _tube_plan_memo.get(key)
+        if plan is None:
+            misses[key] = job
+        else:
+            found[key] = plan
+
+    # Each distinct missing order is solved once; the parent memoises the results
+    todo = list(misses.items())
+    if len(todo) > 1 and (max_workers is None or max_workers > 1):
+        # Biggest orders first, so a large job does not start last and set the wall time
+        todo.sort(key=lambda kv: -sum(q for _, q in kv[1]["items"]))
+        logger.info(f"Computing {len(todo)} tube plans on the process pool")
+        computed = list(_get_process_pool(max_workers).map(_tube_plan_job, [job for _, job in todo]))
+    else:
+        computed = [_tube_plan_job(job) for _, job in todo]
+    for (key, _), plan in zip(todo, computed):
+        _tube_plan_memo.put(key, _copy_tube_plan(plan))
+        found[key] = plan
+
+    # Jobs repeating an order get their own copy of its plan
+    seen: Set[Tuple[Any, ...]] = set()
+    plans = []
+    for key in keys:
+        plans.append(found[key] if key in misses and key not in seen else _copy_tube_plan(found[key]))
+        seen.add(key)
+    return plans
+
+
+def compute_tube_plans_by_profile(
+    items: List[Tuple[str, int, int]],
+    stock_length_mm: int = 6000,
+    kerf_mm: int = 0,
+    algo: str = "BFD",
+    stock_lengths_mm: Optional[Dict[str, int]] = None,
+    time_limit_s: float = 2.0,
+    max_workers: Optional[int] = None,
+) -> ProfileTubePlans:
+    """
+    Compute tube plans for an order with several profiles (or colours).
+
+    Items are grouped by profile and each group is planned independently with
+    compute_tube_plans, so the groups run in parallel on the engine process pool.
+
+    Args:
+        items: [(profile, width_mm, qty), ...]
+        stock_length_mm: Stock tube length for profiles not in stock_lengths_mm
+        kerf_mm: Saw blade kerf (default 0mm)
+        algo: compute_tube_plan algorithm for every profile
+        stock_lengths_mm: Optional stock length per profile
+        time_limit_s: compute_tube_plan time limit per profile
+        max_workers: Workers on the engine process pool (None = pool default,
+                     1 = plan profiles in-process one after another)
+
+    Returns:
+        ProfileTubePlans with one TubePlan per profile and combined totals
+    """
+    t0 = time.perf_counter()
+    groups: Dict[str, List[Tuple[int, int]]] = {}
+    for profile, width_mm, qty in items:
+        groups.setdefault(profile, []).append((width_mm, qty))
+    stock_lengths_mm = stock_lengths_mm or {}
+    logger.info(f"Computing tube plans for {len(groups)} profiles, {len(items)} items")
+
+    jobs = [
+        {
+            "items": group,
+            "stock_length_mm": stock_lengths_mm.get(profile, stock_length_mm),
+            "kerf_mm": kerf_mm,
+            "algo": algo,
+            "time_limit_s": time_limit_s,
+        }
+        for profile, group in groups.items()
+    ]
+    plans = dict(zip(groups, compute_tube_plans(jobs, max_workers=max_workers)))
+
+    total_stock = sum(plan.num_tubes * plan.stock_length_mm for plan in plans.values())
+    total_used = sum(plan.total_used_mm for plan in plans.values())
+    return ProfileTubePlans(
+        plans=plans,
+        total_pieces=sum(plan.total_pieces for plan in plans.values()),
+        num_tubes=sum(plan.num_tubes for plan in plans.values()),
+        total_stock_mm=total_stock,
+        total_used_mm=total_used,
+        total_waste_mm=sum(plan.total_waste_mm for plan in plans.values()),
+        efficiency=total_used / total_stock if total_stock else 0.0,
+        solve_ms=int(round((time.perf_counter() - t0) * 1000)),
     )
-    
-    logger.info(f"Final plan: {plan.num_tubes} tubes, {plan.efficiency*100:.1f}% efficiency, {len(patterns)} patterns")
-    
-    return plan
 
 
 # ============================================================================
 # API Efficiency Calculation - Wrapper for Waste API
 # ============================================================================
 
+def _line_jobs(lines: List[Line], roll_widths_mm: List[int]) -> List[Dict[str, Any]]:
+    """compute_layout_per_line input for lines (numeric line_id = position + 1) on given widths."""
+    return [
+        {
+            "line_id": idx + 1,  # Use numeric line_id for internal processing
+            # One run per line: all pieces of a line are the same size
+            "runs": [(line.width_mm, line.drop_mm, line.qty)],
+            "gap_mm": 0.0,  # Default gap, can be made configurable
+            "roll_width_mm": rw,
+        }
+        for idx, (line, rw) in enumerate(zip(lines, roll_widths_mm))
+    ]
+
+
+def _layout_jobs(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-line layout results for a batch of line jobs (process-pool entry point)."""
+    return compute_layout_per_line(jobs)["lines"]
+
+
+def _line_result_nbytes(line_result: Dict[str, Any]) -> int:
+    """Approximate memory held by a memoised per-line layout result."""
+    return 600 + 150 * len(line_result["placements"]._runs)
+
+
+# Memo of per-line layout results, keyed on line geometry (see _line_memo_key)
+_line_memo = LRUCache(
+    max_entries=LINE_MEMO_MAX_ENTRIES,
+    max_bytes=LINE_MEMO_MAX_BYTES,
+    sizeof=_line_result_nbytes,
+)
+
+
+def _line_memo_key(job: Dict[str, Any]) -> Tuple[Any, ...]:
+    """Canonical key of a line job: its pieces, roll width, gap and the engine version."""
+    return (
+        tuple(sorted((int(w), int(h), int(c)) for w, h, c in job["runs"])),
+        int(job["roll_width_mm"]),
+        float(job["gap_mm"]),
+        ENGINE_VERSION,
+    )
+
+
+class _LayoutProgress:
+    """Counts packed line layouts for a compute_efficiency progress callback."""
+
+    def __init__(self, callback: Callable[[int, int], None]):
+        self.callback = callback
+        self.done = 0
+        self.total = 0
+
+    def plan(self, n: int) -> None:
+        self.total += n
+        self.callback(self.done, self.total)
+
+    def advance(self, n: int) -> None:
+        self.done += n
+        self.callback(self.done, self.total)
+
+
+def _run_layout_batches(
+    batches: List[List[Dict[str, Any]]],
+    max_workers: Optional[int],
+    progress: Optional[_LayoutProgress] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Run independent line-job batches through the per-line memo.
+
+    Jobs whose geometry was packed before come from _line_memo; each distinct
+    missing geometry is packed once (on the process pool when max_workers > 1)
+    and memoised. Results are re-tagged with the requesting job's line_id.
+    With progress, packing is reported every PROGRESS_CHUNK_LINES layouts.
+    """
+    keys = [[_line_memo_key(job) for job in batch] for batch in batches]
+    if progress is not None:
+        progress.plan(sum(len(batch) for batch in batches))
+
+    found: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    misses: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for batch, batch_keys in zip(batches, keys):
+        for job, key in zip(batch, batch_keys):
+            if key in found or key in misses:
+                continue
+            cached = _line_memo.get(key)
+            if cached is None:
+                misses[key] = job
+            else:
+                found[key] = cached
+    if progress is not None:
+        progress.advance(progress.total - progress.done - len(misses))
+
+    if misses:
+        jobs = list(misses.values())
+        n_chunks = max(1, min(max_workers or 1, len(jobs)))
+        size = -(-len(jobs) // n_chunks)
+        if progress is not None:
+            size = min(size, PROGRESS_CHUNK_LINES)
+        chunks = [jobs[k:k + size] for k in range(0, len(jobs), size)]
+        if n_chunks > 1:
+            packed = _get_process_pool(max_workers).map(_layout_jobs, chunks)
+        else:
+            packed = map(_layout_jobs, chunks)
+        computed: List[Dict[str, Any]] = []
+        for chunk_results in packed:
+            computed.extend(chunk_results)
+            if progress is not None:
+                progress.advance(len(chunk_results))
+        for key, line_result in zip(misses, computed):
+            _line_memo.put(key, line_result)
+            found[key] = line_result
+
+    def _tagged(job: Dict[str, Any], key: Tuple[Any, ...]) -> Dict[str, Any]:
+        line_result = found[key]
+        if line_result["line_id"] == job["line_id"]:
+            return line_result
+        return dict(line_result, line_id=job["line_id"],
+                    placements=line_result["placements"].with_line_id(job["line_id"]))
+
+    return [
+        [_tagged(job, key) for job, key in zip(batch, batch_keys)]
+        for batch, batch_keys in zip(batches, keys)
+    ]
+
+
+def clear_line_memo() -> None:
+    """Clear the per-line layout memo used by compute_efficiency."""
+    _line_memo.clear()
+
+
+def line_memo_stats() -> Dict[str, int]:
+    """Entries, approximate bytes and hit/miss/eviction counters of the per-line layout memo."""
+    return _line_memo.stats()
+
+
+def _roll_area_mm2(line_results: List[Dict[str, Any]]) -> float:
+    """Roll area consumed by a set of per-line layout results."""
+    return sum(r["roll_width_mm"] * r["used_length_mm"] for r in line_results)
+
+
+def _fitting_widths(candidate_widths_mm: List[int], width_mm: int) -> List[int]:
+    """Candidate widths that fit a piece; falls back to the widest (which will fail nesting but won't crash)."""
+    fitting = sorted(set(w for w in candidate_widths_mm if w >= width_mm))
+    return fitting or [max(candidate_widths_mm)]
+
+
+def _roll_area_lower_bound(line: Line, roll_width_mm: int, gap_mm: float = 0.0) -> float:
+    """
+    Lower bound on the roll area (mm²) a line consumes at a roll width.
+
+    The roll area is at least the blind area; a shelf of width W also holds at most
+    floor((W + gap) / (w + gap)) pieces, so the line needs that many shelves of its drop.
+    """
+    area = line.width_mm * line.drop_mm * line.qty
+    per_shelf = int((roll_width_mm + gap_mm) // (line.width_mm + gap_mm))
+    if per_shelf <= 0:
+        return float(area)
+    shelves = -(-line.qty // per_shelf)
+    length = shelves * line.drop_mm + (shelves - 1) * gap_mm
+    return float(max(area, roll_width_mm * length))
+
+
+def _sweep_quote_widths(
+    lines: List[Line],
+    widths: List[int],
+    keep: int,
+    max_workers: Optional[int],
+    progress: Optional[_LayoutProgress] = None,
+) -> List[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Evaluate one roll width for the whole quote per candidate; best first.
+
+    Widths are tried in order of a lower bound on the roll area they consume
+    (_roll_area_lower_bound). The `keep` most promising widths are packed first;
+    any remaining width whose bound exceeds the worst of those cannot make the top
+    `keep` and is skipped. The rest are packed concurrently.
+    """
+    bounds = {rw: sum(_roll_area_lower_bound(l, rw) for l in lines) for rw in widths}
+    order = sorted(widths, key=lambda rw: (bounds[rw], rw))
+    first, rest = order[:keep], order[keep:]
+
+    evaluated = dict(zip(first, _run_layout_batches(
+        [_line_jobs(lines, [rw] * len(lines)) for rw in first], max_workers, progress)))
+    threshold = max(_roll_area_mm2(r) for r in evaluated.values())
+    survivors = [rw for rw in rest if bounds[rw] <= threshold]
+    if len(survivors) < len(rest):
+        logger.debug(f"[Widths] skipped {len(rest) - len(survivors)} of {len(widths)} widths by area bound")
+    evaluated.update(zip(survivors, _run_layout_batches(
+        [_line_jobs(lines, [rw] * len(lines)) for rw in survivors], max_workers, progress)))
+
+    return sorted(evaluated.items(), key=lambda kv: (_roll_area_mm2(kv[1]), kv[0]))
+
+
+def _sweep_line_widths(
+    lines: List[Line],
+    candidate_widths_mm: List[int],
+    keep: int,
+    max_workers: Optional[int],
+    progress: Optional[_LayoutProgress] = None,
+) -> List[List[Dict[str, Any]]]:
+    """
+    Evaluate every fitting candidate width per line; per line, best first.
+
+    Same bound-and-prune scheme as _sweep_quote_widths, applied to each line.
+    All (line, width) packings of a round go through _run_layout_batches together.
+    """
+    def run(pairs: List[Tuple[int, int]]) -> List[Dict[str, Any]]:
+        jobs = [dict(_line_jobs([lines[i]], [rw])[0], line_id=i + 1) for i, rw in pairs]
+        return _run_layout_batches([jobs], max_workers, progress)[0]
+
+    pending_first: List[Tuple[int, int]] = []
+    pending_rest: List[List[Tuple[int, float]]] = []
+    for i, line in enumerate(lines):
+        widths = _fitting_widths(candidate_widths_mm, line.width_mm)
+        ranked = sorted(((_roll_area_lower_bound(line, rw), rw) for rw in widths))
+        pending_first.extend((i, rw) for _, rw in ranked[:keep])
+        pending_rest.append([(rw, lb) for lb, rw in ranked[keep:]])
+
+    per_line: List[List[Dict[str, Any]]] = [[] for _ in lines]
+    for (i, _), result in zip(pending_first, run(pending_first)):
+        per_line[i].append(result)
+
+    second: List[Tuple[int, int]] = []
+    for i, rest in enumerate(pending_rest):
+        threshold = max(_roll_area_mm2([r]) for r in per_line[i])
+        second.extend((i, rw) for rw, lb in rest if lb <= threshold)
+    for (i, _), result in zip(second, run(second)):
+        per_line[i].append(result)
+
+    return [sorted(results, key=lambda r: (_roll_area_mm2([r]), r["roll_width_mm"])) for results in per_line]
+
+
+def _line_metrics(line_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Waste/utilization figures for one per-line layout result (unrounded areas in m²)."""
+    used_length_mm = line_result["used_length_mm"]
+    roll_width = line_result["roll_width_mm"]
+
+    # Calculate areas
+    blind_area_m2 = line_result["placements"].area / 1_000_000.0
+    roll_area_m2 = (roll_width * used_length_mm) / 1_000_000.0
+    waste_area_m2 = roll_area_m2 - blind_area_m2
+    waste_factor_pct = (waste_area_m2 / blind_area_m2 * 100.0) if blind_area_m2 > 0 else 0.0
+
+    return {
+        "waste_factor_pct": waste_factor_pct,
+        "utilization": line_result["util"],
+        "used_length_mm": used_length_mm,
+        "blind_area_m2": blind_area_m2,
+        "roll_area_m2": roll_area_m2,
+        "waste_area_m2": waste_area_m2,
+        "roll_width_mm": roll_width,
+    }
+
+
+def _quote_totals(line_results: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Overall utilization/waste for a set of per-line layout results (unrounded)."""
+    total_blind_area = sum(r["placements"].area for r in line_results) / 1_000_000.0
+    total_roll_area = _roll_area_mm2(line_results) / 1_000_000.0
+    overall_utilization = (total_blind_area / total_roll_area) if total_roll_area > 0 else 0.0
+    return {
+        "eff_pct": overall_utilization * 100.0,
+        "waste_pct": (1.0 - overall_utilization) * 100.0,
+        "total_used_area_m2": total_roll_area,
+        "total_waste_area_m2": total_roll_area - total_blind_area,
+    }
+
+
 def compute_efficiency(
     lines: List[Line],
-    candidate_widths_mm: Optional[List[int]] = None
+    candidate_widths_mm: Optional[List[int]] = None,
+    width_mode: str = "quote",
+    report_alternatives: int = 0,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
 ) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Compute waste efficiency for a list of lines.
@@ -1088,8 +3315,21 @@ def compute_efficiency(
     Args:
         lines: List of Line objects with width_mm, drop_mm, qty, etc.
         candidate_widths_mm: Optional list of available roll widths in mm.
-                           If provided, will be used for multi-width optimization (future).
-                           Currently accepted but not yet used in logic.
+                           Every width that fits is evaluated and the one with the
+                           lowest waste (least roll area) is used; ties go to the
+                           narrower width.
+        width_mode: "quote" - one roll width for the whole quote (default)
+                    "line"  - each line gets its own best width
+        report_alternatives: Number of runner-up widths to report ("alternatives"
+                           in totals for "quote" mode, per line result for "line" mode)
+        max_workers: Pack distinct line layouts concurrently on the engine process
+                     pool when > 1 (default: in-process)
+        progress: Optional callback, called as progress(done, total) while line
+                  layouts are packed. One layout is one line at one roll width;
+                  total grows when the width sweep has to try more widths.
+
+    Per-line layouts are memoised on (pieces, roll width, gap, ENGINE_VERSION), so
+    repeated lines within and across quotes are packed once (see line_memo_stats).
         
     Returns:
         Tuple of (results: List[Dict], totals: Dict) containing:
@@ -1104,76 +3344,70 @@ def compute_efficiency(
             "total_used_area_m2": 0.0,
             "total_waste_area_m2": 0.0,
         }
-    
-    # Convert lines to format for compute_layout_per_line
-    # Determine roll width (use candidate_widths_mm if provided, otherwise use max width from items, or default to 3000mm)
+
+    if width_mode not in ("quote", "line"):
+        raise ValueError(f"Unknown width_mode {width_mode!r} (expected 'quote' or 'line').")
+    keep = 1 + max(0, int(report_alternatives))
+    tracker = _LayoutProgress(progress) if progress is not None else None
+
+    # Create mapping from numeric line_id (used internally) to original string line_id
+    line_id_map = {i + 1: line.line_id for i, line in enumerate(lines)}
+
+    # Determine roll width(s) and compute layouts using fabric nesting
+    quote_alternatives: List[Tuple[int, List[Dict[str, Any]]]] = []
+    line_alternatives: List[List[Dict[str, Any]]] = [[] for _ in lines]
     if candidate_widths_mm and len(candidate_widths_mm) > 0:
-        # For now, use the minimum candidate width that fits all items
-        # TODO: Future - implement multi-width optimization using candidate_widths_mm
-        max_item_width = max(line.width_mm for line in lines)
-        # Find smallest candidate width that fits all items
-        fitting_widths = [w for w in candidate_widths_mm if w >= max_item_width]
-        if fitting_widths:
-            roll_width_mm = min(fitting_widths)
+        if width_mode == "quote":
+            widths = _fitting_widths(candidate_widths_mm, max(line.width_mm for line in lines))
+            ranked = _sweep_quote_widths(lines, widths, keep, max_workers, tracker)
+            line_results = ranked[0][1]
+            quote_alternatives = ranked[1:keep]
         else:
-            # If no candidate width fits, use the maximum candidate width (will fail nesting but won't crash)
-            roll_width_mm = max(candidate_widths_mm)
+            ranked_per_line = _sweep_line_widths(lines, candidate_widths_mm, keep, max_workers, tracker)
+            line_results = [ranked[0] for ranked in ranked_per_line]
+            line_alternatives = [ranked[1:keep] for ranked in ranked_per_line]
     else:
         max_width = max(line.width_mm for line in lines)
         roll_width_mm = max(max_width, 3000)  # Ensure at least 3000mm
-    
-    # Create mapping from numeric line_id (used internally) to original string line_id
-    line_id_map = {i + 1: line.line_id for i, line in enumerate(lines)}
-    
-    # Prepare lines data for compute_layout_per_line
-    # Use numeric line_ids (1, 2, 3, ...) for internal processing
-    lines_data = []
-    for idx, line in enumerate(lines):
-        # Expand items by quantity
-        items = [(line.width_mm, line.drop_mm)] * line.qty
-        lines_data.append({
-            "line_id": idx + 1,  # Use numeric line_id for internal processing
-            "items": items,
-            "gap_mm": 0.0,  # Default gap, can be made configurable
-            "roll_width_mm": roll_width_mm,
-        })
-    
-    # Compute layout using fabric nesting
-    layout_result = compute_layout_per_line(lines_data, roll_width_mm=roll_width_mm, gap_mm=0.0)
-    
+        line_results = _run_layout_batches([_line_jobs(lines, [roll_width_mm] * len(lines))], max_workers, tracker)[0]
+
     # Build results per line
     results = []
     total_blind_area = 0.0
     total_roll_area = 0.0
     
-    for line_result in layout_result["lines"]:
+    for line_result, alternatives in zip(line_results, line_alternatives):
         numeric_line_id = line_result["line_id"]  # This is now an int (1, 2, 3, ...)
         line_id = line_id_map.get(numeric_line_id, str(numeric_line_id))  # Map back to original string
-        used_length_mm = line_result["used_length_mm"]
-        utilization = line_result["util"]
-        roll_width = line_result["roll_width_mm"]
-        
-        # Calculate areas
-        blind_area_m2 = sum(p.w * p.h for p in line_result["placements"]) / 1_000_000.0
-        roll_area_m2 = (roll_width * used_length_mm) / 1_000_000.0
-        waste_area_m2 = roll_area_m2 - blind_area_m2
-        waste_factor_pct = (waste_area_m2 / blind_area_m2 * 100.0) if blind_area_m2 > 0 else 0.0
+        m = _line_metrics(line_result)
         
-        results.append({
+        result = {
             "line_id": line_id,
-            "waste_factor_pct": round(waste_factor_pct, 2),
-            "utilization": round(utilization * 100.0, 2),  # Convert to percentage
-            "used_length_mm": round(used_length_mm, 2),
-            "blind_area_m2": round(blind_area_m2, 3),
-            "roll_area_m2": round(roll_area_m2, 3),
-            "waste_area_m2": round(waste_area_m2, 3),
-            "roll_width_mm": roll_width,
+            "waste_factor_pct": round(m["waste_factor_pct"], 2),
+            "utilization": round(m["utilization"] * 100.0, 2),  # Convert to percentage
+            "used_length_mm": round(m["used_length_mm"], 2),
+            "blind_area_m2": round(m["blind_area_m2"], 3),
+            "roll_area_m2": round(m["roll_area_m2"], 3),
+            "waste_area_m2": round(m["waste_area_m2"], 3),
+            "roll_width_mm": m["roll_width_mm"],
             "pieces": line_result["pieces"],
             "levels": line_result["levels"],
-        })
+        }
+        if report_alternatives and width_mode == "line":
+            result["alternatives"] = [
+                {
+                    "roll_width_mm": a["roll_width_mm"],
+                    "waste_factor_pct": round(a["waste_factor_pct"], 2),
+                    "utilization": round(a["utilization"] * 100.0, 2),
+                    "used_length_mm": round(a["used_length_mm"], 2),
+                    "roll_area_m2": round(a["roll_area_m2"], 3),
+                }
+                for a in map(_line_metrics, alternatives)
+            ]
+        results.append(result)
         
-        total_blind_area += blind_area_m2
-        total_roll_area += roll_area_m2
+        total_blind_area += m["blind_area_m2"]
+        total_roll_area += m["roll_area_m2"]
     
     # Calculate totals
     total_waste_area = total_roll_area - total_blind_area
@@ -1189,6 +3423,16 @@ def compute_efficiency(
         "total_pieces": sum(r["pieces"] for r in results),
         "total_levels": sum(r["levels"] for r in results),
     }
+    if report_alternatives and width_mode == "quote":
+        totals["alternatives"] = [
+            {
+                "roll_width_mm": rw,
+                "eff_pct": round(t["eff_pct"], 2),
+                "waste_pct": round(t["waste_pct"], 2),
+                "total_used_area_m2": round(t["total_used_area_m2"], 3),
+                "total_waste_area_m2": round(t["total_waste_area_m2"], 3),
+            }
+            for rw, t in ((rw, _quote_totals(r)) for rw, r in quote_alternatives)
+        ]
     
     return results, totals
-
@@ -0,0 +1,132 @@
+"""
+Background job endpoints for large quotes: submit, poll, fetch the result.
+"""
+from fastapi import APIRouter, Depends, Request, HTTPException, Body, Response
+from slowapi import Limiter
+from nester_api.app.models.requests import EfficiencyRequest
+from nester_api.app.models.responses import EfficiencyResponse, JobStatusResponse
+from nester_api.app.core.security import get_api_key
+from nester_api.app.core.jobs import Job, JobQueueFullError, get_job_manager
+from nester_api.app.core.logging import logger
+from nester_api.app.core.config import get_settings
+from nester_api.app.core.rate_limit import get_rate_limit_key
+
+
+router = APIRouter()
+settings = get_settings()
+
+# Create limiter instance for this router
+limiter = Limiter(
+    key_func=get_rate_limit_key,
+    default_limits=[f"{settings.RATE_LIMIT_PER_MINUTE}/minute"],
+    storage_uri="memory://"
+)
+
+# Default example for request body
+REQUEST_BODY_EXAMPLE = {
+    "quote_id": "Q-PROD-2025-W14",
+    "model": "blinds",
+    "available_widths_mm": [1900, 2050, 2400, 3000],
+    "lines": [
+        {"line_id": "L1", "width_mm": 2300, "drop_mm": 2100, "qty": 2},
+        {"line_id": "L2", "width_mm": 1450, "drop_mm": 1800, "qty": 6}
+    ]
+}
+
+
+def _get_job(job_id: str) -> Job:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "not_found", "details": f"Job {job_id} not found or expired"}
+        )
+    return job
+
+
+@router.post("/api/v1/jobs", response_model=JobStatusResponse, status_code=202)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def submit_job(
+    request: Request,
+    response: Response,
+    req: EfficiencyRequest = Body(..., example=REQUEST_BODY_EXAMPLE),
+    _: str = Depends(get_api_key)
+) -> JobStatusResponse:
+    """
+    Submit a quote for background calculation.
+
+    For quotes above the 1000-line limit of /api/v1/waste/efficiency (up to
+    JOB_MAX_LINES). Poll GET /api/v1/jobs/{job_id} for progress and fetch the
+    result from GET /api/v1/jobs/{job_id}/result.
+
+    Requires authentication via X-API-Key header.
+
+    Returns:
+        202 with JobStatusResponse; Location points to the job
+
+    Raises:
+        HTTPException(400) if validation fails
+        HTTPException(401) if authentication fails
+        HTTPException(429) if rate limit exceeded
+        HTTPException(503) if the job queue is full
+    """
+    corr_id = request.state.correlation_id
+
+    if len(req.lines) > settings.JOB_MAX_LINES:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "bad_request", "details": f"Maximum {settings.JOB_MAX_LINES} lines allowed per job"}
+        )
+    try:
+        job = get_job_manager().submit(req)
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail={"error": "server_busy", "details": str(e)},
+            headers={"Retry-After": "5"}
+        )
+
+    logger.info(
+        f"Job submitted: job_id={job.job_id}, quote_id={req.quote_id}, "
+        f"lines={len(req.lines)}, correlation_id={corr_id}"
+    )
+    response.headers["Location"] = f"/api/v1/jobs/{job.job_id}"
+    return job.status_response()
+
+
+@router.get("/api/v1/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(job_id: str, _: str = Depends(get_api_key)) -> JobStatusResponse:
+    """
+    Status and progress of a job.
+
+    Progress counts line layouts packed (one per line per roll width tried).
+
+    Raises:
+        HTTPException(401) if authentication fails
+        HTTPException(404) if the job is unknown or its result expired
+    """
+    return _get_job(job_id).status_response()
+
+
+@router.get("/api/v1/jobs/{job_id}/result", response_model=EfficiencyResponse)
+async def get_job_result(job_id: str, _: str = Depends(get_api_key)) -> EfficiencyResponse:
+    """
+    Result of a finished job, in the same format as /api/v1/waste/efficiency.
+
+    Raises:
+        HTTPException(400) if the quote was rejected by the engine
+        HTTPException(401) if authentication fails
+        HTTPException(404) if the job is unknown or its result expired
+        HTTPException(409) if the job has not finished yet
+        HTTPException(500) if the calculation failed
+    """
+    job = _get_job(job_id)
+    if job.status == "succeeded":
+        return job.result
+    if job.status == "failed":
+        status_code = 400 if job.error.error == "bad_request" else 500
+        raise HTTPException(status_code=status_code, detail=job.error.model_dump())
+    raise HTTPException(
+        status_code=409,
+        detail={"error": "not_ready", "details": f"Job {job_id} is {job.status}"}
+    )
@@ -0,0 +1,202 @@
+"""
+Tube cutting plan endpoints.
+"""
+import time
+from fastapi import APIRouter, Depends, Request, HTTPException, Body
+from slowapi import Limiter
+from nester_api.app.models.requests import TubePlanRequest, TubeBatchRequest
+from nester_api.app.models.responses import TubePlanResponse, TubeBatchResponse
+from nester_api.app.core.security import get_api_key
+from nester_api.app.core.engine_client import compute_tube_plan_wrapper, tube_batch_response
+from nester_api.app.core.executor import run_engine, map_engine
+from nester_api.app.core.logging import logger
+from nester_api.app.core.config import get_settings
+from nester_api.app.core.rate_limit import get_rate_limit_key
+
+
+router = APIRouter()
+settings = get_settings()
+
+# Create limiter instance for this router
+limiter = Limiter(
+    key_func=get_rate_limit_key,
+    default_limits=[f"{settings.RATE_LIMIT_PER_MINUTE}/minute"],
+    storage_uri="memory://"
+)
+
+MAX_TUBE_PIECES = 200_000  # Pieces (sum of qty) per job
+MAX_TUBE_BATCH_JOBS = 100  # Jobs per batch request
+
+# Default example for request body
+REQUEST_BODY_EXAMPLE = {
+    "profile": "RAIL-40-WHITE",
+    "stock_length_mm": 6000,
+    "kerf_mm": 3,
+    "algo": "BFD",
+    "items": [
+        {"length_mm": 2300, "qty": 4},
+        {"length_mm": 1450, "qty": 6}
+    ]
+}
+
+
+def _check_job_size(job: TubePlanRequest) -> None:
+    """Reject jobs with too many pieces for a synchronous request."""
+    pieces = sum(item.qty for item in job.items)
+    if pieces > MAX_TUBE_PIECES:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "bad_request", "details": f"Maximum {MAX_TUBE_PIECES} pieces allowed per tube job"}
+        )
+
+
+@router.post("/api/v1/tubes/plan", response_model=TubePlanResponse)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def tube_plan(
+    request: Request,
+    req: TubePlanRequest = Body(..., example=REQUEST_BODY_EXAMPLE),
+    _: str = Depends(get_api_key)
+) -> TubePlanResponse:
+    """
+    Compute a tube cutting plan for one profile.
+
+    Requires authentication via X-API-Key header.
+    Rate limited to 60 requests per minute per client.
+
+    Args:
+        request: FastAPI request object (for rate limiting)
+        req: TubePlanRequest with profile, stock_length_mm, kerf_mm, algo, items
+
+    Returns:
+        TubePlanResponse with patterns, tube count and efficiency
+
+    Raises:
+        HTTPException(400) if validation fails
+        HTTPException(401) if authentication fails
+        HTTPException(429) if rate limit exceeded
+        HTTPException(499) if the client disconnected before the result was ready
+        HTTPException(500) on server error
+        HTTPException(503) if the engine queue is full
+    """
+    start_time = time.perf_counter()
+    corr_id = request.state.correlation_id
+
+    try:
+        logger.info(
+            f"Tube plan started: profile={req.profile}, items={len(req.items)}, "
+            f"stock={req.stock_length_mm}mm, algo={req.algo}, correlation_id={corr_id}"
+        )
+
+        _check_job_size(req)
+        response = await run_engine(request, compute_tube_plan_wrapper, req)
+
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        logger.info(
+            f"Tube plan completed: calc_id={response.calc_id}, profile={req.profile}, "
+            f"tubes={response.num_tubes}, duration={duration_ms:.2f}ms, status=success, "
+            f"correlation_id={corr_id}"
+        )
+
+        return response
+
+    except HTTPException:
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        logger.error(
+            f"Tube plan failed: profile={req.profile}, "
+            f"duration={duration_ms:.2f}ms, status=error, correlation_id={corr_id}",
+            exc_info=True
+        )
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "bad_request", "details": str(e)}
+        )
+    except Exception as e:
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        logger.exception(
+            f"Tube plan error: profile={req.profile}, "
+            f"duration={duration_ms:.2f}ms, error={str(e)}, correlation_id={corr_id}"
+        )
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "server_error", "details": str(e)}
+        )
+
+
+@router.post("/api/v1/tubes/plan:batch", response_model=TubeBatchResponse)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def tube_plan_batch(
+    request: Request,
+    req: TubeBatchRequest = Body(..., example={"jobs": [REQUEST_BODY_EXAMPLE]}),
+    _: str = Depends(get_api_key)
+) -> TubeBatchResponse:
+    """
+    Compute independent tube cutting plans (e.g. one per profile) in parallel.
+
+    Requires authentication via X-API-Key header.
+    Rate limited to 60 requests per minute per client.
+
+    Args:
+        request: FastAPI request object (for rate limiting)
+        req: TubeBatchRequest with up to 100 tube jobs
+
+    Returns:
+        TubeBatchResponse with one result per job, in job order
+
+    Raises:
+        HTTPException(400) if validation fails
+        HTTPException(401) if authentication fails
+        HTTPException(429) if rate limit exceeded
+        HTTPException(499) if the client disconnected before the result was ready
+        HTTPException(500) on server error
+        HTTPException(503) if the engine queue is full
+    """
+    start_time = time.perf_counter()
+    corr_id = request.state.correlation_id
+
+    try:
+        logger.info(f"Tube batch started: jobs={len(req.jobs)}, correlation_id={corr_id}")
+
+        if not req.jobs or len(req.jobs) > MAX_TUBE_BATCH_JOBS:
+            raise HTTPException(
+                status_code=400,
+                detail={"error": "bad_request", "details": f"Between 1 and {MAX_TUBE_BATCH_JOBS} jobs allowed per batch"}
+            )
+        for job in req.jobs:
+            _check_job_size(job)
+
+        # Jobs run in parallel on the engine executor, as one request against its queue
+        response = tube_batch_response(await map_engine(request, compute_tube_plan_wrapper, req.jobs))
+
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        logger.info(
+            f"Tube batch completed: jobs={len(req.jobs)}, tubes={response.total_tubes}, "
+            f"duration={duration_ms:.2f}ms, status=success, correlation_id={corr_id}"
+        )
+
+        return response
+
+    except HTTPException:
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        logger.error(
+            f"Tube batch failed: jobs={len(req.jobs)}, "
+            f"duration={duration_ms:.2f}ms, status=error, correlation_id={corr_id}",
+            exc_info=True
+        )
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "bad_request", "details": str(e)}
+        )
+    except Exception as e:
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        logger.exception(
+            f"Tube batch error: jobs={len(req.jobs)}, "
+            f"duration={duration_ms:.2f}ms, error={str(e)}, correlation_id={corr_id}"
+        )
+        raise HTTPException(
+            status_code=500,
+            detail={"error": "server_error", "details": str(e)}
+        )
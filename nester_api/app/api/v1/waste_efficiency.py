@@ -2,13 +2,23 @@
 Waste efficiency calculation endpoint.
 """
 import time
-from fastapi import APIRouter, Depends, Request, HTTPException, Body
+from typing import Any, Dict, List, Optional, Union
+from fastapi import APIRouter, Depends, Request, Response, HTTPException, Body
+from fastapi.responses import JSONResponse
+from limits import parse
+from pydantic import ValidationError
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+from nester.engine import ENGINE_VERSION
 from nester_api.app.models.requests import EfficiencyRequest
-from nester_api.app.models.responses import EfficiencyResponse
+from nester_api.app.models.responses import (
+    EfficiencyResponse, EfficiencyBatchResponse, EfficiencyBatchItem, ErrorDetail,
+)
 from nester_api.app.core.security import get_api_key
-from nester_api.app.core.engine_client import compute_efficiency_wrapper
+from nester_api.app.core.engine_client import (
+    efficiency_request_key, cached_efficiency_response,
+    compute_efficiency_coalesced, compute_efficiency_batch_coalesced,
+)
 from nester_api.app.core.logging import logger
 from nester_api.app.core.config import get_settings
 from nester_api.app.core.rate_limit import get_rate_limit_key
@@ -24,6 +34,11 @@ limiter = Limiter(
     storage_uri="memory://"
 )
 
+# Batches are limited by their cost (one unit per quote), not per HTTP call
+batch_quote_limit = parse(f"{settings.BATCH_RATE_LIMIT_QUOTES_PER_MINUTE}/minute")
+
+MAX_LINES_PER_QUOTE = 1000
+
 # Default example for request body
 REQUEST_BODY_EXAMPLE = {
     "quote_id": "Q-TEST-001",
@@ -42,31 +57,58 @@ REQUEST_BODY_EXAMPLE = {
 }
 
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag.
+
+    Only called for a cached response, so "*" (any current representation)
+    matches.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
 @router.post("/api/v1/waste/efficiency", response_model=EfficiencyResponse)
 @limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
 async def efficiency(
     request: Request,
+    response: Response,
     req: EfficiencyRequest = Body(..., example=REQUEST_BODY_EXAMPLE),
     _: str = Depends(get_api_key)
-) -> EfficiencyResponse:
+) -> Union[EfficiencyResponse, Response]:
     """
     Calculate waste efficiency for a quote.
     
     Requires authentication via X-API-Key header.
     Rate limited to 60 requests per minute per client.
     
+    The ETag is a hash of the canonical request and the engine version. When
+    the response for the same request is cached, it is returned (with a new
+    calc_id) without calling the engine, or 304 if If-None-Match matches the
+    ETag. On a cache miss the quote is calculated and returned with 200
+    whatever If-None-Match says. A request identical to one being calculated
+    (by another request, a batch or a job) waits for it and shares its result.
+    
     Args:
         request: FastAPI request object (for rate limiting)
+        response: Response (for the ETag header)
         req: EfficiencyRequest with quote_id, model, available_widths_mm, lines
         
     Returns:
-        EfficiencyResponse with calc_id, quote_id, results, totals, version, message
+        EfficiencyResponse with calc_id, quote_id, results, totals, version, message,
+        or 304 Not Modified
         
     Raises:
         HTTPException(400) if validation fails
         HTTPException(401) if authentication fails
         HTTPException(429) if rate limit exceeded
+        HTTPException(499) if the client disconnected before the result was ready
         HTTPException(500) on server error
+        HTTPException(503) if the engine queue is full
     """
     start_time = time.perf_counter()
     corr_id = request.state.correlation_id
@@ -79,23 +121,39 @@ async def efficiency(
         )
         
         # Validate line count
-        if len(req.lines) > 1000:
+        if len(req.lines) > MAX_LINES_PER_QUOTE:
             raise HTTPException(
                 status_code=400,
-                detail={"error": "bad_request", "details": "Maximum 1000 lines allowed per request"}
+                detail={"error": "bad_request", "details": f"Maximum {MAX_LINES_PER_QUOTE} lines allowed per request"}
+            )
+        
+        key = efficiency_request_key(req)
+        etag = f'W/"{key}"'
+        cached = cached_efficiency_response(key)
+        if cached is not None:
+            if _etag_matches(request.headers.get("if-none-match"), etag):
+                logger.info(f"Request not modified: quote_id={req.quote_id}, correlation_id={corr_id}")
+                return Response(status_code=304, headers={"ETag": etag})
+            duration_ms = (time.perf_counter() - start_time) * 1000
+            logger.info(
+                f"Request completed: calc_id={cached['calc_id']}, quote_id={req.quote_id}, "
+                f"duration={duration_ms:.2f}ms, status=success, cache=hit, correlation_id={corr_id}"
             )
+            return JSONResponse(content=cached, headers={"ETag": etag})
         
-        # Compute efficiency
-        response = compute_efficiency_wrapper(req)
+        # Compute efficiency on the engine executor (keeps the event loop free);
+        # identical requests, batch quotes and jobs in flight share one computation
+        result = await compute_efficiency_coalesced(request, key, req)
+        response.headers["ETag"] = etag
         
         duration_ms = (time.perf_counter() - start_time) * 1000
         
         logger.info(
-            f"Request completed: calc_id={response.calc_id}, quote_id={req.quote_id}, "
+            f"Request completed: calc_id={result.calc_id}, quote_id={req.quote_id}, "
             f"duration={duration_ms:.2f}ms, status=success, correlation_id={corr_id}"
         )
         
-        return response
+        return result
         
     except HTTPException:
         duration_ms = (time.perf_counter() - start_time) * 1000
@@ -116,3 +174,110 @@ async def efficiency(
             detail={"error": "server_error", "details": str(e)}
         )
 
+
+def _check_batch_cost(request: Request, cost: int) -> None:
+    """Charge a batch's cost (its quote count) to the client's batch rate limit."""
+    key = get_rate_limit_key(request)
+    if not limiter.limiter.hit(batch_quote_limit, "efficiency_batch", key, cost=cost):
+        reset_at, _ = limiter.limiter.get_window_stats(batch_quote_limit, "efficiency_batch", key)
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "error": "rate_limited",
+                "details": f"Batch of {cost} quotes exceeds {settings.BATCH_RATE_LIMIT_QUOTES_PER_MINUTE} quotes per minute"
+            },
+            headers={"Retry-After": str(max(1, int(reset_at - time.time())))}
+        )
+
+
+def _validation_error(e: ValidationError) -> ErrorDetail:
+    """Compact per-quote error for a request body that failed validation."""
+    details = "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+    )
+    return ErrorDetail(error="bad_request", details=details)
+
+
+@router.post("/api/v1/waste/efficiency:batch", response_model=EfficiencyBatchResponse)
+@limiter.limit(f"{settings.RATE_LIMIT_PER_MINUTE}/minute")
+async def efficiency_batch(
+    request: Request,
+    quotes: List[Dict[str, Any]] = Body(..., example=[REQUEST_BODY_EXAMPLE]),
+    _: str = Depends(get_api_key)
+) -> EfficiencyBatchResponse:
+    """
+    Calculate waste efficiency for many quotes in one call.
+    
+    The body is a JSON array of efficiency requests. Quotes are validated and
+    computed independently, in parallel; each gets its result or its own error,
+    in request order. Quotes identical to each other or to a calculation in
+    flight share one calculation.
+    
+    Requires authentication via X-API-Key header.
+    Each quote counts against a per-client quota of quotes per minute.
+    
+    Args:
+        request: FastAPI request object (for rate limiting)
+        quotes: List of EfficiencyRequest bodies
+        
+    Returns:
+        EfficiencyBatchResponse with one item per quote
+        
+    Raises:
+        HTTPException(400) if the batch is empty or too large
+        HTTPException(401) if authentication fails
+        HTTPException(429) if the batch exceeds the quote rate limit
+        HTTPException(499) if the client disconnected before the results were ready
+        HTTPException(503) if the engine queue is full
+    """
+    start_time = time.perf_counter()
+    corr_id = request.state.correlation_id
+    
+    if not quotes or len(quotes) > settings.BATCH_MAX_QUOTES:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "bad_request", "details": f"Between 1 and {settings.BATCH_MAX_QUOTES} quotes allowed per batch"}
+        )
+    _check_batch_cost(request, len(quotes))
+    
+    items: List[EfficiencyBatchItem] = []
+    valid: List[EfficiencyRequest] = []
+    for index, body in enumerate(quotes):
+        quote_id = body.get("quote_id") if isinstance(body.get("quote_id"), str) else None
+        try:
+            req = EfficiencyRequest.model_validate(body)
+        except ValidationError as e:
+            items.append(EfficiencyBatchItem(index=index, quote_id=quote_id, status="error", error=_validation_error(e)))
+            continue
+        if len(req.lines) > MAX_LINES_PER_QUOTE:
+            error = ErrorDetail(error="bad_request", details=f"Maximum {MAX_LINES_PER_QUOTE} lines allowed per request")
+            items.append(EfficiencyBatchItem(index=index, quote_id=quote_id, status="error", error=error))
+            continue
+        items.append(EfficiencyBatchItem(index=index, quote_id=quote_id, status="ok"))
+        valid.append(req)
+    
+    logger.info(
+        f"Batch started: quotes={len(quotes)}, valid={len(valid)}, correlation_id={corr_id}"
+    )
+    outcomes = await compute_efficiency_batch_coalesced(request, valid) if valid else []
+    
+    pending = iter(outcomes)
+    for item in items:
+        if item.status == "ok":
+            item.result, item.error = next(pending)
+            if item.error is not None:
+                item.status = "error"
+    failed = sum(1 for item in items if item.status == "error")
+    
+    duration_ms = (time.perf_counter() - start_time) * 1000
+    logger.info(
+        f"Batch completed: quotes={len(quotes)}, failed={failed}, "
+        f"duration={duration_ms:.2f}ms, correlation_id={corr_id}"
+    )
+    return EfficiencyBatchResponse(
+        results=items,
+        succeeded=len(items) - failed,
+        failed=failed,
+        version=ENGINE_VERSION,
+        message="ok"
+    )
@@ -50,6 +50,27 @@ class Settings(BaseSettings):
     # Rate limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_BURST: int = 20
+    BATCH_RATE_LIMIT_QUOTES_PER_MINUTE: int = 1200  # Quotes per minute through the batch endpoint
+    BATCH_MAX_QUOTES: int = 200  # Quotes per batch request
+    
+    # Efficiency response cache (keyed on the canonical request and engine version)
+    RESPONSE_CACHE_MAX_ENTRIES: int = 2048
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Approximate memory cap
+    RESPONSE_CACHE_TTL_S: int = 3600  # 0 = no expiry
+    
+    # Engine executor (CPU-bound engine calls run off the event loop)
+    ENGINE_EXECUTOR: str = "process"  # "process" (separate worker processes) or "thread"
+    ENGINE_WORKERS: int = 0  # 0 = CPU count
+    ENGINE_MAX_QUEUE: int = 32  # Admitted requests waiting for a free worker; more get 503
+    ENGINE_PREWARM: bool = True  # Start and warm up workers when the app starts
+    ENGINE_DISCONNECT_POLL_S: float = 0.25  # How often a waiting request checks for client disconnect
+    
+    # Background jobs (large quotes, submitted and polled)
+    JOB_WORKERS: int = 1  # Jobs calculated at the same time
+    JOB_MAX_QUEUED: int = 16  # Jobs waiting for a worker; more get 503
+    JOB_MAX_LINES: int = 50000  # Lines per job
+    JOB_POLL_S: float = 0.25  # How often a running job refreshes its progress
+    JOB_RESULT_TTL_S: int = 3600  # How long finished jobs and their results are kept
     
     # Logging
     LOG_DIR: str = "logs"
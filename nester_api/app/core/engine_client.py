@@ -1,13 +1,28 @@
 """
-Engine client wrapper for the existing compute_efficiency function.
+Engine client wrappers for compute_efficiency and tube planning.
 """
-from typing import List, Dict, Any
-from nester.engine.core import Line, compute_efficiency
-from nester_api.app.models.requests import EfficiencyRequest
-from nester_api.app.models.responses import EfficiencyResponse, LineResult, TotalsResult
+import hashlib
+import json
+import threading
+import uuid
+from concurrent.futures import Future
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from fastapi import HTTPException, Request
+from nester.engine.core import ENGINE_VERSION, LRUCache, Line, TubePlan, compute_efficiency, compute_tube_plan
+from nester_api.app.core.config import get_settings
+from nester_api.app.core.executor import get_engine_executor, submit_engine, wait_engine
+from nester_api.app.models.requests import EfficiencyRequest, TubePlanRequest
+from nester_api.app.models.responses import (
+    EfficiencyResponse, LineResult, TotalsResult, ErrorDetail,
+    TubePlanResponse, TubePatternResult, InfeasiblePiece, TubeBatchResponse,
+)
 
 
-def compute_efficiency_wrapper(request: EfficiencyRequest) -> EfficiencyResponse:
+def compute_efficiency_wrapper(
+    request: EfficiencyRequest,
+    max_workers: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+) -> EfficiencyResponse:
     """
     Wrapper around the existing compute_efficiency function.
     
@@ -16,6 +31,8 @@ def compute_efficiency_wrapper(request: EfficiencyRequest) -> EfficiencyResponse
     
     Args:
         request: EfficiencyRequest with quote_id, model, available_widths_mm, lines
+        max_workers: Engine processes to pack lines on (see compute_efficiency)
+        progress: Optional progress(done, total) callback over line layouts
         
     Returns:
         EfficiencyResponse with calc_id, quote_id, results, totals, version, message
@@ -36,7 +53,9 @@ def compute_efficiency_wrapper(request: EfficiencyRequest) -> EfficiencyResponse
     # Call existing compute_efficiency function
     results_data, totals_data = compute_efficiency(
         lines,
-        candidate_widths_mm=request.available_widths_mm
+        candidate_widths_mm=request.available_widths_mm,
+        max_workers=max_workers,
+        progress=progress
     )
     
     # Convert results to response models
@@ -47,7 +66,6 @@ def compute_efficiency_wrapper(request: EfficiencyRequest) -> EfficiencyResponse
     totals = TotalsResult(**totals_data)
     
     # Generate calc_id (8-character hex)
-    import uuid
     calc_id = uuid.uuid4().hex[:8]
     
     # Build response
@@ -56,9 +74,371 @@ def compute_efficiency_wrapper(request: EfficiencyRequest) -> EfficiencyResponse
         quote_id=request.quote_id,
         results=line_results,
         totals=totals,
-        version="1.0.0",
+        version=ENGINE_VERSION,
         message="ok"
     )
 
 
+def efficiency_request_key(request: EfficiencyRequest) -> str:
+    """
+    Content hash of an efficiency request and the engine version.
+    
+    The request is canonicalised first (widths sorted and de-duplicated, lines
+    reduced to the fields that shape the response, in order), so re-sent
+    quotes hash the same regardless of JSON formatting or unused line fields.
+    """
+    canonical = {
+        "quote_id": request.quote_id,
+        "model": request.model,
+        "available_widths_mm": sorted(set(request.available_widths_mm)) if request.available_widths_mm else None,
+        "lines": [[line.line_id, line.width_mm, line.drop_mm, line.qty] for line in request.lines],
+        "engine_version": ENGINE_VERSION,
+    }
+    payload = json.dumps(canonical, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cached_response_nbytes(body: Dict[str, Any]) -> int:
+    """Approximate memory held by a cached efficiency response body."""
+    return 400 + 300 * len(body["results"])
+
+
+_settings = get_settings()
+
+# Completed efficiency responses (JSON bodies without calc_id) by efficiency_request_key
+_response_cache = LRUCache(
+    max_entries=_settings.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=_settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl_s=_settings.RESPONSE_CACHE_TTL_S or None,
+    sizeof=_cached_response_nbytes,
+)
+
+
+def cache_efficiency_response(key: str, response: EfficiencyResponse) -> None:
+    """Store a completed efficiency response under its request key."""
+    _response_cache.put(key, response.model_dump(mode="json", exclude={"calc_id"}))
+
+
+def cached_efficiency_response(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Cached response body for a request key, with a fresh calc_id, or None.
+    
+    The body was validated when it was stored and is returned as-is.
+    """
+    body = _response_cache.get(key)
+    if body is None:
+        return None
+    return dict(body, calc_id=uuid.uuid4().hex[:8])
+
+
+def clear_efficiency_cache() -> None:
+    """Drop all cached efficiency responses."""
+    _response_cache.clear()
+
+
+def efficiency_cache_stats() -> Dict[str, int]:
+    """Entries, approximate bytes and hit/miss counters of the response cache."""
+    return _response_cache.stats()
+
+
+def _fresh_error(error: Exception) -> Exception:
+    """A new exception like error, so callers sharing a failed computation don't share (and chain) one object."""
+    if isinstance(error, HTTPException):
+        return HTTPException(status_code=error.status_code, detail=error.detail, headers=error.headers)
+    try:
+        return type(error)(*error.args)
+    except Exception:
+        return RuntimeError(str(error))
+
+
+class SingleFlight:
+    """
+    Lets callers with the same key share one in-flight engine computation.
+    
+    Computations are futures from the engine executor, so endpoints, batch
+    quotes and job threads can all join them. The first caller for a key
+    starts the computation; callers arriving while it runs join it instead of
+    starting their own. Every caller leaves when it stops waiting (after
+    storing the result wherever later callers will look for it); the key is
+    dropped when the last caller leaves, and a computation nobody waits for
+    any more is cancelled if it has not started yet.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[str, List[Any]] = {}  # key -> [future, callers waiting]
+        self._lock = threading.Lock()
+        self.computations = 0
+        self.coalesced = 0
+    
+    def join_many(
+        self,
+        keys: List[str],
+        start: Callable[[List[int]], List["Future[Any]"]],
+    ) -> List[Tuple["Future[Any]", bool]]:
+        """
+        Futures for keys, starting one computation per key not in flight.
+        
+        Args:
+            keys: Keys to join (repeats share one computation)
+            start: start(indexes) starts the computations for keys[i], i in
+                   indexes, and returns their futures in the same order
+        
+        Returns:
+            (future, shared) per key - shared is True if another caller's
+            computation is used. Each must be released with leave().
+        """
+        with self._lock:
+            todo: Dict[str, int] = {}
+            for i, key in enumerate(keys):
+                if key not in self._calls and key not in todo:
+                    todo[key] = i
+            started = start(list(todo.values())) if todo else []
+            for key, future in zip(todo, started):
+                self._calls[key] = [future, 0]
+                self.computations += 1
+            joined = []
+            for i, key in enumerate(keys):
+                call = self._calls[key]
+                call[1] += 1
+                shared = todo.get(key) != i
+                if shared:
+                    self.coalesced += 1
+                joined.append((call[0], shared))
+            return joined
+    
+    def join(self, key: str, start: Callable[[], "Future[Any]"]) -> Tuple["Future[Any]", bool]:
+        """Future for key, starting the computation if it is not in flight (see join_many)."""
+        return self.join_many([key], lambda _: [start()])[0]
+    
+    def leave(self, key: str, future: "Future[Any]") -> None:
+        """Stop waiting for a joined computation; the last caller to leave drops the key."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None or call[0] is not future:
+                return
+            call[1] -= 1
+            last = not call[1]
+            if last:
+                del self._calls[key]
+        if last:
+            future.cancel()  # No-op once it is running or done
+    
+    def stats(self) -> Dict[str, int]:
+        """Computations run, computations saved by coalescing, and keys in flight."""
+        with self._lock:
+            return {
+                "computations": self.computations,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+            }
+
+
+# In-flight efficiency calculations by efficiency_request_key
+_efficiency_flights = SingleFlight()
+
 
+async def compute_efficiency_coalesced(
+    request: Request,
+    key: str,
+    efficiency_request: EfficiencyRequest,
+) -> EfficiencyResponse:
+    """
+    compute_efficiency_wrapper on the engine executor, for an endpoint, sharing
+    the computation with identical requests, batch quotes and jobs in flight.
+    
+    The response is cached (see cache_efficiency_response) before this caller
+    leaves the computation, so an identical request arriving just after it
+    finishes finds either the computation or the cached response. Callers
+    that share another caller's computation get their own calc_id, or their
+    own copy of its error.
+    
+    Raises:
+        HTTPException(499) if the client disconnected
+        HTTPException(503) if the engine queue is full
+    """
+    future, shared = _efficiency_flights.join(
+        key, lambda: submit_engine(compute_efficiency_wrapper, [efficiency_request])[0]
+    )
+    try:
+        response = await wait_engine(request, future)
+        cache_efficiency_response(key, response)
+    except HTTPException:
+        raise
+    except Exception as e:
+        if not shared:
+            raise
+        raise _fresh_error(e) from None
+    finally:
+        _efficiency_flights.leave(key, future)
+    if shared:
+        return response.model_copy(update={"calc_id": uuid.uuid4().hex[:8]})
+    return response
+
+
+async def compute_efficiency_batch_coalesced(
+    request: Request,
+    requests: List[EfficiencyRequest],
+) -> List[Tuple[Optional[EfficiencyResponse], Optional[ErrorDetail]]]:
+    """
+    compute_efficiency_wrapper for each quote of a batch, with errors returned
+    instead of raised so one bad quote does not fail the others.
+    
+    Quotes are coalesced and cached like compute_efficiency_coalesced (with
+    each other and with requests and jobs in flight); the ones left to
+    calculate run in parallel as one engine executor request.
+    
+    Returns:
+        (response, None) on success, (None, error) otherwise, per quote
+    
+    Raises:
+        HTTPException(499) if the client disconnected
+        HTTPException(503) if the engine queue is full
+    """
+    keys = [efficiency_request_key(r) for r in requests]
+    joined = _efficiency_flights.join_many(
+        keys, lambda indexes: submit_engine(compute_efficiency_wrapper, [requests[i] for i in indexes])
+    )
+    try:
+        outcomes: List[Tuple[Optional[EfficiencyResponse], Optional[ErrorDetail]]] = []
+        for key, (future, shared) in zip(keys, joined):
+            try:
+                response = await wait_engine(request, future)
+            except HTTPException:
+                raise
+            except ValueError as e:
+                outcomes.append((None, ErrorDetail(error="bad_request", details=str(e))))
+            except Exception as e:
+                outcomes.append((None, ErrorDetail(error="server_error", details=str(e))))
+            else:
+                cache_efficiency_response(key, response)
+                if shared:
+                    response = response.model_copy(update={"calc_id": uuid.uuid4().hex[:8]})
+                outcomes.append((response, None))
+        return outcomes
+    finally:
+        for key, (future, _) in zip(keys, joined):
+            _efficiency_flights.leave(key, future)
+
+
+def compute_efficiency_job(args: Tuple[EfficiencyRequest, Any]) -> EfficiencyResponse:
+    """
+    compute_efficiency_wrapper for a background job, on an engine executor worker.
+    
+    Args:
+        args: (request, progress) - progress is a shared list proxy that the
+              worker keeps set to [layouts done, layouts total]
+    """
+    request, progress = args
+    
+    def report(done: int, total: int) -> None:
+        progress[:] = [done, total]
+    
+    return compute_efficiency_wrapper(request, progress=report)
+
+
+def join_efficiency_job(request: EfficiencyRequest, progress: Any) -> Tuple[str, "Future[Any]", bool]:
+    """
+    Start a job's calculation (compute_efficiency_job) on the engine executor,
+    or join an identical one in flight, whose progress is then not reported.
+    
+    Returns:
+        (key, future, shared) - release with leave_efficiency_flight(key, future)
+    
+    Raises:
+        EngineBusyError: if the engine queue is full
+    """
+    key = efficiency_request_key(request)
+    future, shared = _efficiency_flights.join(
+        key, lambda: get_engine_executor().submit(compute_efficiency_job, (request, progress))
+    )
+    return key, future, shared
+
+
+def leave_efficiency_flight(key: str, future: "Future[Any]") -> None:
+    """Stop waiting for a calculation joined with join_efficiency_job."""
+    _efficiency_flights.leave(key, future)
+
+
+def single_flight_stats() -> Dict[str, int]:
+    """Efficiency computations run and saved by coalescing identical in-flight requests."""
+    return _efficiency_flights.stats()
+
+
+def _tube_job(request: TubePlanRequest) -> Dict[str, Any]:
+    """compute_tube_plan keyword arguments for one tube plan request."""
+    return {
+        "items": [(item.length_mm, item.qty) for item in request.items],
+        "stock_length_mm": request.stock_length_mm,
+        "kerf_mm": request.kerf_mm,
+        "algo": request.algo,
+        "time_limit_s": request.time_limit_s,
+    }
+
+
+def _tube_plan_response(request: TubePlanRequest, plan: TubePlan) -> TubePlanResponse:
+    """Convert an engine TubePlan to the response model."""
+    return TubePlanResponse(
+        calc_id=uuid.uuid4().hex[:8],
+        profile=request.profile,
+        stock_length_mm=plan.stock_length_mm,
+        kerf_mm=plan.kerf_mm,
+        algo=plan.algo,
+        strategy=plan.strategy,
+        total_pieces=plan.total_pieces,
+        num_tubes=plan.num_tubes,
+        lower_bound_tubes=plan.lower_bound_tubes,
+        efficiency=round(plan.efficiency, 4),
+        total_used_mm=plan.total_used_mm,
+        total_waste_mm=plan.total_waste_mm,
+        patterns=[
+            TubePatternResult(
+                pieces_mm=pattern.sample.pieces_mm,
+                used_mm=pattern.sample.used_mm,
+                waste_mm=pattern.sample.waste_mm,
+                count=pattern.count,
+            )
+            for pattern in plan.patterns
+        ],
+        infeasible_pieces=[
+            InfeasiblePiece(length_mm=length_mm, reason=reason)
+            for length_mm, reason in plan.infeasible_pieces
+        ],
+        solve_ms=plan.solve_ms,
+        version=ENGINE_VERSION,
+        message="ok"
+    )
+
+
+def compute_tube_plan_wrapper(request: TubePlanRequest) -> TubePlanResponse:
+    """
+    Wrapper around compute_tube_plan for a single tube job.
+    
+    Runs on an engine executor worker, so the engine solves in-process
+    (max_workers=1); parallelism across jobs comes from the executor.
+    
+    Args:
+        request: TubePlanRequest with profile, stock length, kerf, algo and items
+        
+    Returns:
+        TubePlanResponse with the plan's patterns and metrics
+    """
+    plan = compute_tube_plan(**_tube_job(request), max_workers=1)
+    return _tube_plan_response(request, plan)
+
+
+def tube_batch_response(results: List[TubePlanResponse]) -> TubeBatchResponse:
+    """
+    Combine per-job tube plan responses into a batch response.
+    
+    Args:
+        results: TubePlanResponse per job, in job order
+        
+    Returns:
+        TubeBatchResponse with the results and total tube count
+    """
+    return TubeBatchResponse(
+        results=results,
+        total_tubes=sum(result.num_tubes for result in results),
+        version=ENGINE_VERSION,
+        message="ok"
+    )
@@ -0,0 +1,311 @@
+"""
+Bounded executor for CPU-bound engine calls.
+
+Engine calls (nesting, tube plans) run in a pool of worker processes so the
+asyncio event loop keeps serving health probes and other clients. Admission
+is bounded: at most ENGINE_WORKERS + ENGINE_MAX_QUEUE requests are in flight,
+further requests get 503. Work still queued for a client that disconnected
+is cancelled.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from fastapi import HTTPException, Request
+from nester_api.app.core.config import get_settings
+from nester_api.app.core.logging import logger
+
+
+class EngineBusyError(Exception):
+    """Raised when the executor's queue is full."""
+
+
+class ClientDisconnectedError(Exception):
+    """Raised when the client went away before its engine work finished."""
+
+
+def _warm_up() -> int:
+    """Import the engine and run a tiny calculation in a worker (pre-warm task)."""
+    from nester.engine.core import Line, compute_efficiency
+    compute_efficiency([Line(line_id="warm-up", width_mm=1000, drop_mm=1000, qty=1)])
+    return os.getpid()
+
+
+class EngineExecutor:
+    """
+    Bounded pool for engine calls with admission control.
+
+    Args:
+        max_workers: Worker count (processes or threads)
+        max_queue: Admitted requests allowed to wait for a worker
+        kind: "process" or "thread"
+        disconnect_poll_s: How often a waiting request checks for client disconnect
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        kind: str = "process",
+        disconnect_poll_s: float = 0.25,
+    ):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown engine executor kind: {kind}")
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(0, int(max_queue))
+        self.kind = kind
+        self.disconnect_poll_s = disconnect_poll_s
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    @property
+    def capacity(self) -> int:
+        """Requests that may be in flight (running + queued)."""
+        return self.max_workers + self.max_queue
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.kind == "process":
+                    # spawn: workers never inherit the server's threads or locks
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix="engine"
+                    )
+                logger.info(f"Engine executor started: kind={self.kind}, workers={self.max_workers}")
+            return self._pool
+
+    async def prewarm(self) -> None:
+        """Start every worker and load the engine in it before traffic arrives."""
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        pids = await asyncio.gather(
+            *(loop.run_in_executor(pool, _warm_up) for _ in range(self.max_workers))
+        )
+        logger.info(f"Engine executor warmed up: {len(set(pids))} worker(s)")
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise EngineBusyError(
+                    f"Engine queue full ({self.in_flight} requests in flight, capacity {self.capacity})"
+                )
+            self.in_flight += 1
+
+    def _release(self, outcome: str) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    async def map(
+        self,
+        fn: Callable[..., Any],
+        args: Sequence[Any],
+        request: Optional[Request] = None,
+    ) -> List[Any]:
+        """
+        Run fn(arg) for each arg on the pool as one admitted request.
+
+        Raises:
+            EngineBusyError: if the queue is full
+            ClientDisconnectedError: if request's client disconnected first
+        """
+        self._admit()
+        outcome = "cancelled"
+        futures: List["asyncio.Future[Any]"] = []
+        try:
+            loop = asyncio.get_running_loop()
+            pool = self._get_pool()
+            futures = [loop.run_in_executor(pool, fn, arg) for arg in args]
+            pending = set(futures)
+            while pending:
+                _, pending = await asyncio.wait(pending, timeout=self.disconnect_poll_s)
+                if pending and request is not None and await request.is_disconnected():
+                    raise ClientDisconnectedError("Client disconnected before the calculation finished")
+            outcome = "failed"
+            results = [future.result() for future in futures]
+            outcome = "completed"
+            return results
+        finally:
+            if outcome == "cancelled":
+                # Queued work is dropped; work already running in a worker finishes unobserved
+                for future in futures:
+                    future.cancel()
+            self._release(outcome)
+
+    def submit_many(self, fn: Callable[..., Any], args: Sequence[Any]) -> List["Future[Any]"]:
+        """
+        Start fn(arg) for each arg on the pool as one admitted request, without
+        waiting (for callers that share or poll the futures, such as coalesced
+        requests and jobs). The request is released when every future finishes.
+
+        Raises:
+            EngineBusyError: if the queue is full
+        """
+        if not args:
+            return []
+        self._admit()
+        futures: List["Future[Any]"] = []
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit(fn, arg) for arg in args]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            self._release("failed")
+            raise
+        pending = [len(futures)]
+
+        def finished(_: "Future[Any]") -> None:
+            with self._lock:
+                pending[0] -= 1
+                if pending[0]:
+                    return
+            if any(future.cancelled() for future in futures):
+                self._release("cancelled")
+            elif any(future.exception() is not None for future in futures):
+                self._release("failed")
+            else:
+                self._release("completed")
+
+        for future in futures:
+            future.add_done_callback(finished)
+        return futures
+
+    def submit(self, fn: Callable[..., Any], arg: Any) -> "Future[Any]":
+        """Start fn(arg) on the pool without waiting for it (see submit_many)."""
+        return self.submit_many(fn, [arg])[0]
+
+    async def run(self, fn: Callable[..., Any], arg: Any, request: Optional[Request] = None) -> Any:
+        """Run fn(arg) on the pool (see map)."""
+        results = await self.map(fn, [arg], request)
+        return results[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load and counters."""
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.max_workers,
+                "capacity": self.capacity,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers (a new pool is created on next use)."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+            logger.info("Engine executor stopped")
+
+
+_executor: Optional[EngineExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_engine_executor() -> EngineExecutor:
+    """Get the process-wide engine executor, configured from settings on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            settings = get_settings()
+            _executor = EngineExecutor(
+                max_workers=settings.ENGINE_WORKERS or os.cpu_count() or 1,
+                max_queue=settings.ENGINE_MAX_QUEUE,
+                kind=settings.ENGINE_EXECUTOR,
+                disconnect_poll_s=settings.ENGINE_DISCONNECT_POLL_S,
+            )
+        return _executor
+
+
+def _busy(e: EngineBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail={"error": "server_busy", "details": str(e)},
+        headers={"Retry-After": "1"},
+    )
+
+
+def _client_closed(e: ClientDisconnectedError) -> HTTPException:
+    return HTTPException(
+        status_code=499,
+        detail={"error": "client_closed_request", "details": str(e)},
+    )
+
+
+async def map_engine(request: Request, fn: Callable[..., Any], args: Sequence[Any]) -> List[Any]:
+    """
+    Run an engine wrapper on each of args on the engine executor, for an endpoint.
+
+    The calls run in parallel and count as one request against the queue limit.
+
+    Raises:
+        HTTPException(503) if the engine queue is full
+        HTTPException(499) if the client disconnected
+    """
+    try:
+        return await get_engine_executor().map(fn, args, request)
+    except EngineBusyError as e:
+        raise _busy(e)
+    except ClientDisconnectedError as e:
+        raise _client_closed(e)
+
+
+async def run_engine(request: Request, fn: Callable[..., Any], arg: Any) -> Any:
+    """Run fn(arg) on the engine executor, for an endpoint (see map_engine)."""
+    results = await map_engine(request, fn, [arg])
+    return results[0]
+
+
+def submit_engine(fn: Callable[..., Any], args: Sequence[Any]) -> List["Future[Any]"]:
+    """
+    Start fn(arg) for each of args on the engine executor as one admitted
+    request, for an endpoint that waits on the futures with wait_engine.
+
+    Raises:
+        HTTPException(503) if the engine queue is full
+    """
+    try:
+        return get_engine_executor().submit_many(fn, args)
+    except EngineBusyError as e:
+        raise _busy(e)
+
+
+async def wait_engine(request: Optional[Request], future: "Future[Any]") -> Any:
+    """
+    Result of a future from submit_engine, checking for client disconnect while
+    waiting. The future itself is left running (it may be shared).
+
+    Raises:
+        HTTPException(499) if the client disconnected
+    """
+    waiting = asyncio.wrap_future(future)
+    # Retrieve the outcome even if this caller stops waiting, so a shared
+    # failure is not logged as "never retrieved" for every caller that left
+    waiting.add_done_callback(lambda f: f.cancelled() or f.exception())
+    poll_s = get_engine_executor().disconnect_poll_s
+    while not waiting.done():
+        await asyncio.wait({waiting}, timeout=poll_s)
+        if not waiting.done() and request is not None and await request.is_disconnected():
+            raise _client_closed(ClientDisconnectedError("Client disconnected before the calculation finished"))
+    if waiting.cancelled():
+        # Only happens when the executor shuts down with the work still queued
+        raise _busy(EngineBusyError("Engine executor stopped before the calculation started"))
+    return waiting.result()
@@ -0,0 +1,237 @@
+"""
+Background jobs for quotes too large to calculate within one HTTP request.
+
+Jobs are queued locally and at most JOB_WORKERS of them run at a time. Each
+job is calculated on the shared engine executor (see executor.py), so it is
+admitted and counted like any other engine request and takes its process from
+ENGINE_WORKERS; a job identical to a calculation already in flight shares
+it. The worker reports progress, as line layouts are packed,
+through a shared list held by a multiprocessing manager. Finished jobs and
+their results are kept for JOB_RESULT_TTL_S and then dropped.
+"""
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+from multiprocessing.managers import SyncManager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from nester_api.app.core.config import get_settings
+from nester_api.app.core.engine_client import join_efficiency_job, leave_efficiency_flight
+from nester_api.app.core.executor import EngineBusyError
+from nester_api.app.core.logging import logger
+from nester_api.app.models.requests import EfficiencyRequest
+from nester_api.app.models.responses import EfficiencyResponse, ErrorDetail, JobStatusResponse
+
+
+class JobQueueFullError(Exception):
+    """Raised when too many jobs are already waiting for a worker."""
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
+
+
+@dataclass
+class Job:
+    """One submitted quote and its state."""
+    job_id: str
+    request: Optional[EfficiencyRequest]
+    submitted_at: float
+    status: str = "queued"
+    layouts_done: int = 0
+    layouts_total: int = 0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    expires_at: Optional[float] = None
+    result: Optional[EfficiencyResponse] = None
+    error: Optional[ErrorDetail] = None
+    lines: int = 0
+    quote_id: str = ""
+
+    def status_response(self) -> JobStatusResponse:
+        done = self.status == "succeeded"
+        pct = 100.0 if done else (100.0 * self.layouts_done / self.layouts_total if self.layouts_total else 0.0)
+        return JobStatusResponse(
+            job_id=self.job_id,
+            status=self.status,
+            quote_id=self.quote_id,
+            lines=self.lines,
+            layouts_done=self.layouts_done,
+            layouts_total=self.layouts_total,
+            progress_pct=round(pct, 1),
+            submitted_at=_iso(self.submitted_at),
+            started_at=_iso(self.started_at),
+            finished_at=_iso(self.finished_at),
+            expires_at=_iso(self.expires_at),
+            error=self.error,
+        )
+
+
+class JobManager:
+    """
+    Local job queue; jobs are calculated on the engine executor.
+
+    The job threads only submit work to the engine executor and wait for it,
+    refreshing progress every poll_s; a job whose submission finds the engine
+    queue full stays queued and retries.
+
+    Args:
+        max_workers: Jobs calculated at the same time
+        max_queued: Jobs allowed to wait for a worker
+        ttl_s: How long a finished job is kept
+        poll_s: How often a running job refreshes its progress
+    """
+
+    def __init__(self, max_workers: int, max_queued: int, ttl_s: float, poll_s: float = 0.25):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queued = max(0, int(max_queued))
+        self.ttl_s = ttl_s
+        self.poll_s = poll_s
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._progress_manager: Optional[SyncManager] = None
+        self._closed = threading.Event()
+        self.rejected = 0
+
+    def _progress_list(self) -> Any:
+        """A [done, total] list shared with engine worker processes."""
+        with self._lock:
+            if self._progress_manager is None:
+                # spawn, like the engine executor: never fork the server's threads
+                self._progress_manager = multiprocessing.get_context("spawn").Manager()
+            return self._progress_manager.list([0, 0])
+
+    def _purge(self, now: float) -> None:
+        expired = [job_id for job_id, job in self._jobs.items() if job.expires_at is not None and job.expires_at <= now]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, request: EfficiencyRequest) -> Job:
+        """
+        Queue a quote for calculation.
+
+        Raises:
+            JobQueueFullError: if max_queued jobs are already waiting
+        """
+        now = time.time()
+        with self._lock:
+            self._purge(now)
+            waiting = sum(1 for job in self._jobs.values() if job.status == "queued")
+            if waiting >= self.max_queued:
+                self.rejected += 1
+                raise JobQueueFullError(f"Job queue full ({waiting} jobs waiting)")
+            job = Job(
+                job_id=uuid.uuid4().hex,
+                request=request,
+                submitted_at=now,
+                lines=len(request.lines),
+                quote_id=request.quote_id,
+            )
+            self._jobs[job.job_id] = job
+        self._pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job, or None if it is unknown or expired."""
+        with self._lock:
+            self._purge(time.time())
+            return self._jobs.get(job_id)
+
+    def _progress(self, job: Job, done: int, total: int) -> None:
+        with self._lock:
+            job.layouts_done, job.layouts_total = done, total
+
+    def _finish(self, job: Job, status: str) -> None:
+        with self._lock:
+            job.status = status
+            job.finished_at = time.time()
+            job.expires_at = job.finished_at + self.ttl_s
+            job.request = None  # Only the result is kept
+
+    def _join_engine(self, job: Job, progress: Any) -> Tuple[str, Any, bool]:
+        """Submit the job to the engine executor (or join an identical calculation), waiting while its queue is full."""
+        while True:
+            try:
+                return join_efficiency_job(job.request, progress)
+            except EngineBusyError:
+                if self._closed.wait(self.poll_s):
+                    raise
+
+    def _run(self, job: Job) -> None:
+        try:
+            progress = self._progress_list()
+            key, future, shared = self._join_engine(job, progress)
+            try:
+                with self._lock:
+                    job.status = "running"
+                    job.started_at = time.time()
+                logger.info(
+                    f"Job started: job_id={job.job_id}, quote_id={job.quote_id}, lines={job.lines}, shared={shared}"
+                )
+                while not wait([future], timeout=self.poll_s).done:
+                    self._progress(job, *progress[:])
+                result = future.result()
+            finally:
+                leave_efficiency_flight(key, future)
+            job.result = result.model_copy(update={"calc_id": uuid.uuid4().hex[:8]}) if shared else result
+            self._progress(job, *progress[:])
+        except ValueError as e:
+            job.error = ErrorDetail(error="bad_request", details=str(e))
+        except Exception as e:
+            logger.exception(f"Job error: job_id={job.job_id}, error={str(e)}")
+            job.error = ErrorDetail(error="server_error", details=str(e))
+        self._finish(job, "failed" if job.error is not None else "succeeded")
+        logger.info(
+            f"Job finished: job_id={job.job_id}, status={job.status}, "
+            f"duration={(job.finished_at - (job.started_at or job.submitted_at)) * 1000:.2f}ms"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts by status."""
+        with self._lock:
+            self._purge(time.time())
+            counts = {status: 0 for status in ("queued", "running", "succeeded", "failed")}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return dict(counts, workers=self.max_workers, rejected=self.rejected)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the workers; jobs still queued are dropped."""
+        self._closed.set()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            progress_manager, self._progress_manager = self._progress_manager, None
+        if progress_manager is not None:
+            progress_manager.shutdown()
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Get the process-wide job manager, configured from settings on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            settings = get_settings()
+            _manager = JobManager(
+                max_workers=settings.JOB_WORKERS,
+                max_queued=settings.JOB_MAX_QUEUED,
+                ttl_s=settings.JOB_RESULT_TTL_S,
+                poll_s=settings.JOB_POLL_S,
+            )
+        return _manager
+
+
+def shutdown_job_manager(wait: bool = True) -> None:
+    """Stop the job manager (a new one is created on next use)."""
+    global _manager
+    with _manager_lock:
+        manager, _manager = _manager, None
+    if manager is not None:
+        manager.shutdown(wait=wait)
@@ -2,7 +2,10 @@
 Health check endpoints.
 """
 from fastapi import APIRouter
-from typing import Dict
+from typing import Any, Dict
+from nester_api.app.core.executor import get_engine_executor
+from nester_api.app.core.jobs import get_job_manager
+from nester_api.app.core.engine_client import efficiency_cache_stats, single_flight_stats
 
 
 router = APIRouter()
@@ -20,18 +23,26 @@ async def health_live() -> Dict[str, str]:
 
 
 @router.get("/health/ready")
-async def health_ready() -> Dict[str, str]:
+async def health_ready() -> Dict[str, Any]:
     """
     Readiness probe endpoint.
     
     Returns 200 OK if the application is initialized and ready to serve requests.
-    Checks that the engine module can be imported.
+    Checks that the engine module can be imported and reports engine executor
+    load (in-flight requests, capacity, rejections), background job counts,
+    response cache counters and computations saved by coalescing.
     No authentication required.
     """
     try:
         # Verify engine can be imported
         from nester.engine.core import compute_efficiency
-        return {"status": "ok"}
+        return {
+            "status": "ok",
+            "engine": get_engine_executor().stats(),
+            "jobs": get_job_manager().stats(),
+            "response_cache": efficiency_cache_stats(),
+            "single_flight": single_flight_stats(),
+        }
     except Exception as e:
         # If engine import fails, return 503
         from fastapi import HTTPException
@@ -1,6 +1,7 @@
 """
 FastAPI application factory.
 """
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
@@ -9,8 +10,12 @@ from slowapi.util import get_remote_address
 from nester_api.app.core.config import get_settings
 from nester_api.app.core.logging import setup_logging
 from nester_api.app.core.rate_limit import get_rate_limit_key
+from nester_api.app.core.executor import get_engine_executor
+from nester_api.app.core.jobs import shutdown_job_manager
 from nester_api.app.middleware.correlation_id import CorrelationIDMiddleware
 from nester_api.app.api.v1.waste_efficiency import router as waste_efficiency_router
+from nester_api.app.api.v1.tubes import router as tubes_router
+from nester_api.app.api.v1.jobs import router as jobs_router
 from nester_api.app.health.routes import router as health_router
 
 
@@ -27,13 +32,24 @@ def create_app() -> FastAPI:
     logger = setup_logging()
     logger.info("Initializing Nester API application")
     
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Engine workers are started (and warmed up) before traffic arrives
+        executor = get_engine_executor()
+        if settings.ENGINE_PREWARM:
+            await executor.prewarm()
+        yield
+        shutdown_job_manager(wait=False)
+        executor.shutdown(wait=False)
+    
     # Create FastAPI app
     app = FastAPI(
         title="Kvadrat Waste API",
         version="1.0.0",
         description="Enterprise-grade waste efficiency calculation service",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        lifespan=lifespan
     )
     
     # Configure CORS
@@ -62,6 +78,8 @@ def create_app() -> FastAPI:
     
     # Include routers
     app.include_router(waste_efficiency_router)
+    app.include_router(tubes_router)
+    app.include_router(jobs_router)
     app.include_router(health_router)
     
     # Root endpoint
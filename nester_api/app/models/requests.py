@@ -1,7 +1,7 @@
 """
 Pydantic models for API request bodies.
 """
-from pydantic import BaseModel, Field, validator, conint
+from pydantic import BaseModel, Field, validator, conint, confloat
 from typing import List, Optional
 
 
@@ -67,4 +67,40 @@ class EfficiencyRequest(BaseModel):
         }
 
 
+class TubeItemIn(BaseModel):
+    """Single cut length in a tube plan request."""
+    length_mm: conint(gt=0)
+    qty: conint(gt=0)
+
+
+class TubePlanRequest(BaseModel):
+    """
+    Request body for a tube cutting plan.
+    
+    One job: a profile cut from a single stock length.
+    """
+    profile: Optional[str] = None
+    stock_length_mm: conint(gt=0) = 6000
+    kerf_mm: conint(ge=0) = 0
+    algo: str = Field(default="BFD", pattern="^(BFD|FFD|WFD|Exact|Pattern|Portfolio)$")
+    time_limit_s: confloat(gt=0, le=10) = 2.0
+    items: List[TubeItemIn]
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "profile": "RAIL-40-WHITE",
+                "stock_length_mm": 6000,
+                "kerf_mm": 3,
+                "algo": "BFD",
+                "items": [
+                    {"length_mm": 2300, "qty": 4},
+                    {"length_mm": 1450, "qty": 6}
+                ]
+            }
+        }
+
 
+class TubeBatchRequest(BaseModel):
+    """Request body for many independent tube plans in one call."""
+    jobs: List[TubePlanRequest]
@@ -2,7 +2,7 @@
 Pydantic models for API response bodies.
 """
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 
 class LineResult(BaseModel):
@@ -44,4 +44,84 @@ class EfficiencyResponse(BaseModel):
     message: str
 
 
+class ErrorDetail(BaseModel):
+    """Error for one item of a batch request."""
+    error: str
+    details: str
 
+
+class EfficiencyBatchItem(BaseModel):
+    """Result or error for one quote of a batch, at its position in the request."""
+    index: int
+    quote_id: Optional[str]
+    status: str                    # "ok" or "error"
+    result: Optional[EfficiencyResponse] = None
+    error: Optional[ErrorDetail] = None
+
+
+class EfficiencyBatchResponse(BaseModel):
+    """Response body for a batch of efficiency calculations; results are in request order."""
+    results: List[EfficiencyBatchItem]
+    succeeded: int
+    failed: int
+    version: str
+    message: str
+
+
+class TubePatternResult(BaseModel):
+    """One cutting pattern and how many tubes are cut with it."""
+    pieces_mm: List[int]
+    used_mm: int
+    waste_mm: int
+    count: int
+
+
+class InfeasiblePiece(BaseModel):
+    """A cut length that could not be planned."""
+    length_mm: int
+    reason: str
+
+
+class TubePlanResponse(BaseModel):
+    """Response body for a tube cutting plan."""
+    calc_id: str
+    profile: Optional[str]
+    stock_length_mm: int
+    kerf_mm: int
+    algo: str
+    strategy: str
+    total_pieces: int
+    num_tubes: int
+    lower_bound_tubes: int
+    efficiency: float
+    total_used_mm: int
+    total_waste_mm: int
+    patterns: List[TubePatternResult]
+    infeasible_pieces: List[InfeasiblePiece]
+    solve_ms: int
+    version: str
+    message: str
+
+
+class TubeBatchResponse(BaseModel):
+    """Response body for a tube plan batch; results are in job order."""
+    results: List[TubePlanResponse]
+    total_tubes: int
+    version: str
+    message: str
+
+
+class JobStatusResponse(BaseModel):
+    """Status and progress of a background job (see GET /api/v1/jobs/{job_id})."""
+    job_id: str
+    status: str  # "queued", "running", "succeeded" or "failed"
+    quote_id: str
+    lines: int
+    layouts_done: int  # Line layouts packed so far (one per line per roll width tried)
+    layouts_total: int
+    progress_pct: float
+    submitted_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    expires_at: Optional[str] = None
+    error: Optional[ErrorDetail] = None
@@ -0,0 +1,84 @@
+"""
+Tests for the engine executor.
+"""
+import asyncio
+import threading
+import time
+import pytest
+from nester_api.app.core.executor import EngineExecutor, EngineBusyError, ClientDisconnectedError
+
+
+class _DisconnectedRequest:
+    """Request stand-in whose client has gone away."""
+
+    async def is_disconnected(self) -> bool:
+        return True
+
+
+def test_executor_keeps_event_loop_free():
+    """Engine work runs off the loop, so other coroutines keep running."""
+    executor = EngineExecutor(max_workers=1, max_queue=0, kind="thread")
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.02)
+
+    async def main():
+        return await asyncio.gather(executor.run(time.sleep, 0.2), ticker())
+
+    start = time.perf_counter()
+    asyncio.run(main())
+    assert len(ticks) == 5 and ticks[-1] - start < 0.2
+    assert executor.stats()["completed"] == 1
+    executor.shutdown()
+
+
+def test_executor_rejects_when_queue_full():
+    """Requests beyond workers + queue are rejected instead of piling up."""
+    executor = EngineExecutor(max_workers=1, max_queue=1, kind="thread")
+
+    async def main():
+        first = asyncio.ensure_future(executor.run(time.sleep, 0.2))
+        second = asyncio.ensure_future(executor.run(time.sleep, 0.0))
+        await asyncio.sleep(0.01)
+        with pytest.raises(EngineBusyError):
+            await executor.run(time.sleep, 0.0)
+        await asyncio.gather(first, second)
+
+    asyncio.run(main())
+    stats = executor.stats()
+    assert (stats["rejected"], stats["completed"], stats["in_flight"]) == (1, 2, 0)
+    executor.shutdown()
+
+
+def test_executor_cancels_queued_work_on_disconnect():
+    """Queued work for a disconnected client never runs."""
+    executor = EngineExecutor(max_workers=1, max_queue=4, kind="thread", disconnect_poll_s=0.01)
+    ran = threading.Event()
+
+    async def main():
+        busy = asyncio.ensure_future(executor.run(time.sleep, 0.2))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ClientDisconnectedError):
+            await executor.run(lambda _: ran.set(), None, _DisconnectedRequest())
+        await busy
+
+    asyncio.run(main())
+    time.sleep(0.05)
+    assert not ran.is_set()
+    assert executor.stats()["cancelled"] == 1
+    executor.shutdown()
+
+
+def test_process_executor_prewarm_and_run():
+    """Process workers start on prewarm and run engine calls."""
+    executor = EngineExecutor(max_workers=1, max_queue=0, kind="process")
+
+    async def main():
+        await executor.prewarm()
+        return await executor.map(abs, [-3, 4])
+
+    assert asyncio.run(main()) == [3, 4]
+    executor.shutdown()
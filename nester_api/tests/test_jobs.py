@@ -0,0 +1,106 @@
+"""
+Tests for background job endpoints.
+"""
+import time
+import pytest
+from fastapi.testclient import TestClient
+from nester_api.app.main import create_app
+from nester_api.app.core.config import get_settings
+from nester_api.app.core.executor import get_engine_executor
+from nester_api.app.core.jobs import JobManager, JobQueueFullError
+from nester_api.app.models.requests import EfficiencyRequest
+
+
+@pytest.fixture
+def client():
+    """Create test client."""
+    return TestClient(create_app())
+
+
+@pytest.fixture
+def auth_headers():
+    """Return authentication headers for the configured API key."""
+    return {"X-API-Key": get_settings().API_KEY}
+
+
+def _quote(n_lines, qty=2):
+    return {
+        "quote_id": f"Q-JOB-{n_lines}",
+        "model": "blinds",
+        "available_widths_mm": [2400, 3000],
+        "lines": [
+            {"line_id": f"L{i}", "width_mm": 500 + (i % 40) * 25, "drop_mm": 1500 + (i % 7) * 100, "qty": qty}
+            for i in range(n_lines)
+        ]
+    }
+
+
+def _wait(client, auth_headers, job_id, timeout_s=30.0):
+    deadline = time.time() + timeout_s
+    while True:
+        status = client.get(f"/api/v1/jobs/{job_id}", headers=auth_headers).json()
+        if status["status"] in ("succeeded", "failed") or time.time() > deadline:
+            return status
+        time.sleep(0.05)
+
+
+def test_job_above_sync_line_limit(client, auth_headers):
+    """A quote too large for the synchronous endpoint runs as a job."""
+    quote = _quote(1500)
+    assert client.post("/api/v1/waste/efficiency", json=quote, headers=auth_headers).status_code == 400
+
+    response = client.post("/api/v1/jobs", json=quote, headers=auth_headers)
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.headers["Location"] == f"/api/v1/jobs/{job_id}"
+
+    status = _wait(client, auth_headers, job_id)
+    assert status["status"] == "succeeded"
+    assert status["lines"] == 1500 and status["progress_pct"] == 100.0
+    assert status["layouts_done"] == status["layouts_total"] >= 1500
+    assert status["expires_at"] is not None
+
+    result = client.get(f"/api/v1/jobs/{job_id}/result", headers=auth_headers)
+    assert result.status_code == 200
+    data = result.json()
+    assert [r["line_id"] for r in data["results"]] == [line["line_id"] for line in quote["lines"]]
+
+
+def test_job_result_matches_sync(client, auth_headers):
+    """A job runs on the engine executor and gives the same numbers as the synchronous endpoint."""
+    quote = _quote(200)
+    completed = get_engine_executor().stats()["completed"]
+    job_id = client.post("/api/v1/jobs", json=quote, headers=auth_headers).json()["job_id"]
+    assert _wait(client, auth_headers, job_id)["status"] == "succeeded"
+    assert get_engine_executor().stats()["completed"] == completed + 1
+    job = client.get(f"/api/v1/jobs/{job_id}/result", headers=auth_headers).json()
+    sync = client.post("/api/v1/waste/efficiency", json=quote, headers=auth_headers).json()
+    assert (job["results"], job["totals"]) == (sync["results"], sync["totals"])
+
+
+def test_failed_job_and_unknown_job(client, auth_headers):
+    """Engine errors surface on the result; unknown jobs are 404."""
+    job_id = client.post("/api/v1/jobs", json=_quote(3, qty=1001), headers=auth_headers).json()["job_id"]
+    status = _wait(client, auth_headers, job_id)
+    assert status["status"] == "failed" and status["error"]["error"] == "bad_request"
+    assert client.get(f"/api/v1/jobs/{job_id}/result", headers=auth_headers).status_code == 400
+    assert client.get("/api/v1/jobs/does-not-exist", headers=auth_headers).status_code == 404
+
+
+def test_job_manager_queue_and_ttl():
+    """Waiting jobs are bounded and finished jobs expire."""
+    manager = JobManager(max_workers=1, max_queued=1, ttl_s=0.0, poll_s=0.05)
+    request = EfficiencyRequest.model_validate(_quote(5))
+    manager._pool.submit(time.sleep, 0.2)  # Occupy the only worker
+
+    job = manager.submit(request)
+    with pytest.raises(JobQueueFullError):
+        manager.submit(request)
+    assert manager.stats()["rejected"] == 1
+
+    deadline = time.time() + 30.0
+    while job.status != "succeeded" and time.time() < deadline:
+        time.sleep(0.05)
+    assert job.result is not None and job.request is None
+    assert manager.get(job.job_id) is None
+    manager.shutdown()
@@ -0,0 +1,100 @@
+"""
+Tests for the efficiency response cache and ETag handling.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from nester_api.app.main import create_app
+from nester_api.app.core.config import get_settings
+from nester_api.app.core.engine_client import (
+    clear_efficiency_cache, efficiency_cache_stats, efficiency_request_key,
+)
+from nester_api.app.models.requests import EfficiencyRequest
+
+
+@pytest.fixture
+def client():
+    """Create test client with an empty response cache."""
+    clear_efficiency_cache()
+    return TestClient(create_app())
+
+
+@pytest.fixture
+def auth_headers():
+    """Return authentication headers for the configured API key."""
+    return {"X-API-Key": get_settings().API_KEY}
+
+
+@pytest.fixture
+def quote():
+    """Sample quote."""
+    return {
+        "quote_id": "Q-ETAG-1",
+        "model": "blinds",
+        "available_widths_mm": [3000, 2400, 2400],
+        "lines": [
+            {"line_id": "L1", "width_mm": 2300, "drop_mm": 2100, "qty": 2, "fabric_code": "FAB001"},
+            {"line_id": "L2", "width_mm": 1200, "drop_mm": 1800, "qty": 5}
+        ]
+    }
+
+
+def test_request_key_is_canonical(quote):
+    """Width order, duplicates and unused line fields don't change the key."""
+    key = efficiency_request_key(EfficiencyRequest.model_validate(quote))
+    reordered = dict(quote, available_widths_mm=[2400, 3000])
+    reordered["lines"] = [dict(quote["lines"][0], fabric_code=None), quote["lines"][1]]
+    assert efficiency_request_key(EfficiencyRequest.model_validate(reordered)) == key
+    changed = dict(quote, lines=[quote["lines"][0], dict(quote["lines"][1], qty=6)])
+    assert efficiency_request_key(EfficiencyRequest.model_validate(changed)) != key
+
+
+def test_repeat_request_served_from_cache(client, auth_headers, quote):
+    """A repeated quote is served from the cache with the same ETag and a new calc_id."""
+    first = client.post("/api/v1/waste/efficiency", json=quote, headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    hits = efficiency_cache_stats()["hits"]
+
+    second = client.post("/api/v1/waste/efficiency", json=quote, headers=auth_headers)
+    assert second.status_code == 200
+    assert second.headers["ETag"] == etag
+    assert efficiency_cache_stats()["hits"] == hits + 1
+    a, b = first.json(), second.json()
+    assert a["calc_id"] != b["calc_id"]
+    assert {k: v for k, v in a.items() if k != "calc_id"} == {k: v for k, v in b.items() if k != "calc_id"}
+
+
+def test_if_none_match_returns_304(client, auth_headers, quote):
+    """A matching If-None-Match gets 304; a stale one gets the full response."""
+    etag = client.post("/api/v1/waste/efficiency", json=quote, headers=auth_headers).headers["ETag"]
+
+    response = client.post(
+        "/api/v1/waste/efficiency", json=quote, headers=dict(auth_headers, **{"If-None-Match": etag})
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag and response.content == b""
+
+    response = client.post(
+        "/api/v1/waste/efficiency", json=quote, headers=dict(auth_headers, **{"If-None-Match": 'W/"stale"'})
+    )
+    assert response.status_code == 200 and response.json()["calc_id"]
+
+
+def test_if_none_match_without_cached_response_computes(client, auth_headers, quote):
+    """A matching ETag or "*" only gets 304 while the response is cached; otherwise it is calculated."""
+    etag = client.post("/api/v1/waste/efficiency", json=quote, headers=auth_headers).headers["ETag"]
+    clear_efficiency_cache()
+
+    for if_none_match in (etag, "*"):
+        response = client.post(
+            "/api/v1/waste/efficiency", json=quote, headers=dict(auth_headers, **{"If-None-Match": if_none_match})
+        )
+        assert response.status_code == 200 and response.json()["calc_id"]
+        assert response.headers["ETag"] == etag
+        clear_efficiency_cache()
+
+    client.post("/api/v1/waste/efficiency", json=quote, headers=auth_headers)
+    response = client.post(
+        "/api/v1/waste/efficiency", json=quote, headers=dict(auth_headers, **{"If-None-Match": "*"})
+    )
+    assert response.status_code == 304
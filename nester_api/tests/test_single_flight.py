@@ -0,0 +1,160 @@
+"""
+Tests for coalescing of identical in-flight efficiency requests.
+"""
+import asyncio
+from concurrent.futures import Future
+import httpx
+import pytest
+from fastapi import HTTPException
+from nester_api.app.main import create_app
+from nester_api.app.core.config import get_settings
+from nester.engine.core import LRUCache
+from nester_api.app.core import engine_client
+from nester_api.app.core.engine_client import (
+    SingleFlight, cached_efficiency_response, compute_efficiency_coalesced, efficiency_cache_stats,
+    single_flight_stats,
+)
+from nester_api.app.models.requests import EfficiencyRequest
+
+
+@pytest.fixture
+def flights(monkeypatch):
+    """A fresh single-flight table and response cache, so other tests' background work doesn't count."""
+    fresh = SingleFlight()
+    monkeypatch.setattr(engine_client, "_efficiency_flights", fresh)
+    monkeypatch.setattr(engine_client, "_response_cache", LRUCache(max_entries=64))
+    return fresh
+
+
+class Client:
+    """Stand-in for a Request that only answers is_disconnected()."""
+
+    def __init__(self, gone=False):
+        self.gone = gone
+
+    async def is_disconnected(self):
+        return self.gone
+
+
+def _request(quote_id):
+    return EfficiencyRequest.model_validate({
+        "quote_id": quote_id, "model": "blinds", "lines": [{"line_id": "L1", "width_mm": 900, "drop_mm": 900, "qty": 1}]
+    })
+
+
+def test_single_flight_shares_one_computation():
+    """Callers joining a key share its future; the last one to leave drops the key and cancels unstarted work."""
+    flights = SingleFlight()
+    started = []
+
+    def start(indexes):
+        started.append(indexes)
+        return [Future() for _ in indexes]
+
+    first = flights.join_many(["a", "a", "b"], start)
+    later, shared = flights.join("a", lambda: pytest.fail("a is in flight"))
+    assert started == [[0, 2]]
+    assert [s for _, s in first] == [False, True, False] and shared
+    assert first[0][0] is first[1][0] is later
+    assert flights.stats() == {"computations": 2, "coalesced": 2, "in_flight": 2}
+
+    first[2][0].set_result("b")
+    assert flights.join("b", lambda: pytest.fail("b is still joined")) == (first[2][0], True)
+    flights.leave("b", first[2][0])
+    flights.leave("b", first[2][0])
+    assert flights.stats()["in_flight"] == 1
+    for future in (first[0][0], first[1][0]):
+        flights.leave("a", future)
+    assert not later.cancelled()
+    flights.leave("a", later)
+    assert later.cancelled() and flights.stats()["in_flight"] == 0
+
+
+def test_followers_get_their_own_error_and_watch_their_client(flights):
+    """Each caller sharing a failed calculation gets a fresh exception; a disconnected one stops waiting."""
+    key = "test-followers"
+    future = Future()
+    flights.join(key, lambda: future)
+    request = _request("Q-FOLLOW")
+
+    async def main():
+        gone = await asyncio.gather(
+            compute_efficiency_coalesced(Client(True), key, request), return_exceptions=True
+        )
+        followers = [asyncio.ensure_future(compute_efficiency_coalesced(Client(False), key, request)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        future.set_exception(ValueError("bad quote"))
+        return gone[0], await asyncio.gather(*followers, return_exceptions=True)
+
+    gone, errors = asyncio.run(main())
+    assert isinstance(gone, HTTPException) and gone.status_code == 499
+    assert all(type(e) is ValueError and e.args == ("bad quote",) for e in errors)
+    assert errors[0] is not errors[1] and future.exception() not in errors
+    flights.leave(key, future)
+
+
+def test_response_cached_before_the_flight_is_released(flights):
+    """A finished calculation stays joinable until its response is cached, so no request recomputes it."""
+    key = "test-cached"
+    future = Future()
+    flights.join(key, lambda: future)  # Another caller still waiting
+
+    async def main():
+        leader = asyncio.ensure_future(compute_efficiency_coalesced(Client(), key, _request("Q-CACHED")))
+        await asyncio.sleep(0.05)
+        future.set_result(engine_client.compute_efficiency_wrapper(_request("Q-CACHED")))
+        return await leader
+
+    response = asyncio.run(main())
+    assert cached_efficiency_response(key)["totals"] == response.model_dump(mode="json")["totals"]
+    assert flights.stats()["in_flight"] == 1
+    flights.leave(key, future)
+    assert flights.stats() == {"computations": 1, "coalesced": 1, "in_flight": 0}
+
+
+def test_identical_requests_run_engine_once(flights):
+    """Identical concurrent requests to the endpoint run the engine once."""
+    quote = {
+        "quote_id": "Q-FLIGHT-1",
+        "model": "blinds",
+        "available_widths_mm": [2400, 3000],
+        "lines": [{"line_id": f"L{i}", "width_mm": 900 + 10 * i, "drop_mm": 2000, "qty": 3} for i in range(40)]
+    }
+    headers = {"X-API-Key": get_settings().API_KEY}
+
+    async def main():
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/api/v1/waste/efficiency", json=quote, headers=headers) for _ in range(5)
+            ))
+
+    responses = asyncio.run(main())
+    assert [r.status_code for r in responses] == [200] * 5
+    assert len({r.json()["calc_id"] for r in responses}) == 5
+    stats = single_flight_stats()
+    assert stats["computations"] == 1
+    assert stats["coalesced"] + efficiency_cache_stats()["hits"] == 4
+
+
+def test_batch_quotes_share_calculations(flights):
+    """Identical quotes in a batch are calculated once."""
+    quote = {
+        "quote_id": "Q-FLIGHT-BATCH",
+        "model": "blinds",
+        "available_widths_mm": [2400, 3000],
+        "lines": [{"line_id": "L1", "width_mm": 1200, "drop_mm": 2000, "qty": 4}]
+    }
+    headers = {"X-API-Key": get_settings().API_KEY}
+
+    async def main():
+        transport = httpx.ASGITransport(app=create_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/v1/waste/efficiency:batch", json=[quote, quote], headers=headers)
+
+    response = asyncio.run(main())
+    assert response.status_code == 200
+    first, second = response.json()["results"]
+    assert first["result"]["totals"] == second["result"]["totals"]
+    assert first["result"]["calc_id"] != second["result"]["calc_id"]
+    assert single_flight_stats() == {"computations": 1, "coalesced": 1, "in_flight": 0}
@@ -0,0 +1,79 @@
+"""
+Tests for tube cutting plan endpoints.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from nester_api.app.main import create_app
+from nester_api.app.core.config import get_settings
+
+
+@pytest.fixture
+def client():
+    """Create test client."""
+    return TestClient(create_app())
+
+
+@pytest.fixture
+def auth_headers():
+    """Return authentication headers for the configured API key."""
+    return {"X-API-Key": get_settings().API_KEY}
+
+
+@pytest.fixture
+def sample_job():
+    """Sample tube job."""
+    return {
+        "profile": "RAIL-40-WHITE",
+        "stock_length_mm": 6000,
+        "kerf_mm": 3,
+        "items": [
+            {"length_mm": 2300, "qty": 4},
+            {"length_mm": 1450, "qty": 6},
+            {"length_mm": 7000, "qty": 1}
+        ]
+    }
+
+
+def test_tube_plan_valid_request(client, auth_headers, sample_job):
+    """Test a single tube plan."""
+    response = client.post("/api/v1/tubes/plan", json=sample_job, headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["profile"] == "RAIL-40-WHITE"
+    assert data["total_pieces"] == 10
+    assert data["num_tubes"] >= data["lower_bound_tubes"] > 0
+    assert sum(p["count"] for p in data["patterns"]) == data["num_tubes"]
+    assert sum(len(p["pieces_mm"]) * p["count"] for p in data["patterns"]) == 10
+    assert [p["length_mm"] for p in data["infeasible_pieces"]] == [7000]
+    assert "X-Correlation-ID" in response.headers
+
+
+def test_tube_plan_batch_keeps_job_order(client, auth_headers, sample_job):
+    """Test that batch results come back in job order."""
+    jobs = [
+        dict(sample_job, profile=f"P{k}", stock_length_mm=5000 + 500 * k)
+        for k in range(3)
+    ]
+    response = client.post("/api/v1/tubes/plan:batch", json={"jobs": jobs}, headers=auth_headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert [r["profile"] for r in data["results"]] == ["P0", "P1", "P2"]
+    assert [r["stock_length_mm"] for r in data["results"]] == [5000, 5500, 6000]
+    assert data["total_tubes"] == sum(r["num_tubes"] for r in data["results"])
+
+
+def test_tube_plan_requires_auth(client, sample_job):
+    """Test that tube endpoints reuse API key authentication."""
+    response = client.post("/api/v1/tubes/plan", json=sample_job)
+    assert response.status_code == 401
+
+
+def test_tube_plan_rejects_bad_input(client, auth_headers, sample_job):
+    """Test validation of tube jobs."""
+    bad = dict(sample_job, items=[{"length_mm": 0, "qty": 1}])
+    assert client.post("/api/v1/tubes/plan", json=bad, headers=auth_headers).status_code == 422
+
+    response = client.post("/api/v1/tubes/plan:batch", json={"jobs": []}, headers=auth_headers)
+    assert response.status_code == 400
@@ -3,6 +3,7 @@ Tests for waste efficiency endpoint.
 """
 import pytest
 from fastapi.testclient import TestClient
+from nester.engine import ENGINE_VERSION
 from nester_api.app.main import create_app
 from nester_api.app.core.config import Settings
 
@@ -70,7 +71,7 @@ def test_efficiency_valid_request(client, auth_headers, sample_request):
     assert data["quote_id"] == "Q-TEST-001"
     assert "results" in data
     assert "totals" in data
-    assert data["version"] == "1.0.0"
+    assert data["version"] == ENGINE_VERSION
     assert data["message"] == "ok"
     
     # Verify results structure
@@ -0,0 +1,76 @@
+"""
+Tests for the batch waste efficiency endpoint.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from limits import parse
+from nester_api.app.main import create_app
+from nester_api.app.core.config import get_settings
+from nester_api.app.api.v1 import waste_efficiency
+
+
+@pytest.fixture
+def client():
+    """Create test client."""
+    return TestClient(create_app())
+
+
+@pytest.fixture
+def auth_headers():
+    """Return authentication headers for the configured API key."""
+    return {"X-API-Key": get_settings().API_KEY}
+
+
+def _quote(quote_id, width_mm=2000):
+    return {
+        "quote_id": quote_id,
+        "model": "blinds",
+        "available_widths_mm": [2400, 3000],
+        "lines": [{"line_id": "L1", "width_mm": width_mm, "drop_mm": 2100, "qty": 2}]
+    }
+
+
+def test_batch_results_in_request_order(client, auth_headers):
+    """Each quote gets its own result, in request order."""
+    quotes = [_quote("Q-1", 1200), _quote("Q-2", 2300), _quote("Q-3", 900)]
+    response = client.post("/api/v1/waste/efficiency:batch", json=quotes, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (3, 0)
+    assert [item["index"] for item in data["results"]] == [0, 1, 2]
+    assert [item["result"]["quote_id"] for item in data["results"]] == ["Q-1", "Q-2", "Q-3"]
+
+    single = client.post("/api/v1/waste/efficiency", json=quotes[1], headers=auth_headers).json()
+    assert data["results"][1]["result"]["totals"] == single["totals"]
+
+
+def test_batch_invalid_quote_does_not_fail_batch(client, auth_headers):
+    """A quote that fails validation gets its own error."""
+    bad = _quote("Q-bad")
+    del bad["lines"]
+    response = client.post("/api/v1/waste/efficiency:batch", json=[_quote("Q-1"), bad], headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["succeeded"], data["failed"]) == (1, 1)
+    item = data["results"][1]
+    assert (item["quote_id"], item["status"], item["result"]) == ("Q-bad", "error", None)
+    assert item["error"]["error"] == "bad_request" and "lines" in item["error"]["details"]
+
+
+def test_batch_size_limits(client, auth_headers):
+    """Empty and oversized batches are rejected."""
+    response = client.post("/api/v1/waste/efficiency:batch", json=[], headers=auth_headers)
+    assert response.status_code == 400
+    too_many = [_quote(f"Q-{i}") for i in range(get_settings().BATCH_MAX_QUOTES + 1)]
+    response = client.post("/api/v1/waste/efficiency:batch", json=too_many, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_batch_rate_limit_counts_quotes(client, auth_headers, monkeypatch):
+    """The batch quota is charged per quote, not per request."""
+    monkeypatch.setattr(waste_efficiency, "batch_quote_limit", parse("3/minute"))
+    first = client.post("/api/v1/waste/efficiency:batch", json=[_quote("Q-1"), _quote("Q-2")], headers=auth_headers)
+    assert first.status_code == 200
+    second = client.post("/api/v1/waste/efficiency:batch", json=[_quote("Q-3"), _quote("Q-4")], headers=auth_headers)
+    assert second.status_code == 429
+    assert second.headers["Retry-After"]
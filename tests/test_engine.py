@@ -1,6 +1,42 @@
 """Tests for nesting engine core functions."""
 
-from nester.engine.core import Line, compute_efficiency
+import random
+
+import pytest
+
+from nester.engine.core import (
+    Line,
+    LRUCache,
+    Placement,
+    PlacementRun,
+    StockLength,
+    TubeCut,
+    compute_efficiency,
+    compute_layout,
+    compute_layout_per_line,
+    compute_layout_runs,
+    compute_markers,
+    compute_tube_plan,
+    compute_tube_plans,
+    compute_tube_plan_multi_stock,
+    compute_tube_plans_by_profile,
+    dedupe_patterns,
+    improve_pair_swaps,
+    build_markers_from_layout,
+    clear_line_memo,
+    clear_tube_plan_memo,
+    clear_marker_cache,
+    line_memo_stats,
+    tube_plan_memo_stats,
+    marker_cache_stats,
+    pack_bfd,
+    pack_ffd,
+    pack_wfd,
+    validate_demand,
+    _pack_ffdh,
+    _compact_layout,
+    _estimate_length_with_gaps,
+)
 
 
 def test_engine_stub_shape():
@@ -65,3 +101,518 @@ def test_engine_with_candidate_widths():
     assert totals is not None
     assert "eff_pct" in totals
 
+
+
+def test_pack_ffdh_matches_linear_best_fit():
+    """Indexed shelf lookup picks the same shelf as a linear best-fit scan."""
+    rng = random.Random(42)
+    items = [(rng.choice([400, 650, 900, 1200]), rng.choice([800, 1500, 2100])) for _ in range(300)]
+    roll, gap = 3000, 10.0
+
+    placements, shelves = _pack_ffdh(items, roll, gap, keep_input_order=True)
+
+    ref_shelves = []
+    for p, (w, h) in zip(placements, items):
+        fits = [
+            (roll - s["used_y"] - (gap + w), i)
+            for i, s in enumerate(ref_shelves)
+            if h <= s["height"] and gap + w <= roll - s["used_y"]
+        ]
+        if fits:
+            level = min(fits)[1]
+            ref_shelves[level]["used_y"] += gap + w
+        else:
+            level = len(ref_shelves)
+            ref_shelves.append({"height": h, "used_y": w})
+        assert p.level == level
+    assert len(shelves) == len(ref_shelves)
+
+
+def test_pack_ffdh_fractional_gap_accumulates_y_per_piece():
+    """With a fractional gap, y is the per-piece float sum, bit for bit."""
+    rng = random.Random(3)
+    items = [(rng.choice([422, 650, 901]), rng.choice([800, 1500])) for _ in range(200)]
+    roll, gap = 3000, 3.3
+
+    placements, _ = _pack_ffdh(items, roll, gap, keep_input_order=True)
+
+    used = {}
+    for p in placements:
+        if p.level in used:
+            assert p.y == used[p.level] + gap
+            used[p.level] += gap + p.w
+        else:
+            assert p.y == 0.0
+            used[p.level] = float(p.w)
+
+
+def test_compact_layout_merges_adjacent_equal_height_shelves():
+    """Equal-height neighbours that fit side by side collapse into one shelf."""
+    placements = [
+        PlacementRun(x=0.0, y=0.0, w=1000.0, h=500.0, level=0, item_id=0, count=1, pitch=1000.0),
+        PlacementRun(x=500.0, y=0.0, w=800.0, h=500.0, level=1, item_id=1, count=1, pitch=800.0),
+        PlacementRun(x=500.0, y=800.0, w=400.0, h=500.0, level=1, item_id=2, count=1, pitch=400.0),
+        PlacementRun(x=1000.0, y=0.0, w=900.0, h=700.0, level=2, item_id=3, count=1, pitch=900.0),
+    ]
+    shelves = [
+        {"x0": 0.0, "height": 500.0, "used_y": 1000.0},
+        {"x0": 500.0, "height": 500.0, "used_y": 1200.0},
+        {"x0": 1000.0, "height": 700.0, "used_y": 900.0},
+    ]
+
+    new_placements, new_shelves = _compact_layout(placements, shelves, 3000, 0.0)
+
+    assert [s["x0"] for s in new_shelves] == [0.0, 500.0]
+    assert new_shelves[0]["used_y"] == 2200.0
+    assert [(p.level, p.y) for p in new_placements] == [(0, 0.0), (0, 1000.0), (0, 1800.0), (1, 0.0)]
+
+
+def test_compute_layout_runs_matches_expanded_pieces():
+    """Run-length input packs exactly like the expanded piece list."""
+    runs = [(700, 2100, 9), (1200, 1500, 4), (700, 2100, 3), (450, 900, 11)]
+    expanded = [(w, h) for (w, h, c) in runs for _ in range(c)]
+
+    by_runs = compute_layout_runs(runs, 3000, 10.0)
+    by_pieces = compute_layout(expanded, 3000, 10.0)
+
+    assert len(by_runs["placements"].runs) < len(expanded)
+    assert len(by_runs["placements"]) == len(expanded)
+    assert list(by_runs["placements"]) == list(by_pieces["placements"])
+    assert by_runs["used_length_mm"] == by_pieces["used_length_mm"]
+    assert by_runs["levels"] == by_pieces["levels"]
+
+
+def test_candidate_widths_pick_lowest_waste():
+    """Every fitting candidate width is evaluated and the least waste wins."""
+    lines = [
+        Line(line_id="L1", width_mm=950, drop_mm=2100, qty=6),
+        Line(line_id="L2", width_mm=1300, drop_mm=1800, qty=4),
+    ]
+    candidate_widths = [1900, 2050, 2400, 3000]
+
+    results, totals = compute_efficiency(lines, candidate_widths_mm=candidate_widths, report_alternatives=2)
+
+    used_by_width = {
+        w: compute_efficiency(lines, candidate_widths_mm=[w])[1]["total_used_area_m2"]
+        for w in candidate_widths
+    }
+    best = min(candidate_widths, key=lambda w: (used_by_width[w], w))
+    assert all(r["roll_width_mm"] == best for r in results)
+    assert totals["total_used_area_m2"] == used_by_width[best]
+    assert len(totals["alternatives"]) == 2
+    assert best not in [a["roll_width_mm"] for a in totals["alternatives"]]
+
+
+def test_candidate_widths_per_line_mode():
+    """Per-line mode lets each line use its own best width."""
+    lines = [
+        Line(line_id="L1", width_mm=1900, drop_mm=2000, qty=3),
+        Line(line_id="L2", width_mm=1000, drop_mm=2000, qty=4),
+    ]
+    results, _ = compute_efficiency(lines, candidate_widths_mm=[1900, 2050, 3000], width_mode="line")
+
+    assert results[0]["roll_width_mm"] == 1900
+    assert results[1]["roll_width_mm"] == 2050
+
+
+def test_lru_cache_bounds_and_counters():
+    """Entry and byte limits evict least recently used entries; counters track it."""
+    cache = LRUCache(max_entries=2, max_bytes=100, sizeof=len)
+    cache.put("a", "x" * 10)
+    cache.put("b", "x" * 10)
+    assert cache.get("a") == "x" * 10  # "a" is now most recently used
+    cache.put("c", "x" * 10)           # entry limit evicts "b"
+    assert cache.get("b") is None
+    cache.put("d", "x" * 95)           # byte limit evicts "a" and "c"
+
+    stats = cache.stats()
+    assert len(cache) == 1
+    assert stats["bytes"] == 95
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 3)
+
+
+def test_marker_cache_hit_and_clear():
+    """Markerization results are served from the cache until it is cleared."""
+    clear_marker_cache()
+    placements = compute_layout([(1000, 2000)] * 6, 3000)["placements"]
+    before = marker_cache_stats()
+
+    first = build_markers_from_layout(placements, 3000, batch_id=1)
+    second = build_markers_from_layout(placements, 3000, batch_id=1)
+    after = marker_cache_stats()
+
+    assert second is first
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+    clear_marker_cache()
+    assert marker_cache_stats()["entries"] == 0
+
+
+def test_layout_fingerprint_identifies_geometry():
+    """Layouts carry a fingerprint that follows their geometry, not the line tag."""
+    a = compute_layout([(1000, 2000)] * 6 + [(700, 1500)] * 3, 3000)["placements"]
+    b = compute_layout([(700, 1500)] * 3 + [(1000, 2000)] * 6, 3000)["placements"]
+    c = compute_layout([(1000, 2000)] * 7, 3000)["placements"]
+
+    assert a.fingerprint == b.fingerprint
+    assert a.with_line_id(7).fingerprint == a.fingerprint
+    assert a.fingerprint != c.fingerprint
+
+
+def test_marker_split_keeps_groups_within_roll_length():
+    """Overflowing buckets split into markers that each fit the roll length with gaps."""
+    clear_marker_cache()
+    placements = []
+    for level in range(20):
+        x = 0
+        for k in range(25):
+            h = 100 if k % 2 else 110
+            placements.append(Placement(x=x, y=level * 10, w=10, h=h, level=level, item_id=len(placements)))
+            x += h
+
+    markers = build_markers_from_layout(placements, 3000, batch_id=1, roll_length_mm=1000)
+
+    assert len(markers) > 3
+    assert sum(len(m.rects) for m in markers) == len(placements)
+    for m in markers:
+        group = [placements[r.item_id] for r in m.rects]
+        assert _estimate_length_with_gaps(group) <= 1000
+    clear_marker_cache()
+
+
+def test_compute_markers_fills_markers_without_cutting_shelves():
+    """Single-pass markers hold every piece once and stay within the roll length."""
+    runs = [(700, 2100, 20), (1300, 1500, 9), (900, 2900, 7), (400, 600, 15)]
+    markers = compute_markers(runs, 3000, gap_mm=10)
+
+    ids = sorted(r.item_id for m in markers for r in m.rects)
+    assert ids == list(range(sum(c for _, _, c in runs)))
+    assert [m.idx for m in markers] == list(range(1, len(markers) + 1))
+    for m in markers:
+        assert min(r.x for r in m.rects) == 0
+        assert max(r.x + r.h for r in m.rects) <= m.length_mm <= 5900
+
+    layout = compute_layout_runs(runs, 3000, gap_mm=10)
+    clear_marker_cache()
+    assert len(markers) <= len(build_markers_from_layout(layout["placements"], 3000, batch_id=1))
+    clear_marker_cache()
+
+
+def test_compute_layout_per_line_parallel_matches_sequential():
+    """The process-pool mode returns the sequential results, in input order."""
+    lines = [
+        {"runs": [(700 + 100 * (i % 5), 1500 + 200 * (i % 4), 400 + 37 * i)], "roll_width_mm": 3000}
+        for i in range(12)
+    ]
+    sequential = compute_layout_per_line(lines)
+    parallel = compute_layout_per_line(lines, max_workers=2)
+
+    assert [r["line_id"] for r in parallel["lines"]] == list(range(1, 13))
+    for a, b in zip(sequential["lines"], parallel["lines"]):
+        assert list(a["placements"]) == list(b["placements"])
+        assert {k: v for k, v in a.items() if k != "placements"} == {k: v for k, v in b.items() if k != "placements"}
+    assert parallel["combined"] == sequential["combined"]
+
+
+def test_compute_efficiency_memoises_repeated_lines():
+    """Repeated line geometry is packed once and served from the memo afterwards."""
+    shapes = [(700, 2100, 30), (1300, 1500, 9), (900, 2900, 4)]
+    lines = [Line(line_id=f"L{i}", width_mm=w, drop_mm=d, qty=q) for i, (w, d, q) in enumerate(shapes * 20)]
+    clear_line_memo()
+    before = line_memo_stats()
+
+    results, totals = compute_efficiency(lines)
+    stats = line_memo_stats()
+    assert stats["misses"] - before["misses"] == len(shapes)
+    assert stats["entries"] == len(shapes)
+    assert [r["line_id"] for r in results] == [line.line_id for line in lines]
+    assert results[0] == dict(results[3], line_id="L0")
+
+    again = compute_efficiency(lines)
+    assert again == (results, totals)
+    assert line_memo_stats()["hits"] - stats["hits"] == len(shapes)
+    clear_line_memo()
+
+
+def test_compute_efficiency_reports_progress():
+    """Progress counts every line layout and finishes at done == total."""
+    lines = [Line(line_id=f"L{i}", width_mm=600 + 7 * i, drop_mm=1800, qty=3) for i in range(120)]
+    clear_line_memo()
+    reports = []
+
+    results, totals = compute_efficiency(lines, candidate_widths_mm=[2400, 3000], progress=lambda d, t: reports.append((d, t)))
+    assert (results, totals) == compute_efficiency(lines, candidate_widths_mm=[2400, 3000])
+    assert all(d1 <= d2 for (d1, _), (d2, _) in zip(reports, reports[1:]))
+    assert reports[-1][0] == reports[-1][1] >= len(lines)
+    assert len(reports) > 3
+    clear_line_memo()
+
+
+def test_pack_bfd_matches_linear_best_fit():
+    """Sorted capacity lookup picks the same tube as a linear best-fit scan."""
+    rng = random.Random(7)
+    pieces = sorted((rng.randint(150, 2500) for _ in range(400)), reverse=True)
+    stock, kerf = 6000, 3
+
+    tubes = pack_bfd(pieces, stock, kerf)
+
+    ref = []
+    for piece in pieces:
+        fits = [(stock - sum(t) - kerf * (len(t) - 1), i) for i, t in enumerate(ref)]
+        fits = [(rem, i) for rem, i in fits if piece + kerf <= rem]
+        if fits:
+            ref[min(fits)[1]].append(piece)
+        else:
+            ref.append([piece])
+    assert [t.pieces_mm for t in tubes] == ref
+    for t in tubes:
+        assert t.used_mm == sum(t.pieces_mm) + kerf * (len(t.pieces_mm) - 1)
+        assert t.waste_mm == stock - t.used_mm >= 0
+
+
+def test_exact_tube_plan_beats_bfd_and_proves_optimum():
+    """The exact path finds the 4-tube plan BFD misses and proves it optimal."""
+    pieces = [2940, 2710, 2470, 2300, 2210, 1200, 1160, 1070, 1060, 870, 680, 570, 550]
+    items = [(p, 1) for p in pieces]
+
+    bfd = compute_tube_plan(items, stock_length_mm=5000, exact_threshold=0)
+    exact = compute_tube_plan(items, stock_length_mm=5000)
+
+    assert bfd.num_tubes == 5 and bfd.algo == "BFD"
+    assert exact.num_tubes == 4 and exact.algo == "Exact"
+    assert exact.lower_bound_tubes == 4 and exact.gap_tubes == 0
+    assert sorted(p for t in exact.tubes for p in t.pieces_mm) == sorted(pieces)
+
+
+def test_exact_tube_plan_respects_kerf_and_time_limit():
+    """Kerf stays in every tube's used length; a zero budget still returns a valid plan."""
+    rng = random.Random(3)
+    items = [(rng.randint(300, 2900), rng.randint(1, 4)) for _ in range(30)]
+
+    plan = compute_tube_plan(items, stock_length_mm=6000, kerf_mm=4, algo="Exact", time_limit_s=0.0)
+
+    assert plan.total_pieces == sum(q for _, q in items)
+    assert sum(len(t.pieces_mm) for t in plan.tubes) == plan.total_pieces
+    for t in plan.tubes:
+        assert t.used_mm == sum(t.pieces_mm) + 4 * (len(t.pieces_mm) - 1) <= 6000
+    assert 0 < plan.lower_bound_tubes <= plan.num_tubes
+
+
+def test_validate_demand_merges_counts_without_expanding():
+    """Demand keeps one count per width and reports infeasible widths."""
+    demand, infeasible = validate_demand([(1200, 5), (900, 2), (1200, 3), (7000, 1), (500, 0)], 6000, 3)
+
+    assert demand == [(1200, 8), (900, 2)]
+    assert [w for w, _ in infeasible] == [7000]
+
+
+def test_pattern_tube_plan_covers_large_demand():
+    """High-multiplicity orders are cut from patterns that meet demand exactly."""
+    items = [(2350, 40000), (1780, 25000), (1225, 30000), (640, 18000)]
+    plan = compute_tube_plan(items, stock_length_mm=6000, kerf_mm=3)
+
+    assert plan.algo == "Pattern"
+    assert plan.total_pieces == sum(q for _, q in items)
+    assert sum(p.count for p in plan.patterns) == plan.num_tubes
+    for width, qty in items:
+        assert sum(p.key.count(width) * p.count for p in plan.patterns) == qty
+    for p in plan.patterns:
+        assert p.sample.used_mm == sum(p.key) + 3 * (len(p.key) - 1) <= 6000
+    assert plan.total_used_mm == sum(p.sample.used_mm * p.count for p in plan.patterns)
+    assert plan.lower_bound_tubes <= plan.num_tubes <= plan.lower_bound_tubes * 1.01
+
+
+def test_local_search_swaps_pieces_to_empty_a_tube():
+    """A 1-2 exchange plus a move empties the third BFD tube."""
+    pieces = [2500, 2000, 1500, 1500, 1500, 1000]
+    tubes = pack_bfd(pieces, 5000, 0)
+    assert [t.pieces_mm for t in tubes] == [[2500, 2000], [1500, 1500, 1500], [1000]]
+
+    improved = improve_pair_swaps(tubes, 5000, 0)
+
+    assert len(improved) == 2
+    assert sorted(p for t in improved for p in t.pieces_mm) == sorted(pieces)
+    assert all(t.used_mm == 5000 and t.waste_mm == 0 for t in improved)
+
+
+def test_local_search_respects_kerf_and_time_budget():
+    """Improved tubes stay within stock with kerf; a zero budget returns the input plan."""
+    rng = random.Random(11)
+    pieces = sorted((rng.randint(200, 3500) for _ in range(600)), reverse=True)
+    tubes = pack_bfd(pieces, 6000, 3)
+
+    assert improve_pair_swaps(tubes, 6000, 3, time_limit_s=0.0) == tubes
+    improved = improve_pair_swaps(tubes, 6000, 3)
+    assert len(improved) <= len(tubes)
+    assert sorted(p for t in improved for p in t.pieces_mm) == sorted(pieces)
+    for t in improved:
+        assert t.used_mm == sum(t.pieces_mm) + 3 * (len(t.pieces_mm) - 1) <= 6000
+
+
+def test_local_search_move_budget_is_deterministic():
+    """The move budget, not the clock, bounds the search: reruns give the same plan."""
+    rng = random.Random(23)
+    pieces = sorted((rng.randint(200, 3500) for _ in range(2000)), reverse=True)
+    tubes = pack_bfd(pieces, 6000, 3)
+
+    assert improve_pair_swaps(tubes, 6000, 3, max_moves=0) == tubes
+    capped = improve_pair_swaps(tubes, 6000, 3, max_moves=500, time_limit_s=60.0)
+    assert capped == improve_pair_swaps(tubes, 6000, 3, max_moves=500, time_limit_s=60.0)
+    assert improve_pair_swaps(tubes, 6000, 3) == improve_pair_swaps(tubes, 6000, 3)
+
+    items = [(length, 1) for length in pieces]
+    quick = compute_tube_plan(items, stock_length_mm=6000, kerf_mm=3, time_limit_s=0.0)
+    assert quick.patterns == compute_tube_plan(items, stock_length_mm=6000, kerf_mm=3).patterns
+
+
+def test_first_and_worst_fit_packers():
+    """FFD takes the earliest tube that fits; WFD the one with the most room."""
+    pieces = [3000, 2500, 2000, 1000, 900]
+
+    assert [t.pieces_mm for t in pack_ffd(pieces, 5000, 0)] == [[3000, 2000], [2500, 1000, 900]]
+    assert [t.pieces_mm for t in pack_wfd(pieces, 5000, 0)] == [[3000, 1000, 900], [2500, 2000]]
+
+
+def test_portfolio_tube_plan_records_winner():
+    """The portfolio keeps the fewest-tube plan and says which strategy found it."""
+    rng = random.Random(5)
+    items = [(rng.randint(300, 3000), rng.randint(1, 12)) for _ in range(15)]
+    bfd = compute_tube_plan(items, stock_length_mm=6000, kerf_mm=3, exact_threshold=0)
+
+    for workers in (1, 2):
+        plan = compute_tube_plan(
+            items, stock_length_mm=6000, kerf_mm=3, algo="Portfolio", time_limit_s=1.0, max_workers=workers
+        )
+        assert plan.algo == "Portfolio"
+        assert plan.strategy.split(":")[0] in ("BFD", "FFD", "WFD", "Exact", "Random")
+        assert plan.solve_ms >= 0
+        assert plan.lower_bound_tubes <= plan.num_tubes <= bfd.num_tubes
+        assert sorted(p for t in plan.tubes for p in t.pieces_mm) == sorted(p for t in bfd.tubes for p in t.pieces_mm)
+
+
+def test_compute_tube_plans_matches_single_plans():
+    """Batched tube plans equal one-at-a-time plans, in job order."""
+    jobs = [
+        {"items": [(2300, 4), (1450, 6)], "stock_length_mm": stock, "kerf_mm": 3}
+        for stock in (5000, 6000, 6500)
+    ]
+    for workers in (1, 2):
+        plans = compute_tube_plans(jobs, max_workers=workers)
+        assert [p.stock_length_mm for p in plans] == [5000, 6000, 6500]
+        for job, plan in zip(jobs, plans):
+            single = compute_tube_plan(**job)
+            assert plan.num_tubes == single.num_tubes
+            assert [t.pieces_mm for t in plan.tubes] == [t.pieces_mm for t in single.tubes]
+
+
+def test_tube_plan_stored_as_patterns():
+    """Plans keep one cut per pattern; per-tube lists are expanded on request."""
+    cut = TubeCut(pieces_mm=[2000, 1500, 1500], used_mm=5000, waste_mm=1000)
+    assert cut.key == (1500, 1500, 2000)
+
+    patterns = dedupe_patterns([cut, TubeCut([3000], 3000, 3000), cut], [40, 1, 2])
+    assert [(p.key, p.count) for p in patterns] == [((1500, 1500, 2000), 42), ((3000,), 1)]
+
+    plan = compute_tube_plan([(2000, 500), (1500, 1000)], stock_length_mm=5000, exact_threshold=0)
+    assert plan.num_tubes == 500 == sum(p.count for p in plan.patterns)
+    assert len(plan.patterns) == 1
+    assert "tubes" not in vars(plan)
+    tubes = plan.tubes
+    assert len(tubes) == plan.num_tubes and all(t is plan.patterns[0].sample for t in tubes)
+
+
+def test_multi_stock_plan_mixes_lengths():
+    """One solve over several lengths beats every single length and meets demand."""
+    items = [(2400, 90), (1900, 60), (1550, 120), (800, 75)]
+    plan = compute_tube_plan_multi_stock(items, [5000, 6000, 6500], kerf_mm=3)
+
+    best_single = min(
+        compute_tube_plan(items, stock_length_mm=length, kerf_mm=3, algo="Pattern").num_tubes * length
+        for length in (5000, 6000, 6500)
+    )
+    assert plan.lower_bound_cost <= plan.total_cost == plan.total_stock_mm <= best_single
+    assert [p.stock_length_mm for p in plan.plans] == sorted((p.stock_length_mm for p in plan.plans), reverse=True)
+    assert plan.num_tubes == sum(p.num_tubes for p in plan.plans)
+
+    cut = {}
+    for sub in plan.plans:
+        for pat in sub.patterns:
+            assert pat.sample.used_mm == sum(pat.key) + 3 * (len(pat.key) - 1) <= sub.stock_length_mm
+            for width in pat.key:
+                cut[width] = cut.get(width, 0) + pat.count
+    assert cut == dict(items) and not plan.infeasible_pieces
+
+
+def test_multi_stock_plan_respects_inventory_and_cost():
+    """Inventory caps tubes per length; shortfalls are reported, not over-cut."""
+    items = [(2900, 10), (1400, 10)]
+    plan = compute_tube_plan_multi_stock(
+        items, [StockLength(6000, available=3), StockLength(3000, available=4, cost=1.0)], kerf_mm=0
+    )
+    used = {p.stock_length_mm: p.num_tubes for p in plan.plans}
+    assert used.get(6000, 0) <= 3 and used.get(3000, 0) <= 4
+    planned = sum(len(pat.key) * pat.count for p in plan.plans for pat in p.patterns)
+    shortfall = sum(int(reason.split(" x ")[1].split(":")[0]) for _, reason in plan.infeasible_pieces)
+    assert planned + shortfall == 20 and shortfall > 0
+
+    cheap = compute_tube_plan_multi_stock(items, [StockLength(6000), StockLength(3000, cost=1.0)])
+    assert [p.stock_length_mm for p in cheap.plans] == [3000]
+
+    with pytest.raises(ValueError):
+        compute_tube_plan_multi_stock(items, [6000, 6000])
+    with pytest.raises(ValueError):
+        compute_tube_plan_multi_stock(items, [])
+
+
+def test_tube_plan_memo_canonical_orders(monkeypatch):
+    """Reordered or split items hit the memo with a private copy; the engine version is part of the key."""
+    import nester.engine.core as core
+
+    clear_tube_plan_memo()
+    before = tube_plan_memo_stats()
+    first = compute_tube_plan([(2300, 4), (1450, 6)], stock_length_mm=6000, kerf_mm=3)
+    again = compute_tube_plan([(1450, 2), (2300, 4), (1450, 4)], stock_length_mm=6000, kerf_mm=3)
+    assert again == first and again is not first
+    again.patterns[0].sample.pieces_mm.append(1)
+    again.infeasible_pieces.append((9000, "too_long"))
+    assert compute_tube_plan([(2300, 4), (1450, 6)], stock_length_mm=6000, kerf_mm=3) == first
+    stats = tube_plan_memo_stats()
+    assert (stats["hits"] - before["hits"], stats["misses"] - before["misses"]) == (2, 1)
+
+    assert compute_tube_plan([(2300, 4), (1450, 6)], stock_length_mm=6000, kerf_mm=5) is not first
+    batch = compute_tube_plans([{"items": [(1450, 6), (2300, 4)], "stock_length_mm": 6000, "kerf_mm": 3}] * 2)
+    assert batch[0] == batch[1] == first and batch[0] is not batch[1]
+
+    portfolio = dict(items=[(2300, 4), (1450, 6)], stock_length_mm=6000, algo="Portfolio", time_limit_s=0.5)
+    compute_tube_plan(**portfolio, max_workers=1)
+    misses = tube_plan_memo_stats()["misses"]
+    compute_tube_plan(**portfolio, max_workers=2)
+    assert tube_plan_memo_stats()["misses"] == misses + 1
+
+    monkeypatch.setattr(core, "ENGINE_VERSION", "test-next")
+    misses = tube_plan_memo_stats()["misses"]
+    compute_tube_plan([(2300, 4), (1450, 6)], stock_length_mm=6000, kerf_mm=3)
+    assert tube_plan_memo_stats()["misses"] == misses + 1
+    clear_tube_plan_memo()
+
+
+def test_tube_plans_by_profile_groups_and_totals():
+    """Items are planned per profile; totals add up across profiles."""
+    items = [
+        ("RAIL-WHITE", 2300, 4), ("RAIL-BLACK", 1450, 6), ("RAIL-WHITE", 1450, 3),
+        ("BOTTOM-BAR", 3100, 5), ("RAIL-BLACK", 2700, 2),
+    ]
+    for workers in (1, 2):
+        clear_tube_plan_memo()
+        grouped = compute_tube_plans_by_profile(
+            items, kerf_mm=3, stock_lengths_mm={"BOTTOM-BAR": 6500}, max_workers=workers
+        )
+        assert list(grouped.plans) == ["RAIL-WHITE", "RAIL-BLACK", "BOTTOM-BAR"]
+        assert grouped.plans["BOTTOM-BAR"].stock_length_mm == 6500
+        assert grouped.plans["RAIL-WHITE"].total_pieces == 7
+        single = compute_tube_plan([(1450, 6), (2700, 2)], stock_length_mm=6000, kerf_mm=3)
+        assert grouped.plans["RAIL-BLACK"].num_tubes == single.num_tubes
+        assert grouped.num_tubes == sum(p.num_tubes for p in grouped.plans.values())
+        assert grouped.total_pieces == 20
+        assert grouped.total_stock_mm == grouped.total_used_mm + grouped.total_waste_mm
+    clear_tube_plan_memo()